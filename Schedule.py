@@ -447,7 +447,18 @@ class GeneticAlgorithm:
         for _ in range(population_size):
             self.population.append(prototype.MakeNewFromPrototype())
 
-    def evolve(self, max_generations=1, target_fitness=1.0):
+    def evolve(self, max_generations=1, target_fitness=1.0, progress=None, should_stop=None):
+        """
+        Fait évoluer la population.
+
+        Args:
+            max_generations (int): Nombre maximal de générations
+            target_fitness (float): Score à partir duquel on s'arrête
+            progress (callable, optional): Appelé à chaque génération avec
+                (génération, max_generations, meilleur score)
+            should_stop (callable, optional): Retourne True pour interrompre
+                l'évolution (le meilleur emploi du temps trouvé est retourné)
+        """
         best_schedule = None
         
         for g in range(max_generations):
@@ -458,12 +469,17 @@ class GeneticAlgorithm:
             best = self.population[0]
             
             # print(f"Generation {self.generation} | Best Fitness: {best.fitness:.3f}")
+            if progress is not None:
+                progress(g + 1, max_generations, best.fitness)
             
             if best.fitness >= target_fitness:
                 return best
             
             best_schedule = best
             
+            if should_stop is not None and should_stop():
+                return best_schedule
+            
             # Sélection et Reproduction (Elitisme: on garde le meilleur)
             new_population = [best] 
             
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Façade asyncio sur les lectures des contrôleurs.
+
+Les lectures SQLite sont bloquantes : elles sont confiées à un exécuteur de
+taille fixe (max_workers threads) au lieu d'un thread par requête. Chaque
+thread de travail exécute les requêtes nommées (queries) sur un pool de
+connexions en lecture seule qui lui est propre (voir queries.bind_pool),
+y compris la lecture de data_version (versioning.get_versions) faite par les
+caches : une lecture lancée par la façade ne peut pas écrire dans la base.
+
+Les appels identiques simultanés sont regroupés : si la même lecture (même
+méthode, mêmes arguments) est déjà en cours, l'appelant attend son résultat
+au lieu d'en lancer une seconde. Le résultat est alors partagé entre tous
+les appelants et ne doit pas être modifié.
+
+Exemple :
+
+    async with AsyncReadService(max_workers=4) as service:
+        edt, salles = await asyncio.gather(
+            service.get_group_timetable(2601),
+            service.search_free_room(2, 10, 2),
+        )
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import queries
+import recommender
+
+# Nombre de threads (et de connexions en lecture seule) de l'exécuteur
+DEFAULT_WORKERS = 4
+
+
+def _equipment_key(equipment):
+    """Équipements requis sous forme hachable (l'ordre d'une liste ne compte pas)."""
+    if equipment is None or isinstance(equipment, str):
+        return equipment
+    return tuple(sorted(equipment))
+
+
+def _student(user_id):
+    from controllers.student_controller import StudentController
+    return StudentController(user_id)
+
+
+def _teacher(user_id):
+    from controllers.teacher_controller import TeacherController
+    return TeacherController(user_id)
+
+
+class AsyncReadService:
+    """
+    Lectures des contrôleurs exécutées dans un exécuteur borné, avec regroupement.
+
+    Attributes:
+        max_workers (int): Nombre maximal de lectures exécutées en parallèle
+        executions (int): Lectures réellement exécutées
+        coalesced (int): Appels servis par une lecture déjà en cours
+        _pool (queries.ConnectionPool): Connexions en lecture seule des threads
+        _inflight (dict): clé d'appel -> future asyncio de la lecture en cours
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        """Prépare l'exécuteur (les threads et connexions sont créés à la demande)."""
+        self.max_workers = max_workers
+        self.executions = 0
+        self.coalesced = 0
+        self._pool = queries.ConnectionPool(size=max_workers, read_only=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="aioservice",
+                                            initializer=queries.bind_pool,
+                                            initargs=(self._pool,))
+        self._inflight = {}
+
+    async def _call(self, key, func, *args):
+        """
+        Exécute func(*args) dans l'exécuteur, ou rejoint l'exécution en cours de même clé.
+
+        Args:
+            key (tuple): Identifiant de l'appel (méthode et arguments) ; s'il n'est
+                pas hachable, l'appel n'est pas regroupé
+            func (callable): Lecture bloquante
+
+        Returns:
+            Le résultat de func (partagé entre les appels regroupés)
+        """
+        try:
+            hash(key)
+        except TypeError:
+            # Argument non hachable : lecture exécutée seule, sans regroupement
+            self.executions += 1
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, func, *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._inflight.pop(key, None))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        # shield : l'annulation d'un appelant n'annule pas la lecture des autres
+        return await asyncio.shield(future)
+
+    # --- Lectures ---
+
+    async def get_group_timetable(self, user_id):
+        """Emploi du temps du groupe d'un étudiant (StudentController.get_group_timetable)."""
+        return await self._call(("get_group_timetable", user_id),
+                                lambda: _student(user_id).get_group_timetable())
+
+    async def get_teacher_timetable(self, user_id):
+        """Emploi du temps d'un enseignant (TeacherController.get_teacher_timetable)."""
+        return await self._call(("get_teacher_timetable", user_id),
+                                lambda: _teacher(user_id).get_teacher_timetable())
+
+    async def search_free_room(self, day=None, start_hour=None, duration=2):
+        """Salles libres (StudentController.search_free_room, indépendant de l'étudiant)."""
+        return await self._call(("search_free_room", day, start_hour, duration),
+                                lambda: _student(None).search_free_room(day, start_hour, duration))
+
+    async def search_available_room(self, day, start_hour, duration=2, min_capacity=30,
+                                    equipment=None, top_k=recommender.DEFAULT_TOP_K):
+        """Salles classées pour un créneau (TeacherController.search_available_room)."""
+        return await self._call(
+            ("search_available_room", day, start_hour, duration, min_capacity,
+             _equipment_key(equipment), top_k),
+            lambda: _teacher(None).search_available_room(day, start_hour, duration,
+                                                         min_capacity, equipment, top_k))
+
+    # --- Cycle de vie ---
+
+    def close(self):
+        """Attend la fin des lectures en cours puis ferme threads et connexions."""
+        self._executor.shutdown(wait=True)
+        self._pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Analyse de l'occupation des salles.
+
+Construit en une seule passe sur l'emploi du temps un "cube"
+jour × heure × salle contenant, pour chaque heure de chaque salle, le nombre
+de cours qui l'occupent et le nombre d'étudiants présents. On en déduit :
+- le taux d'occupation pondéré par les heures (par salle, par jour, par heure) ;
+- le taux de remplissage des places (étudiants / capacité) ;
+- les créneaux surchargés (groupe plus grand que la salle, double réservation) ;
+- les heures les plus chargées du campus.
+
+Le cube est mis en cache et reconstruit seulement quand timetable, rooms ou
+groups ont changé (voir versioning).
+"""
+
+import threading
+
+import queries
+import versioning
+from database import DAYS
+from occupancy import DAY_START, DAY_END
+
+# Tables dont dépend le cube
+ANALYTICS_TABLES = ("timetable", "rooms", "groups")
+
+
+class OccupancyCube:
+    """
+    Occupation heure par heure de chaque salle sur la semaine.
+
+    Les cellules sont stockées à plat : l'indice de (jour, heure, salle) est
+    ((jour - 1) * nb_heures + (heure - DAY_START)) * nb_salles + indice_salle.
+
+    Attributes:
+        rooms (list): Salles (dict id, name, capacity) dans l'ordre du cube
+        days (list): Jours couverts (1=Lundi)
+        hours (list): Heures couvertes (DAY_START à DAY_END - 1)
+        courses (list): Nombre de cours par cellule
+        students (list): Nombre d'étudiants par cellule
+    """
+
+    def __init__(self, rooms, days=None, hours=None):
+        """Initialise un cube vide pour les salles données."""
+        self.rooms = rooms
+        self.days = list(days or sorted(DAYS))
+        self.hours = list(hours or range(DAY_START, DAY_END))
+        self._room_index = {room['id']: i for i, room in enumerate(rooms)}
+        size = len(self.days) * len(self.hours) * len(rooms)
+        self.courses = [0] * size
+        self.students = [0] * size
+
+    def _cell(self, day, hour, room_idx):
+        return ((day - self.days[0]) * len(self.hours) + (hour - self.hours[0])) * len(self.rooms) + room_idx
+
+    def add_course(self, room_id, day, start_hour, duration, student_count):
+        """Ajoute un cours (toutes les heures qu'il couvre) dans le cube."""
+        room_idx = self._room_index.get(room_id)
+        if room_idx is None or day not in self.days:
+            return
+        first = max(start_hour, self.hours[0])
+        last = min(start_hour + duration, self.hours[-1] + 1)
+        for hour in range(first, last):
+            cell = self._cell(day, hour, room_idx)
+            self.courses[cell] += 1
+            self.students[cell] += student_count or 0
+
+    # --- Agrégats ---
+
+    def room_utilisation(self):
+        """
+        Taux d'occupation et de remplissage par salle.
+
+        Returns:
+            list: Un dict par salle (name, capacity, hours_used, hours_available,
+                utilisation, seat_fill), trié par utilisation décroissante
+        """
+        nb_rooms = len(self.rooms)
+        used = [0] * nb_rooms
+        seats = [0] * nb_rooms
+        for cell, count in enumerate(self.courses):
+            if count:
+                room_idx = cell % nb_rooms
+                used[room_idx] += 1
+                seats[room_idx] += self.students[cell]
+
+        available = len(self.days) * len(self.hours)
+        result = []
+        for room_idx, room in enumerate(self.rooms):
+            capacity = room['capacity'] or 0
+            result.append({
+                'name': room['name'],
+                'capacity': capacity,
+                'hours_used': used[room_idx],
+                'hours_available': available,
+                'utilisation': used[room_idx] / available if available else 0.0,
+                # Remplissage moyen des places pendant les heures occupées
+                'seat_fill': (seats[room_idx] / (used[room_idx] * capacity)
+                              if used[room_idx] and capacity else 0.0),
+            })
+        result.sort(key=lambda r: r['utilisation'], reverse=True)
+        return result
+
+    def day_hour_utilisation(self):
+        """
+        Part des salles occupées à chaque heure de chaque jour.
+
+        Returns:
+            dict: {(jour, heure): taux entre 0 et 1}
+        """
+        nb_rooms = len(self.rooms)
+        result = {}
+        for day in self.days:
+            for hour in self.hours:
+                start = self._cell(day, hour, 0)
+                busy = sum(1 for count in self.courses[start:start + nb_rooms] if count)
+                result[(day, hour)] = busy / nb_rooms if nb_rooms else 0.0
+        return result
+
+    def hotspots(self, top=5):
+        """
+        Heures les plus chargées du campus.
+
+        Returns:
+            list: Couples ((jour, heure), taux) triés par taux décroissant
+        """
+        ranked = sorted(self.day_hour_utilisation().items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top]
+
+    def overloaded_slots(self):
+        """
+        Heures où une salle est surchargée.
+
+        Returns:
+            list: Un dict par (jour, heure, salle) avec courses, students,
+                capacity et reason ("double réservation" et/ou "capacité dépassée")
+        """
+        result = []
+        for day in self.days:
+            for hour in self.hours:
+                for room_idx, room in enumerate(self.rooms):
+                    cell = self._cell(day, hour, room_idx)
+                    count = self.courses[cell]
+                    if not count:
+                        continue
+                    reasons = []
+                    if count > 1:
+                        reasons.append("double réservation")
+                    if room['capacity'] and self.students[cell] > room['capacity']:
+                        reasons.append("capacité dépassée")
+                    if reasons:
+                        result.append({
+                            'day': day,
+                            'hour': hour,
+                            'room': room['name'],
+                            'courses': count,
+                            'students': self.students[cell],
+                            'capacity': room['capacity'],
+                            'reason': ", ".join(reasons),
+                        })
+        return result
+
+    def summary(self):
+        """
+        Indicateurs globaux.
+
+        Returns:
+            dict: utilisation (moyenne pondérée par les heures) et seat_fill
+                (étudiants / places offertes pendant les heures occupées)
+        """
+        occupied = 0
+        students = 0
+        seats = 0
+        nb_rooms = len(self.rooms)
+        for cell, count in enumerate(self.courses):
+            if count:
+                occupied += 1
+                students += self.students[cell]
+                seats += self.rooms[cell % nb_rooms]['capacity'] or 0
+        total = len(self.courses)
+        return {
+            'utilisation': occupied / total if total else 0.0,
+            'seat_fill': students / seats if seats else 0.0,
+        }
+
+
+def build_cube():
+    """
+    Construit le cube d'occupation depuis la base (une requête par table).
+
+    Returns:
+        OccupancyCube: Le cube des salles actives
+    """
+    rooms = [dict(row) for row in queries.fetchall("analytics_rooms")]
+    cube = OccupancyCube(rooms)
+    for row in queries.fetchall("analytics_timetable"):
+        cube.add_course(row['room_id'], row['day'], row['start_hour'],
+                        row['duration'], row['student_count'])
+    return cube
+
+
+_cube = None
+_cube_stamp = None
+_lock = threading.Lock()
+
+
+def get_cube():
+    """
+    Retourne le cube partagé, reconstruit si les données ont changé.
+
+    Returns:
+        OccupancyCube: Le cube d'occupation à jour
+    """
+    global _cube, _cube_stamp
+    versions = versioning.get_versions()
+    stamp = tuple(versions.get(table, 0) for table in ANALYTICS_TABLES)
+    with _lock:
+        if _cube is None or _cube_stamp != stamp:
+            _cube = build_cube()
+            _cube_stamp = stamp
+        return _cube
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de disponibilité des salles (bitmaps jour × heure × salle).
+
+Les salles actives sont numérotées 0..n-1 ; pour chaque (jour, heure) on
+garde un entier dont le bit i vaut 1 si la salle i est occupée (cours de
+l'emploi du temps ou réservation approuvée). Les occupations sont lues en une
+seule requête. Des masques précalculés par équipement complètent l'index.
+
+Chercher les salles libres sur une plage revient alors à quelques opérations
+bit à bit, quel que soit le nombre de salles :
+
+    libres = ~(occupé[h1] | occupé[h2] | ...) & capacité_ok & équipement_ok
+
+Le moteur partagé (get_engine) est reconstruit quand timetable,
+reservations ou rooms ont changé (voir versioning).
+"""
+
+import re
+import threading
+
+import queries
+import versioning
+from occupancy import DAY_START, DAY_END
+
+# Tables dont dépend le moteur
+AVAILABILITY_TABLES = ("timetable", "reservations", "rooms")
+
+# Nombre d'heures représentées par jour (0h-23h)
+HOURS_PER_DAY = 24
+
+
+def parse_equipments(text):
+    """
+    Découpe une liste d'équipements ("PC, Projecteur") en ensemble normalisé.
+
+    Returns:
+        set: Équipements en minuscules
+    """
+    if not text:
+        return set()
+    return {item.strip().lower() for item in re.split(r"[,;/]", text) if item.strip()}
+
+
+def iter_bits(mask):
+    """Positions des bits à 1 d'un entier, par ordre croissant."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AvailabilityEngine:
+    """
+    Bitmaps d'occupation des salles actives.
+
+    Attributes:
+        rooms (list): Salles (dict id, name, type, capacity, equipments) ; l'indice
+            dans la liste est la position du bit de la salle
+        _occupied (dict): (jour, heure) -> bitset des salles occupées
+        _equipment (dict): équipement -> bitset des salles qui en disposent
+        _load (list): Heures occupées par salle sur la semaine
+        _group_slots (dict): (groupe, jour) -> [(début, durée, position de la salle)]
+    """
+
+    def __init__(self, rooms):
+        """Initialise un moteur sans occupation pour les salles données."""
+        self.rooms = rooms
+        self._position = {room['id']: i for i, room in enumerate(rooms)}
+        self._all = (1 << len(rooms)) - 1
+        self._occupied = {}
+        self._equipment = {}
+        self._load = [0] * len(rooms)
+        self._group_slots = {}
+        for i, room in enumerate(rooms):
+            for item in parse_equipments(room['equipments']):
+                self._equipment[item] = self._equipment.get(item, 0) | (1 << i)
+
+    def occupy(self, room_id, day, start_hour, duration, group_id=None):
+        """Marque une salle occupée sur une plage horaire (par un groupe si connu)."""
+        position = self._position.get(room_id)
+        if position is None:
+            return
+        bit = 1 << position
+        for hour in range(max(start_hour, 0), min(start_hour + duration, HOURS_PER_DAY)):
+            if not self._occupied.get((day, hour), 0) & bit:
+                self._load[position] += 1
+            self._occupied[(day, hour)] = self._occupied.get((day, hour), 0) | bit
+        if group_id is not None:
+            self._group_slots.setdefault((group_id, day), []).append((start_hour, duration, position))
+
+    # --- Masques ---
+
+    def busy_mask(self, day, start_hour, duration):
+        """Bitset des salles occupées à au moins une heure de la plage."""
+        mask = 0
+        for hour in range(start_hour, start_hour + duration):
+            mask |= self._occupied.get((day, hour), 0)
+        return mask
+
+    def capacity_mask(self, min_capacity):
+        """Bitset des salles d'au moins min_capacity places."""
+        if not min_capacity:
+            return self._all
+        mask = 0
+        for i, room in enumerate(self.rooms):
+            if (room['capacity'] or 0) >= min_capacity:
+                mask |= 1 << i
+        return mask
+
+    def equipment_mask(self, equipment):
+        """
+        Bitset des salles disposant de tous les équipements demandés.
+
+        Comme l'ancien filtre SQL (equipments LIKE '%...%'), un équipement
+        demandé est trouvé dès qu'il est contenu dans un équipement de la
+        salle : "projecteur" correspond à "Projecteur HD".
+
+        Args:
+            equipment (str or iterable): "PC", "PC, Projecteur" ou liste d'équipements
+        """
+        items = parse_equipments(equipment) if isinstance(equipment, str) else {
+            item.strip().lower() for item in (equipment or ()) if item and item.strip()
+        }
+        mask = self._all
+        for item in items:
+            item_mask = 0
+            for name, rooms in self._equipment.items():
+                if item in name:
+                    item_mask |= rooms
+            mask &= item_mask
+        return mask
+
+    # --- Requêtes ---
+
+    def free_mask(self, day, start_hour, duration, min_capacity=0, equipment=None):
+        """Bitset des salles libres et adaptées sur la plage horaire."""
+        mask = self._all & ~self.busy_mask(day, start_hour, duration)
+        mask &= self.capacity_mask(min_capacity)
+        if equipment:
+            mask &= self.equipment_mask(equipment)
+        return mask
+
+    def free_rooms(self, day, start_hour, duration, min_capacity=0, equipment=None):
+        """
+        Salles libres sur une plage horaire.
+
+        Args:
+            day (int): Jour (1=Lundi)
+            start_hour (int): Heure de début
+            duration (int): Durée en heures
+            min_capacity (int): Capacité minimale
+            equipment (str or iterable, optional): Équipement(s) requis
+
+        Returns:
+            list: Salles (dict) dans l'ordre de self.rooms
+        """
+        mask = self.free_mask(day, start_hour, duration, min_capacity, equipment)
+        return [self.rooms[i] for i in iter_bits(mask)]
+
+    def is_free(self, room_id, day, start_hour, duration):
+        """Indique si une salle est libre sur la plage horaire."""
+        position = self._position.get(room_id)
+        if position is None:
+            return False
+        return not self.busy_mask(day, start_hour, duration) >> position & 1
+
+    def free_intervals(self, room_id, day, day_start=DAY_START, day_end=DAY_END):
+        """
+        Plages libres d'une salle sur la journée.
+
+        Returns:
+            list: Couples (début, fin) triés
+        """
+        position = self._position.get(room_id)
+        if position is None:
+            return []
+        intervals = []
+        current = None
+        for hour in range(day_start, day_end):
+            if self._occupied.get((day, hour), 0) >> position & 1:
+                if current is not None:
+                    intervals.append((current, hour))
+                    current = None
+            elif current is None:
+                current = hour
+        if current is not None:
+            intervals.append((current, day_end))
+        return intervals
+
+    def load(self, room_id):
+        """Nombre d'heures occupées d'une salle sur la semaine."""
+        position = self._position.get(room_id)
+        return self._load[position] if position is not None else 0
+
+    def group_slots(self, group_id, day):
+        """
+        Cours d'un groupe pour un jour.
+
+        Returns:
+            list: Triplets (début, durée, salle) triés par heure de début
+        """
+        slots = sorted(self._group_slots.get((group_id, day), []))
+        return [(start_hour, duration, self.rooms[position])
+                for start_hour, duration, position in slots]
+
+    def free_intervals_by_room(self, day, day_start=DAY_START, day_end=DAY_END):
+        """
+        Plages libres de toutes les salles sur la journée.
+
+        Returns:
+            list: Couples (salle, [(début, fin), ...]) dans l'ordre de self.rooms
+        """
+        return [(room, self.free_intervals(room['id'], day, day_start, day_end))
+                for room in self.rooms]
+
+
+def build_engine():
+    """
+    Construit le moteur depuis la base : les salles actives, puis toutes les
+    occupations (emploi du temps + réservations approuvées) en une requête.
+
+    Returns:
+        AvailabilityEngine: Le moteur chargé
+    """
+    engine = AvailabilityEngine([dict(row) for row in queries.fetchall("active_rooms")])
+    for row in queries.fetchall("room_occupations"):
+        engine.occupy(row['room_id'], row['day'], row['start_hour'], row['duration'],
+                      group_id=row['group_id'])
+    return engine
+
+
+_engine = None
+_engine_stamp = None
+_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Retourne le moteur partagé, reconstruit si les données ont changé.
+
+    Returns:
+        AvailabilityEngine: Le moteur à jour
+    """
+    global _engine, _engine_stamp
+    versions = versioning.get_versions()
+    stamp = tuple(versions.get(table, 0) for table in AVAILABILITY_TABLES)
+    with _lock:
+        if _engine is None or _engine_stamp != stamp:
+            _engine = build_engine()
+            _engine_stamp = stamp
+        return _engine
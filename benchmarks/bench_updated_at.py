@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Mesure du coût de la mise à jour de updated_at (écritures de lignes et durée).
+
+Compare, sur une table de réservations en base temporaire :
+- "trigger"       : ancien trigger AFTER UPDATE qui réécrit toujours la ligne
+- "trigger WHEN"  : trigger limité aux UPDATE qui ne fixent pas updated_at
+- "write-once"    : aucun trigger, l'UPDATE fixe updated_at lui-même
+                    (ce que fait l'application depuis la migration 1)
+
+Chaque mode exécute les mêmes passes d'UPDATE sur toutes les lignes ; les
+écritures sont comptées avec Connection.total_changes (le second UPDATE fait
+par un trigger compte comme une écriture de plus).
+
+    python benchmarks/bench_updated_at.py --rows 50000 --passes 3
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+SCHEMA = """
+    CREATE TABLE reservations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_id INTEGER,
+        status TEXT DEFAULT 'PENDING',
+        approved_by INTEGER,
+        approved_at DATETIME,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+TRIGGERS = {
+    "trigger": """
+        CREATE TRIGGER update_reservations_timestamp
+        AFTER UPDATE ON reservations
+        FOR EACH ROW
+        BEGIN
+            UPDATE reservations SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    """,
+    "trigger WHEN": """
+        CREATE TRIGGER update_reservations_timestamp
+        AFTER UPDATE ON reservations
+        FOR EACH ROW
+        WHEN NEW.updated_at IS OLD.updated_at
+        BEGIN
+            UPDATE reservations SET updated_at = CURRENT_TIMESTAMP
+            WHERE id = NEW.id AND updated_at IS NOT CURRENT_TIMESTAMP;
+        END
+    """,
+    "write-once": None,
+}
+
+# UPDATE exécuté à chaque passe : sans updated_at pour les modes à trigger
+# (comportement d'avant la migration 1), avec updated_at pour write-once
+UPDATES = {
+    "trigger": "UPDATE reservations SET status = ?, approved_by = 1, approved_at = CURRENT_TIMESTAMP",
+    "trigger WHEN": "UPDATE reservations SET status = ?, approved_by = 1, approved_at = CURRENT_TIMESTAMP",
+    "write-once": ("UPDATE reservations SET status = ?, approved_by = 1, approved_at = CURRENT_TIMESTAMP, "
+                   "updated_at = CURRENT_TIMESTAMP"),
+}
+
+
+def run(mode, rows, passes, directory):
+    """
+    Exécute les passes d'UPDATE pour un mode.
+
+    Returns:
+        tuple: (écritures de lignes, durée en secondes)
+    """
+    path = os.path.join(directory, f"{mode.replace(' ', '_')}.db")
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    if TRIGGERS[mode]:
+        conn.execute(TRIGGERS[mode])
+    conn.executemany("INSERT INTO reservations (room_id) VALUES (?)",
+                     ((i % 40,) for i in range(rows)))
+    conn.commit()
+
+    writes = 0
+    elapsed = 0.0
+    for i in range(passes):
+        # Lignes modifiées il y a longtemps (hors mesure) : le trigger WHEN ne
+        # peut pas sauter sa réécriture parce que updated_at est déjà à l'heure
+        conn.execute("UPDATE reservations SET updated_at = '2020-01-01 00:00:00'")
+        conn.commit()
+
+        before = conn.total_changes
+        start = time.perf_counter()
+        conn.execute(UPDATES[mode], ("APPROVED" if i % 2 == 0 else "REJECTED",))
+        conn.commit()
+        elapsed += time.perf_counter() - start
+        writes += conn.total_changes - before
+    conn.close()
+    return writes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de la mise à jour de updated_at")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--passes", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{args.passes} passes d'UPDATE sur {args.rows} lignes")
+        for mode in TRIGGERS:
+            writes, elapsed = run(mode, args.rows, args.passes, directory)
+            print(f"  {mode:<13} {writes:>9} écritures  {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
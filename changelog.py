@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture du journal des modifications (change_log).
+
+Les triggers de la migration 7 ajoutent une ligne à change_log pour chaque
+INSERT, UPDATE ou DELETE sur les tables de database.CHANGE_LOG_KEYS
+(emploi du temps, réservations) : opération, table, id de la ligne et
+colonnes clés avant / après. Le journal n'est jamais réécrit ; le numéro de
+séquence (seq) croît strictement.
+
+Un consommateur (cache incrémental, vue en direct, export, synchronisation)
+retient le dernier seq traité et ne relit que les changements suivants :
+
+    feed = ChangeFeed(tables=("timetable",))
+    for change in feed.poll():
+        ...  # change["op"], change["row_id"], change["old"], change["new"]
+
+Si des changements manquent (journal purgé à la main, retard trop grand),
+il doit tout relire : voir ChangeFeed.poll() et GapError.
+"""
+
+import json
+
+import queries
+from database import CHANGE_LOG_KEYS
+
+# Opérations journalisées
+INSERT = "INSERT"
+UPDATE = "UPDATE"
+DELETE = "DELETE"
+
+# Nombre maximal de changements lus par requête
+CHANGES_PAGE_SIZE = 500
+
+
+class GapError(Exception):
+    """Des changements postérieurs au dernier seq lu ne sont plus dans le journal."""
+
+
+def _decode(row):
+    """Ligne de change_log -> dict, colonnes clés décodées (old / new)."""
+    return {
+        'seq': row['seq'],
+        'op': row['op'],
+        'table': row['table_name'],
+        'row_id': row['row_id'],
+        'old': json.loads(row['old_key']) if row['old_key'] else None,
+        'new': json.loads(row['new_key']) if row['new_key'] else None,
+        'changed_at': row['changed_at'],
+    }
+
+
+def bounds():
+    """
+    Premier numéro de séquence présent et dernier numéro écrit.
+
+    Returns:
+        tuple: (premier seq, dernier seq) ; le premier vaut 0 si le journal est vide
+    """
+    row = queries.fetchone("change_log_bounds")
+    return row['first_seq'], row['last_seq']
+
+
+def last_seq():
+    """Dernier numéro de séquence écrit (0 si aucun) : point de départ d'un consommateur."""
+    return bounds()[1]
+
+
+def changes_since(seq, table=None, limit=CHANGES_PAGE_SIZE):
+    """
+    Changements postérieurs à un numéro de séquence, dans l'ordre.
+
+    Args:
+        seq (int): Dernier numéro déjà traité
+        table (str, optional): Ne lire que les changements de cette table
+        limit (int): Nombre maximal de changements retournés
+
+    Returns:
+        list: Un dict par changement (seq, op, table, row_id, old, new, changed_at) ;
+            old / new sont les colonnes clés (id compris) avant / après, ou None
+    """
+    if table is None:
+        rows = queries.fetchall("change_log_since", (seq, limit))
+    else:
+        if table not in CHANGE_LOG_KEYS:
+            raise ValueError(f"Table non journalisée : {table}")
+        rows = queries.fetchall("change_log_since_table", (table, seq, limit))
+    return [_decode(row) for row in rows]
+
+
+def changed_ids(changes):
+    """
+    Ids des lignes touchées par des changements (anciens et nouveaux ids).
+
+    Returns:
+        set: Ids à relire ; ceux qui n'existent plus ont été supprimés
+    """
+    ids = set()
+    for change in changes:
+        ids.add(change['row_id'])
+        if change['old'] is not None:
+            ids.add(change['old']['id'])
+    return ids
+
+
+class ChangeFeed:
+    """
+    Position d'un consommateur dans le journal.
+
+    Attributes:
+        tables (tuple): Tables suivies (None = toutes)
+        seq (int): Dernier numéro de séquence traité
+        caught_up (bool): False si le dernier poll() n'a pas tout lu (limite atteinte)
+    """
+
+    def __init__(self, tables=None, seq=None):
+        """
+        Args:
+            tables (iterable, optional): Tables suivies (toutes par défaut)
+            seq (int, optional): Position de départ (par défaut la fin du journal)
+        """
+        self.tables = tuple(tables) if tables else None
+        self.seq = last_seq() if seq is None else seq
+        self.caught_up = True
+
+    def poll(self, limit=CHANGES_PAGE_SIZE):
+        """
+        Lit les changements suivants et avance la position.
+
+        Args:
+            limit (int): Nombre maximal de changements lus
+
+        Returns:
+            list: Changements des tables suivies (voir changes_since)
+
+        Raises:
+            GapError: Si le journal ne contient plus tous les changements
+                postérieurs à la position (le consommateur doit tout relire,
+                puis repartir de last_seq() lu avant cette relecture)
+        """
+        changes = changes_since(self.seq, limit=limit)
+        if changes and changes[0]['seq'] != self.seq + 1:
+            # Numéros non consécutifs : le début du journal a-t-il été purgé ?
+            first_seq, _ = bounds()
+            if first_seq > self.seq + 1:
+                raise GapError(f"Changements manquants après le seq {self.seq}")
+        if changes:
+            self.seq = changes[-1]['seq']
+        self.caught_up = len(changes) < limit
+        if self.tables is None:
+            return changes
+        return [change for change in changes if change['table'] in self.tables]
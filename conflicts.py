@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Détection des conflits entre plages horaires par intervalles triés.
+
+Pour chaque (dimension, entité, jour) — salle, enseignant ou groupe — on garde
+la liste des plages occupées triée par heure de début. Une plage candidate
+[début, fin[ n'a besoin d'être comparée qu'aux plages qui commencent avant sa
+fin (recherche dichotomique), et chaque chevauchement est rapporté avec son
+origine : on sait quelle salle, quel enseignant ou quel groupe est en conflit,
+et avec quel cours ou quelle réservation.
+
+Utilisé pour la validation groupée des réservations : les demandes sont
+examinées dans l'ordre de soumission, et chaque demande acceptée est ajoutée
+à l'index pour que les suivantes du même lot soient vérifiées contre elle.
+
+Utilisé aussi à la soumission d'une réservation (find_conflicts) : cours,
+réservations approuvées ou en attente et indisponibilités de l'enseignant
+sont lus en une requête indexée sur le seul jour demandé, puis vérifiés avec
+le même index.
+"""
+
+from bisect import bisect_left, insort
+
+from occupancy import (
+    GROUP, INSTRUCTOR, ROOM,
+    SOURCE_RESERVATION, SOURCE_TIMETABLE, SOURCE_UNAVAILABILITY,
+)
+
+# Demande acceptée plus tôt dans le même lot de validation
+SOURCE_BATCH = "batch"
+
+# Demande de réservation encore en attente de validation
+SOURCE_PENDING = "pending"
+
+# Libellés des dimensions et des origines (messages de conflit)
+DIMENSION_LABELS = {
+    ROOM: "Salle",
+    INSTRUCTOR: "Enseignant",
+    GROUP: "Groupe",
+}
+SOURCE_LABELS = {
+    SOURCE_TIMETABLE: "cours",
+    SOURCE_RESERVATION: "réservation approuvée",
+    SOURCE_PENDING: "réservation en attente",
+    SOURCE_UNAVAILABILITY: "indisponibilité",
+    SOURCE_BATCH: "réservation du même lot",
+}
+
+
+def entities_of(row):
+    """
+    Entités occupées par un cours ou une réservation.
+
+    Args:
+        row (dict or sqlite3.Row): Ligne avec instructor_id, group_id, room_id
+
+    Returns:
+        list: Couples (dimension, id) ; les id absents (None) sont ignorés
+    """
+    entities = [(INSTRUCTOR, row['instructor_id']), (GROUP, row['group_id']), (ROOM, row['room_id'])]
+    return [(dimension, entity_id) for dimension, entity_id in entities if entity_id is not None]
+
+
+class IntervalIndex:
+    """
+    Plages occupées triées par (dimension, entité, jour).
+
+    Attributes:
+        _buckets (dict): (dimension, entité, jour) -> [(début, fin, source, id)] trié
+    """
+
+    def __init__(self):
+        """Initialise un index vide."""
+        self._buckets = {}
+
+    def add(self, source, row_id, entities, day, start_hour, duration):
+        """Enregistre une plage pour chaque (dimension, entité) fournie."""
+        interval = (start_hour, start_hour + duration, source, row_id)
+        for dimension, entity_id in entities:
+            insort(self._buckets.setdefault((dimension, entity_id, day), []), interval)
+
+    def overlaps(self, entities, day, start_hour, duration):
+        """
+        Liste toutes les plages qui chevauchent [start_hour, start_hour + duration[.
+
+        Args:
+            entities (list): Couples (dimension, id) à vérifier
+            day (int): Jour (1=Lundi)
+            start_hour (int): Heure de début
+            duration (int): Durée en heures
+
+        Returns:
+            list: Un dict par chevauchement (dimension, entity_id, source, id, start, end)
+        """
+        end_hour = start_hour + duration
+        result = []
+        for dimension, entity_id in entities:
+            bucket = self._buckets.get((dimension, entity_id, day))
+            if not bucket:
+                continue
+            # Seules les plages qui commencent avant la fin peuvent chevaucher
+            for start, end, source, row_id in bucket[:bisect_left(bucket, (end_hour,))]:
+                if end > start_hour:
+                    result.append({
+                        'dimension': dimension,
+                        'entity_id': entity_id,
+                        'source': source,
+                        'id': row_id,
+                        'start': start,
+                        'end': end,
+                    })
+        return result
+
+
+def describe(conflict):
+    """
+    Message lisible pour un chevauchement retourné par IntervalIndex.overlaps.
+
+    Returns:
+        str: Ex. "Salle (ID: 3) : cours #12 (10h-12h)"
+    """
+    return (f"{DIMENSION_LABELS.get(conflict['dimension'], conflict['dimension'])} "
+            f"(ID: {conflict['entity_id']}) : "
+            f"{SOURCE_LABELS.get(conflict['source'], conflict['source'])} #{conflict['id']} "
+            f"({conflict['start']}h-{conflict['end']}h)")
+
+
+def load_index(cursor, days):
+    """
+    Charge en une requête les cours, réservations approuvées et
+    indisponibilités d'enseignants des jours donnés.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur de la transaction en cours
+        days (iterable): Jours concernés
+
+    Returns:
+        IntervalIndex: Index des plages occupées
+    """
+    index = IntervalIndex()
+    days = sorted(set(days))
+    if not days:
+        return index
+    placeholders = ", ".join("?" * len(days))
+    cursor.execute(f"""
+        SELECT '{SOURCE_TIMETABLE}' AS source, id, instructor_id, group_id, room_id,
+               day, start_hour, duration
+        FROM timetable
+        WHERE day IN ({placeholders})
+        UNION ALL
+        SELECT '{SOURCE_RESERVATION}', id, instructor_id, group_id, room_id,
+               day, start_hour, duration
+        FROM reservations
+        WHERE status = 'APPROVED' AND day IN ({placeholders})
+        UNION ALL
+        SELECT '{SOURCE_UNAVAILABILITY}', id, instructor_id, NULL, NULL,
+               day, start_hour, duration
+        FROM teacher_unavailability
+        WHERE day IN ({placeholders})
+    """, days * 3)
+    for row in cursor.fetchall():
+        index.add(row['source'], row['id'], entities_of(row),
+                  row['day'], row['start_hour'], row['duration'])
+    return index
+
+
+def find_conflicts(cursor, day, start_hour, duration, instructor_id=None,
+                   group_id=None, room_id=None, include_pending=True):
+    """
+    Liste tous les conflits d'une plage pour une salle, un groupe et un enseignant.
+
+    Une seule requête lit, pour ce jour et cette plage, les cours, les
+    réservations (approuvées et, si demandé, en attente) et les
+    indisponibilités qui concernent l'une des entités ; chaque branche de la
+    requête utilise l'index (entité, jour, début) de sa table.
+
+    Args:
+        cursor (sqlite3.Cursor): Curseur sur la base
+        day (int): Jour (1=Lundi)
+        start_hour (int): Heure de début
+        duration (int): Durée en heures
+        instructor_id (int, optional): Enseignant concerné
+        group_id (int, optional): Groupe concerné
+        room_id (int, optional): Salle concernée
+        include_pending (bool): Compter aussi les réservations en attente
+
+    Returns:
+        list: Un dict par chevauchement (voir IntervalIndex.overlaps) : enseignant,
+            groupe puis salle, chacun par heure de début
+    """
+    entities = entities_of({'instructor_id': instructor_id, 'group_id': group_id, 'room_id': room_id})
+    if not entities:
+        return []
+
+    end_hour = start_hour + duration
+    overlap = "day = ? AND start_hour < ? AND ? < start_hour + duration"
+    statuses = "('APPROVED', 'PENDING')" if include_pending else "('APPROVED')"
+    branches = []
+    params = []
+    for dimension, entity_id in entities:
+        column = f"{dimension}_id"
+        branches.append(f"""
+            SELECT '{SOURCE_TIMETABLE}' AS source, id, instructor_id, group_id, room_id,
+                   day, start_hour, duration
+            FROM timetable
+            WHERE {column} = ? AND {overlap}
+        """)
+        branches.append(f"""
+            SELECT CASE status WHEN 'APPROVED' THEN '{SOURCE_RESERVATION}' ELSE '{SOURCE_PENDING}' END,
+                   id, instructor_id, group_id, room_id, day, start_hour, duration
+            FROM reservations
+            WHERE {column} = ? AND {overlap} AND status IN {statuses}
+        """)
+        params += [entity_id, day, end_hour, start_hour] * 2
+    if instructor_id is not None:
+        branches.append(f"""
+            SELECT '{SOURCE_UNAVAILABILITY}', id, instructor_id, NULL, NULL,
+                   day, start_hour, duration
+            FROM teacher_unavailability
+            WHERE instructor_id = ? AND {overlap}
+        """)
+        params += [instructor_id, day, end_hour, start_hour]
+
+    # UNION (et non UNION ALL) : une ligne trouvée par deux entités n'est lue qu'une fois
+    cursor.execute(" UNION ".join(branches), params)
+    index = IntervalIndex()
+    for row in cursor.fetchall():
+        index.add(row['source'], row['id'], entities_of(row),
+                  row['day'], row['start_hour'], row['duration'])
+    return index.overlaps(entities, day, start_hour, duration)
+
+
+def select_compatible(index, candidates):
+    """
+    Sépare des demandes de réservation en acceptées et refusées.
+
+    Les demandes sont examinées dans l'ordre fourni (ordre de soumission) :
+    une demande est acceptée si elle ne chevauche rien dans l'index, puis
+    ajoutée à l'index (source SOURCE_BATCH) pour les demandes suivantes.
+
+    Args:
+        index (IntervalIndex): Occupations existantes (modifié en place)
+        candidates (list): Réservations (dict ou sqlite3.Row) id, instructor_id,
+            group_id, room_id, day, start_hour, duration
+
+    Returns:
+        tuple: (acceptées, refusées) ; acceptées est la liste des demandes,
+            refusées un dict {id: [messages de conflit]}
+    """
+    accepted = []
+    rejected = {}
+    for row in candidates:
+        entities = entities_of(row)
+        overlaps = index.overlaps(entities, row['day'], row['start_hour'], row['duration'])
+        if overlaps:
+            rejected[row['id']] = [describe(conflict) for conflict in overlaps]
+            continue
+        index.add(SOURCE_BATCH, row['id'], entities, row['day'], row['start_hour'], row['duration'])
+        accepted.append(row)
+    return accepted, rejected
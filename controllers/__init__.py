@@ -13,21 +13,35 @@ Contrôleurs principaux:
 Modules utilitaires:
 - auth_controller: Authentification des utilisateurs
 - session: Gestion de la session utilisateur
+- planning_export: Rendu des plannings par filière et export groupé
+- export_cache: Cache disque (LRU) des exports déjà rendus
 """
 
-from .admin_controller import AdminController
-from .teacher_controller import TeacherController
-from .student_controller import StudentController
-from .auth_controller import login
-from .session import login_user, logout_user, get_current_user, is_logged_in
-
-__all__ = [
-    'AdminController',
-    'TeacherController', 
-    'StudentController',
-    'login',
-    'login_user',
-    'logout_user',
-    'get_current_user',
-    'is_logged_in'
-]
+# Imports différés (PEP 562) : un contrôleur n'est chargé qu'au premier accès,
+# pour qu'un étudiant ne paie pas le chargement des modules d'administration
+_EXPORTS = {
+    'AdminController': 'admin_controller',
+    'TeacherController': 'teacher_controller',
+    'StudentController': 'student_controller',
+    'login': 'auth_controller',
+    'login_user': 'session',
+    'logout_user': 'session',
+    'get_current_user': 'session',
+    'is_logged_in': 'session',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,14 +1,56 @@
 # --- Importations nécessaires ---
-import openpyxl
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-
+import os
+import sqlite3
+from datetime import datetime
+
+import analytics
+import conflicts
+import occupancy
+import queries
+import recommender
+import refdata
+import snapshot
+import versioning
 from database import (
     insert_schedule_slot,
     check_conflict,
     getConnection,
     DAYS
 )
+from .planning_export import (
+    build_filiere_grid,
+    export_all_filieres,
+    render_pdf,
+    render_to_stream,
+    EXPORT_FORMATS,
+    FILIERE_TABLES,
+)
+from .export_cache import get_cache, rows_digest
+
+
+def documents_path(filename):
+    """
+    Construit un nom de fichier unique (horodaté), dans ~/Documents si ce dossier existe.
+
+    Args:
+        filename (str): Nom de base, extension comprise (ex: Planning_FST.pdf)
+
+    Returns:
+        str: Chemin du fichier à écrire
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_name, ext = os.path.splitext(filename)
+    unique_filename = f"{base_name}_{timestamp}{ext}"
+
+    # Utiliser le dossier Documents si disponible
+    try:
+        documents_dir = os.path.join(os.path.expanduser("~"), "Documents")
+        if os.path.exists(documents_dir):
+            unique_filename = os.path.join(documents_dir, unique_filename)
+    except:
+        pass  # Garder le nom local si erreur
+    return unique_filename
+
 
 
 # Contrôleur pour l'administrateur
@@ -17,6 +59,10 @@ class AdminController:
 
     def __init__(self, admin_id):
         self.admin_id = admin_id
+        # Lignes par filière, valables tant que FILIERE_TABLES n'ont pas changé
+        self._filiere_rows = {}
+        # (filière, format, nom demandé, empreinte) -> dernier fichier remis dans ~/Documents
+        self._exports = {}
 
     def creer_creneau(self, course_id, instructor_id, group_id, room_id, day, start_hour, duration):
         conflit = check_conflict(instructor_id, group_id, room_id, day, start_hour, duration)
@@ -26,29 +72,106 @@ class AdminController:
         success = insert_schedule_slot(course_id, instructor_id, group_id, room_id, day, start_hour, duration, self.admin_id)
         if success:
             print(" Créneau ajouté avec succès.")
+            self._republier_instantane()
         return success
 
+    def _republier_instantane(self):
+        """
+        Republie l'instantané des clients après une modification de l'emploi
+        du temps (s'il a déjà été publié et que son contenu a changé).
+        """
+        try:
+            snapshot.refresh()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f" Instantané non republié : {e}")
+
     def valider_reservation(self, reservation_id):
+        # Même vérification des conflits que la validation groupée
+        result = self.valider_reservations([reservation_id])
+        if result["approved"]:
+            print(f" Réservation {reservation_id} validée.")
+        elif reservation_id in result["rejected"]:
+            print(f" Réservation {reservation_id} non validée :")
+            for reason in result["rejected"][reservation_id]:
+                print(f"   - {reason}")
+
+    def valider_reservations(self, reservation_ids):
+        """
+        Valide un lot de réservations en attente, en une seule transaction.
+
+        Chaque demande est re-vérifiée contre l'emploi du temps, les réservations
+        déjà approuvées, les indisponibilités de l'enseignant et les autres
+        demandes du lot (par ordre de soumission) :
+        seules les demandes sans conflit passent à APPROVED. Les autres restent
+        en attente et sont retournées avec leurs conflits.
+
+        Args:
+            reservation_ids (iterable): IDs des réservations à valider
+
+        Returns:
+            dict: success, message, approved (liste d'IDs) et rejected
+                ({id: [raisons]})
+        """
+        ids = sorted({int(rid) for rid in reservation_ids})
+        if not ids:
+            return {"success": False, "message": "Aucune réservation sélectionnée.",
+                    "approved": [], "rejected": {}}
+
         conn = getConnection()
         cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE reservations
-            SET status = 'APPROVED', approved_by = ?, approved_at = CURRENT_TIMESTAMP
-            WHERE id = ? AND status = 'PENDING'
-        """, (self.admin_id, reservation_id))
-        conn.commit()
-        if cursor.rowcount > 0:
-            print(f" Réservation {reservation_id} validée.")
-        else:
-            print(f" Aucune réservation en attente avec l’ID {reservation_id}.")
-        conn.close()
+        try:
+            # Verrou d'écriture dès la lecture : personne ne peut approuver entre-temps
+            cursor.execute("BEGIN IMMEDIATE")
+            placeholders = ", ".join("?" * len(ids))
+            cursor.execute(f"""
+                SELECT id, instructor_id, group_id, room_id, day, start_hour, duration
+                FROM reservations
+                WHERE id IN ({placeholders}) AND status = 'PENDING'
+                ORDER BY created_at, id
+            """, ids)
+            candidates = cursor.fetchall()
+
+            index = conflicts.load_index(cursor, (row['day'] for row in candidates))
+            accepted, rejected = conflicts.select_compatible(index, candidates)
+
+            found = {row['id'] for row in candidates}
+            for rid in ids:
+                if rid not in found:
+                    rejected[rid] = ["Réservation introuvable ou déjà traitée"]
+
+            cursor.executemany("""
+                UPDATE reservations
+                SET status = 'APPROVED', approved_by = ?, approved_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'PENDING'
+            """, [(self.admin_id, row['id']) for row in accepted])
+            conn.commit()
+            if accepted:
+                occupancy.add_reservations(conn, accepted)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        if accepted:
+            self._republier_instantane()
+
+        approved = [row['id'] for row in accepted]
+        return {
+            "success": bool(approved),
+            "message": f"{len(approved)} réservation(s) validée(s), {len(rejected)} non validée(s).",
+            "approved": approved,
+            "rejected": rejected,
+        }
 
     def rejeter_reservation(self, reservation_id):
         conn = getConnection()
         cursor = conn.cursor()
         cursor.execute("""
             UPDATE reservations
-            SET status = 'REJECTED', approved_by = ?, approved_at = CURRENT_TIMESTAMP
+            SET status = 'REJECTED', approved_by = ?, approved_at = CURRENT_TIMESTAMP,
+                updated_at = CURRENT_TIMESTAMP
             WHERE id = ? AND status = 'PENDING'
         """, (self.admin_id, reservation_id))
         conn.commit()
@@ -89,18 +212,7 @@ class AdminController:
             print(" Réservation introuvable.")
 
     def afficher_reservations_en_attente(self):
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT r.id, u.full_name AS enseignant, r.day, r.start_hour, r.duration, r.reason
-            FROM reservations r
-            JOIN instructors i ON r.instructor_id = i.id
-            JOIN users u ON i.user_id = u.id
-            WHERE r.status = 'PENDING'
-            ORDER BY r.day, r.start_hour
-        """)
-        results = cursor.fetchall()
-        conn.close()
+        results = queries.fetchall("pending_reservations")
 
         if results:
             print("\n Réservations en attente :")
@@ -109,83 +221,128 @@ class AdminController:
         else:
             print("Aucune réservation en attente.")
 
-    def afficher_statistiques(self):
-        conn = getConnection()
-        cursor = conn.cursor()
+    def get_statistiques_salles(self):
+        """
+        Statistiques par salle : créneaux (table room_stats) et taux
+        d'occupation / de remplissage (voir analytics).
 
-        nb_creneaux = cursor.execute("SELECT COUNT(*) FROM timetable").fetchone()[0]
-        nb_reservations = cursor.execute("SELECT COUNT(*) FROM reservations WHERE status = 'APPROVED'").fetchone()[0]
-        nb_salles = cursor.execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
+        Returns:
+            list: Un dict par salle (name, nb_creneaux, nb_heures, utilisation, seat_fill)
+        """
+        usage = {room['name']: room for room in analytics.get_cube().room_utilisation()}
+        stats = []
+        for row in queries.fetchall("room_slot_counts"):
+            room = usage.get(row['name'], {})
+            stats.append({
+                'name': row['name'],
+                'nb_creneaux': row['nb_creneaux'],
+                'nb_heures': row['nb_heures'],
+                'utilisation': room.get('utilisation', 0.0),
+                'seat_fill': room.get('seat_fill', 0.0),
+            })
+        return stats
+
+    def afficher_statistiques(self):
+        nb_creneaux = queries.scalar("count_timetable")
+        nb_reservations = queries.scalar("count_reservations_by_status", ("APPROVED",))
+        nb_salles = queries.scalar("count_rooms")
+        cube = analytics.get_cube()
+        summary = cube.summary()
 
         print("\n Statistiques générales :")
         print(f"- Nombre total de créneaux planifiés : {nb_creneaux}")
         print(f"- Réservations approuvées : {nb_reservations}")
         print(f"- Nombre de salles disponibles : {nb_salles}")
+        print(f"- Taux d’occupation moyen (heures) : {summary['utilisation']:.0%}")
+        print(f"- Remplissage moyen des places : {summary['seat_fill']:.0%}")
 
         print("\n Taux d’occupation des salles :")
-        cursor.execute("""
-            SELECT r.name, COUNT(t.id) AS nb_creneaux
-            FROM rooms r
-            LEFT JOIN timetable t ON r.id = t.room_id
-            GROUP BY r.id
-            ORDER BY nb_creneaux DESC
-        """)
-        for row in cursor.fetchall():
-            print(f"- {row['name']} : {row['nb_creneaux']} créneaux")
+        for row in self.get_statistiques_salles():
+            print(f"- {row['name']} : {row['nb_creneaux']} créneaux ({row['nb_heures']} h) | "
+                  f"occupation {row['utilisation']:.0%} | remplissage {row['seat_fill']:.0%}")
 
-        conn.close()
+        print("\n Heures les plus chargées :")
+        for (day, hour), rate in cube.hotspots(3):
+            print(f"- {DAYS.get(day, day)} {hour}h : {rate:.0%} des salles occupées")
+
+        overloaded = cube.overloaded_slots()
+        if overloaded:
+            print("\n Créneaux surchargés :")
+            for slot in overloaded:
+                print(f"- {DAYS.get(slot['day'], slot['day'])} {slot['hour']}h, {slot['room']} : {slot['reason']} "
+                      f"({slot['students']} étudiants / {slot['capacity']} places)")
 
     def exporter_statistiques_excel(self, filename="statistiques.xlsx"):
-        conn = getConnection()
-        cursor = conn.cursor()
+        # Import à la première utilisation : openpyxl est lourd à charger
+        import openpyxl
 
-        stats = cursor.execute("""
-            SELECT r.name, COUNT(t.id) AS nb_creneaux
-            FROM rooms r
-            LEFT JOIN timetable t ON r.id = t.room_id
-            GROUP BY r.id
-        """).fetchall()
+        stats = self.get_statistiques_salles()
+        overloaded = analytics.get_cube().overloaded_slots()
 
         wb = openpyxl.Workbook()
         ws = wb.active
         ws.title = "Statistiques"
 
-        ws.append(["Salle", "Nombre de créneaux"])
+        ws.append(["Salle", "Nombre de créneaux", "Heures de cours",
+                   "Taux d'occupation (%)", "Remplissage des places (%)"])
         for row in stats:
-            ws.append([row["name"], row["nb_creneaux"]])
+            ws.append([row["name"], row["nb_creneaux"], row["nb_heures"],
+                       round(row["utilisation"] * 100, 1), round(row["seat_fill"] * 100, 1)])
+
+        ws_over = wb.create_sheet("Surcharges")
+        ws_over.append(["Jour", "Heure", "Salle", "Cours", "Étudiants", "Capacité", "Motif"])
+        for slot in overloaded:
+            ws_over.append([DAYS.get(slot["day"], slot["day"]), slot["hour"], slot["room"],
+                            slot["courses"], slot["students"], slot["capacity"], slot["reason"]])
 
         wb.save(filename)
-        conn.close()
         print(f" Statistiques exportées vers {filename}")
 
     def exporter_statistiques_pdf(self, filename="statistiques.pdf"):
-        conn = getConnection()
-        cursor = conn.cursor()
+        from reportlab.lib.pagesizes import letter
+        from reportlab.pdfgen import canvas
 
-        stats = cursor.execute("""
-            SELECT r.name, COUNT(t.id) AS nb_creneaux
-            FROM rooms r
-            LEFT JOIN timetable t ON r.id = t.room_id
-            GROUP BY r.id
-        """).fetchall()
+        stats = self.get_statistiques_salles()
+        overloaded = analytics.get_cube().overloaded_slots()
 
         c = canvas.Canvas(filename, pagesize=letter)
         c.drawString(100, 750, "Statistiques d'occupation des salles")
 
         y = 700
         for row in stats:
-            c.drawString(100, y, f"{row['name']} : {row['nb_creneaux']} créneaux")
+            c.drawString(100, y, f"{row['name']} : {row['nb_creneaux']} créneaux ({row['nb_heures']} h), "
+                                 f"occupation {row['utilisation']:.0%}, remplissage {row['seat_fill']:.0%}")
+            y -= 20
+            if y < 60:
+                c.showPage()
+                y = 750
+
+        if overloaded:
+            y -= 20
+            c.drawString(100, y, "Créneaux surchargés")
             y -= 20
+            for slot in overloaded:
+                if y < 60:
+                    c.showPage()
+                    y = 750
+                c.drawString(100, y, f"{DAYS.get(slot['day'], slot['day'])} {slot['hour']}h, {slot['room']} : "
+                                     f"{slot['reason']} ({slot['students']}/{slot['capacity']})")
+                y -= 20
 
         c.save()
-        conn.close()
         print(f" Statistiques exportées vers {filename}")
 
     #Method inside the class (4 spaces indentation) ---
-    def generer_planning_complet(self):
+    def generer_planning_complet(self, progress=None, should_stop=None):
         """
         Génère l'emploi du temps complet en utilisant l'algorithme génétique.
         Cette action efface le planning existant pour une régénération propre.
+
+        Args:
+            progress (callable, optional): Appelé à chaque génération avec
+                (génération, nb_générations, meilleur score)
+            should_stop (callable, optional): Retourne True pour annuler ;
+                rien n'est alors enregistré
         """
         print("Démarrage de la génération automatique...")
         
@@ -209,7 +366,10 @@ class AdminController:
             
         ga = GeneticAlgorithm(population_size=12, mutation_size=2)
         # On lance sur 50 générations (peut être ajusté)
-        best_schedule = ga.evolve(max_generations=50, target_fitness=0.95)
+        best_schedule = ga.evolve(max_generations=50, target_fitness=0.95,
+                                  progress=progress, should_stop=should_stop)
+        if should_stop is not None and should_stop():
+            return "Génération annulée : l'emploi du temps n'a pas été modifié."
         
         # 3. Sauvegarder le meilleur résultat
         conn = getConnection()
@@ -255,6 +415,9 @@ class AdminController:
                 
         conn.commit()
         conn.close()
+        # Écriture massive : l'index d'occupation sera rechargé au prochain accès
+        occupancy.invalidate()
+        self._republier_instantane()
         
         return f"Génération terminée ! {count} cours planifiés avec un score de {best_schedule.fitness:.2%}."
 
@@ -263,39 +426,32 @@ class AdminController:
         cursor = conn.cursor()
 
         # 1. Get Group info (student count)
-        cursor.execute("SELECT student_count FROM groups WHERE id = ?", (group_id,))
-        group = cursor.fetchone()
+        group = refdata.get_cache().get("groups", group_id)
         if not group:
             conn.close()
             return "Group not found."
 
         # 2. Get Subject info (required equipment)
-        cursor.execute("SELECT required_equipment FROM subjects WHERE id = ?", (subject_id,))
-        subject = cursor.fetchone()
+        subject = refdata.get_cache().get("subjects", subject_id)
         
-        # 3. Get all active rooms
-        cursor.execute("SELECT * FROM rooms WHERE active = 1 ORDER BY capacity ASC")
-        all_rooms = cursor.fetchall()
+        # 3. Rank the free rooms in memory (capacity fit, equipment, building proximity, load)
+        recommendations = recommender.recommend_rooms(
+            day, start_hour, duration,
+            student_count=group['student_count'],
+            equipment=subject['required_equipment'] if subject else None,
+            group_id=group_id,
+            top_k=None
+        )
 
-        # 4. Search for an available room
+        # 4. Take the best ranked room that also passes the conflict check (group availability)
         assigned_room_id = None
         room_name = None
-        for room in all_rooms:
-            # Check capacity constraint
-            if room['capacity'] < group['student_count']:
-                continue
-                
-            # Check equipment constraint
-            if subject['required_equipment']:
-                if not room['equipments'] or subject['required_equipment'] not in room['equipments']:
-                    continue
-
-            # Check for schedule conflicts (Room availability)
-            conflict = check_conflict(0, group_id, room['id'], day, start_hour, duration)
+        for rec in recommendations:
+            conflict = check_conflict(0, group_id, rec['room']['id'], day, start_hour, duration)
             
             if not conflict:
-                assigned_room_id = room['id']
-                room_name = room['name']
+                assigned_room_id = rec['room']['id']
+                room_name = rec['room']['name']
                 break
 
         if assigned_room_id:
@@ -316,150 +472,108 @@ class AdminController:
         conn.close()
         return "Error: No suitable room found for this slot."
 
+    def get_filiere_rows(self, filiere_name):
+        """
+        Récupère les cours d'une filière (une seule requête).
+
+        La requête n'est relancée que si l'une des tables FILIERE_TABLES a
+        changé depuis le dernier appel (voir versioning).
+        """
+        versions = versioning.get_versions()
+        stamp = tuple(versions.get(table, 0) for table in FILIERE_TABLES)
+        cached = self._filiere_rows.get(filiere_name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        rows = queries.fetchall("filiere_timetable", (filiere_name,))
+        self._filiere_rows[filiere_name] = (stamp, rows)
+        return rows
+
+    def get_planning_filiere(self, filiere_name):
+        """
+        Récupère l'emploi du temps d'une filière,
+        organisé en grille jours × créneaux (voir build_filiere_grid).
+        """
+        return build_filiere_grid(self.get_filiere_rows(filiere_name))
+
+    def exporter_planning_filiere_bytes(self, filiere_name, fmt):
+        """
+        Rend l'emploi du temps d'une filière en mémoire, sans fichier dans ~/Documents.
+
+        Le rendu passe par le cache d'exports : tant que les cours de la
+        filière n'ont pas changé, le contenu déjà rendu est réutilisé.
+
+        Args:
+            filiere_name (str): Nom de la filière
+            fmt (str): "pdf", "xlsx" ou "png"
+
+        Returns:
+            bytes: Contenu du fichier exporté
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Format d'export inconnu : {fmt}")
+        rows = self.get_filiere_rows(filiere_name)
+        return get_cache().get_or_render_bytes(
+            filiere_name, fmt, rows,
+            lambda stream: render_to_stream(filiere_name, build_filiere_grid(rows), fmt, stream)
+        )
+
+    def exporter_planning_filiere_stream(self, filiere_name, fmt, stream):
+        """
+        Écrit l'emploi du temps d'une filière dans un flux binaire (ex: réponse HTTP).
+
+        Args:
+            filiere_name (str): Nom de la filière
+            fmt (str): "pdf", "xlsx" ou "png"
+            stream (file): Flux binaire inscriptible
+
+        Returns:
+            int: Nombre d'octets écrits
+        """
+        data = self.exporter_planning_filiere_bytes(filiere_name, fmt)
+        stream.write(data)
+        return len(data)
+
+    def _exporter_filiere(self, filiere_name, fmt, filename):
+        """
+        Écrit l'export d'une filière dans ~/Documents (enveloppe du rendu en mémoire).
+
+        Si les cours de la filière n'ont pas changé et que le même export a
+        déjà été remis sous ce nom, ce fichier est retourné sans rien écrire.
+
+        Returns:
+            str: Chemin du fichier exporté
+        """
+        export_key = (filiere_name, fmt, filename, rows_digest(self.get_filiere_rows(filiere_name)))
+        previous = self._exports.get(export_key)
+        if previous and os.path.exists(previous):
+            return previous
+
+        data = self.exporter_planning_filiere_bytes(filiere_name, fmt)
+        unique_filename = documents_path(filename)
+        with open(unique_filename, "wb") as f:
+            f.write(data)
+        self._exports[export_key] = unique_filename
+        return unique_filename
+
     def exporter_planning_filiere_pdf(self, filiere_name, filename="Planning_FST.pdf"):
         """
         Génère un export PDF structuré selon le format officiel de l'Université Abdelmalek Essaâdi.
         """
         try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from datetime import datetime
-            import os
+            import reportlab
         except ImportError:
             print("ReportLab n'est pas installé. Veuillez installer 'reportlab' via pip.")
             return "Erreur: ReportLab non installé"
 
-        # Générer un nom de fichier unique avec horodatage
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = filename.replace('.pdf', '')
-        unique_filename = f"{base_name}_{timestamp}.pdf"
-        
-        # Utiliser le dossier Documents si disponible
+        # Récupération des cours, salles et groupes (une seule requête, rendu mis en cache)
         try:
-            documents_path = os.path.join(os.path.expanduser("~"), "Documents")
-            if os.path.exists(documents_path):
-                unique_filename = os.path.join(documents_path, unique_filename)
-        except:
-            pass  # Garder le nom local si erreur
-
-        # Configuration du document en mode paysage
-        doc = SimpleDocTemplate(unique_filename, pagesize=landscape(A4))
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Styles pour l'en-tête institutionnel
-        style_header = ParagraphStyle('Header', fontSize=12, leading=14, alignment=1)
-        style_title = ParagraphStyle('Title', fontSize=13, leading=16, alignment=1, 
-                                     spaceAfter=10, fontName='Helvetica-Bold')
-        style_nb = ParagraphStyle('NB', fontSize=9, italic=True)
-
-        # En-tête de l'université et de la faculté 
-        elements.append(Paragraph(
-            "Université Abdelmalek Essaâdi<br/>Faculté des Sciences et Techniques - Tanger", 
-            style_header
-        ))
-        elements.append(Paragraph(f"Emploi du Temps du Semestre 6 (2025/2026)", style_title))
-        elements.append(Paragraph(f"Filière : {filiere_name}", style_title))
-        elements.append(Spacer(1, 15))
-
-        # Créneaux horaires officiels de la FST Tanger
-        time_slots = ["09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        data = [["JOURS"] + time_slots]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-
-        # Mapping des jours pour la base de données
-        DAYS_MAPPING = {
-            "LUNDI": 1, "MARDI": 2, "MERCREDI": 3, 
-            "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6
-        }
-        
-        # Mapping des créneaux horaires vers les heures de la base
-        SLOT_TO_HOUR = {
-            "09h00-10h30": 9,
-            "10h45-12h15": 10,
-            "12h30-14h00": 12,
-            "14h15-15h45": 14,
-            "16h00-17h30": 16
-        }
-
-        conn = None
-        try:
-            conn = getConnection()
-            cursor = conn.cursor()
-
-            for day_name in days_list:
-                row = [day_name]
-                day_idx = DAYS_MAPPING.get(day_name, 0)
-                
-                for slot in time_slots:
-                    # Gestion de l'exception du Vendredi après-midi (15h00)
-                    if day_name == "VENDREDI" and slot == "14h15-15h45":
-                        start_h = 15
-                    else:
-                        start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-                    
-                    # Récupération des cours, salles et groupes
-                    cursor.execute("""
-                        SELECT s.name as subject, r.name as room, g.name as group_name
-                        FROM timetable t
-                        JOIN subjects s ON t.course_id = s.id
-                        JOIN rooms r ON t.room_id = r.id
-                        JOIN groups g ON t.group_id = g.id
-                        WHERE t.day = ? AND t.start_hour = ? AND g.filiere = ?
-                        ORDER BY g.name
-                    """, (day_idx, start_h, filiere_name))
-                    
-                    results = cursor.fetchall()
-                    
-                    if results:
-                        cell_items = []
-                        for res in results:
-                            cell_items.append(f"{res['subject']} ({res['group_name']})\n{res['room']}")
-                        row.append("\n\n".join(cell_items))
-                    else:
-                        row.append("")
-                
-                data.append(row)
-            
+            self.get_filiere_rows(filiere_name)
         except Exception as e:
-            error_style = ParagraphStyle('Error', textColor=colors.red, fontSize=10)
-            elements.append(Paragraph(f"Erreur technique : {str(e)}", error_style))
-        finally:
-            if conn:
-                conn.close()
-
-        # Application du style au tableau
-        if len(data) > 1:
-            table = Table(data, colWidths=[80] + [135] * len(time_slots))
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, 1), (0, -1), colors.whitesmoke),
-            ]))
-            elements.append(table)
-
-        # Mentions obligatoires (N.B.)
-        elements.append(Spacer(1, 15))
-        nb_text = (
-            "<b>N.B:</b> Les plannings de Travaux Pratiques seront affichés dans les départements concernés.<br/>"
-            "Le Vendredi après-midi, les cours commencent à 15h00."
-        )
-        elements.append(Paragraph(nb_text, style_nb))
-
-        # Pied de page avec horodatage
-        gen_date = datetime.now().strftime("%d/%m/%Y %H:%M")
-        elements.append(Spacer(1, 10))
-        elements.append(Paragraph(f"Document généré le {gen_date}", 
-                                ParagraphStyle('Footer', fontSize=7, alignment=2)))
+            unique_filename = documents_path(filename)
+            render_pdf(filiere_name, None, unique_filename, error=str(e))
+            return f"PDF généré avec succès : {unique_filename}"
 
-        # Construction finale du PDF
-        doc.build(elements)
+        unique_filename = self._exporter_filiere(filiere_name, "pdf", filename)
         return f"PDF généré avec succès : {unique_filename}"
 
     def exporter_planning_filiere_excel(self, filiere_name, filename="Planning_FST.xlsx"):
@@ -468,128 +582,11 @@ class AdminController:
         """
         try:
             import openpyxl
-            from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-            from datetime import datetime
-            import os
         except ImportError:
             return "Erreur: openpyxl non installé"
 
-        # Générer un nom de fichier unique avec horodatage
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = filename.replace('.xlsx', '')
-        unique_filename = f"{base_name}_{timestamp}.xlsx"
-        
-        # Utiliser le dossier Documents si disponible
-        try:
-            documents_path = os.path.join(os.path.expanduser("~"), "Documents")
-            if os.path.exists(documents_path):
-                unique_filename = os.path.join(documents_path, unique_filename)
-        except:
-            pass
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = f"EDT {filiere_name}"[:31]  # Excel limite à 31 caractères
-
-        # Styles
-        header_font = Font(bold=True, size=14)
-        title_font = Font(bold=True, size=11)
-        center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        day_fill = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
-        # En-tête
-        ws.merge_cells('A1:F1')
-        ws['A1'] = "Université Abdelmalek Essaâdi - FST Tanger"
-        ws['A1'].font = header_font
-        ws['A1'].alignment = center_align
-
-        ws.merge_cells('A2:F2')
-        ws['A2'] = f"Emploi du Temps - Filière: {filiere_name}"
-        ws['A2'].font = title_font
-        ws['A2'].alignment = center_align
-
-        # Créneaux horaires
-        time_slots = ["09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-
-        # En-tête du tableau (ligne 4)
-        ws.cell(row=4, column=1, value="JOURS").font = title_font
-        ws.cell(row=4, column=1).fill = header_fill
-        ws.cell(row=4, column=1).alignment = center_align
-        ws.cell(row=4, column=1).border = thin_border
-
-        for col, slot in enumerate(time_slots, start=2):
-            cell = ws.cell(row=4, column=col, value=slot)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = header_fill
-            cell.alignment = center_align
-            cell.border = thin_border
-
-        # Données
-        conn = getConnection()
-        cursor = conn.cursor()
-
-        for row_idx, day_name in enumerate(days_list, start=5):
-            day_cell = ws.cell(row=row_idx, column=1, value=day_name)
-            day_cell.font = title_font
-            day_cell.fill = day_fill
-            day_cell.alignment = center_align
-            day_cell.border = thin_border
-
-            day_idx = DAYS_MAPPING.get(day_name, 0)
-
-            for col_idx, slot in enumerate(time_slots, start=2):
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
-
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, g.name as group_name
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN groups g ON t.group_id = g.id
-                    WHERE t.day = ? AND t.start_hour = ? AND g.filiere = ?
-                    ORDER BY g.name
-                """, (day_idx, start_h, filiere_name))
-
-                results = cursor.fetchall()
-                cell = ws.cell(row=row_idx, column=col_idx)
-                cell.border = thin_border
-                cell.alignment = center_align
-
-                if results:
-                    cell_text = "\n".join([f"{r['subject']} ({r['group_name']})\n{r['room']}" for r in results])
-                    cell.value = cell_text
-                else:
-                    cell.value = ""
-
-        conn.close()
-
-        # Ajuster les largeurs de colonnes
-        ws.column_dimensions['A'].width = 12
-        for col in range(2, len(time_slots) + 2):
-            ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 22
-
-        # Ajuster les hauteurs de lignes
-        for row in range(5, 5 + len(days_list)):
-            ws.row_dimensions[row].height = 60
-
-        # Pied de page
-        footer_row = 5 + len(days_list) + 1
-        ws.cell(row=footer_row, column=1, value=f"Généré le {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-
-        wb.save(unique_filename)
+        # Données (une seule requête pour toute la filière, rendu mis en cache)
+        unique_filename = self._exporter_filiere(filiere_name, "xlsx", filename)
         return f"Excel généré avec succès : {unique_filename}"
 
     def exporter_planning_filiere_image(self, filiere_name, filename="Planning_FST.png"):
@@ -597,126 +594,71 @@ class AdminController:
         Génère un export Image (PNG) de l'emploi du temps par filière.
         """
         try:
-            from PIL import Image, ImageDraw, ImageFont
-            from datetime import datetime
-            import os
+            import PIL
         except ImportError:
             return "Erreur: Pillow non installé. Installez-le avec: pip install Pillow"
 
-        # Générer un nom de fichier unique avec horodatage
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = filename.replace('.png', '')
-        unique_filename = f"{base_name}_{timestamp}.png"
-        
-        # Utiliser le dossier Documents si disponible
-        try:
-            documents_path = os.path.join(os.path.expanduser("~"), "Documents")
-            if os.path.exists(documents_path):
-                unique_filename = os.path.join(documents_path, unique_filename)
-        except:
-            pass
-
-        # Configuration
-        time_slots = ["09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
-        days_list = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
-        DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
-        SLOT_TO_HOUR = {"09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
-
-        # Dimensions
-        cell_width = 150
-        cell_height = 80
-        header_height = 100
-        day_col_width = 100
-        
-        img_width = day_col_width + (cell_width * len(time_slots)) + 20
-        img_height = header_height + (cell_height * len(days_list)) + 60
-
-        # Créer l'image
-        img = Image.new('RGB', (img_width, img_height), color='white')
-        draw = ImageDraw.Draw(img)
-
-        # Polices (utiliser les polices par défaut)
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 16)
-            font_header = ImageFont.truetype("arial.ttf", 12)
-            font_cell = ImageFont.truetype("arial.ttf", 9)
-        except:
-            font_title = ImageFont.load_default()
-            font_header = ImageFont.load_default()
-            font_cell = ImageFont.load_default()
-
-        # Couleurs
-        header_color = (68, 114, 196)
-        day_color = (217, 226, 243)
-        grid_color = (0, 0, 0)
-        text_color = (0, 0, 0)
-
-        # Titre
-        draw.text((10, 10), "Université Abdelmalek Essaâdi - FST Tanger", fill=text_color, font=font_title)
-        draw.text((10, 35), f"Emploi du Temps - Filière: {filiere_name}", fill=text_color, font=font_header)
-
-        # Position de départ du tableau
-        start_x = 10
-        start_y = header_height - 20
-
-        # En-tête des créneaux
-        draw.rectangle([start_x, start_y, start_x + day_col_width, start_y + 30], fill=header_color)
-        draw.text((start_x + 10, start_y + 8), "JOURS", fill='white', font=font_header)
-
-        for i, slot in enumerate(time_slots):
-            x = start_x + day_col_width + (i * cell_width)
-            draw.rectangle([x, start_y, x + cell_width, start_y + 30], fill=header_color)
-            draw.text((x + 10, start_y + 8), slot, fill='white', font=font_cell)
-
-        # Données
-        conn = getConnection()
-        cursor = conn.cursor()
-
-        for row_idx, day_name in enumerate(days_list):
-            y = start_y + 30 + (row_idx * cell_height)
-            
-            # Colonne jour
-            draw.rectangle([start_x, y, start_x + day_col_width, y + cell_height], fill=day_color, outline=grid_color)
-            draw.text((start_x + 10, y + 30), day_name, fill=text_color, font=font_header)
-
-            day_idx = DAYS_MAPPING.get(day_name, 0)
+        # Données (une seule requête pour toute la filière, rendu mis en cache)
+        unique_filename = self._exporter_filiere(filiere_name, "png", filename)
+        return f"Image générée avec succès : {unique_filename}"
 
-            for col_idx, slot in enumerate(time_slots):
-                x = start_x + day_col_width + (col_idx * cell_width)
-                
-                if day_name == "VENDREDI" and slot == "14h15-15h45":
-                    start_h = 15
-                else:
-                    start_h = SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
+    def exporter_toutes_filieres(self, output_dir=None, formats=EXPORT_FORMATS, max_workers=None,
+                                 progress=None, should_stop=None):
+        """
+        Exporte toutes les filières (PDF, Excel, PNG) en une seule fois.
+
+        La base est lue une seule fois puis les fichiers sont générés en
+        parallèle (voir planning_export.export_all_filieres). Un manifeste
+        manifest.json accompagne les fichiers.
+
+        Args:
+            output_dir (str, optional): Dossier de sortie
+                (par défaut ~/Documents/Plannings_FST_<horodatage>)
+            formats (tuple): Formats à produire
+            max_workers (int, optional): Nombre de processus de rendu
+            progress (callable, optional): Appelé avec (fichiers traités, total)
+            should_stop (callable, optional): Retourne True pour annuler les
+                fichiers pas encore rendus
+
+        Returns:
+            dict: {"success": bool, "message": str, "output_dir": str, "manifest": dict}
+        """
+        if output_dir is None:
+            output_dir = documents_path("Plannings_FST")
+
+        manifest = export_all_filieres(output_dir, formats, max_workers, cache=get_cache(),
+                                       progress=progress, should_stop=should_stop)
+        nb_files = len(manifest["files"]) - manifest["errors"]
+        message = (f"{nb_files} fichier(s) généré(s) pour {len(manifest['filieres'])} filière(s) "
+                   f"en {manifest['duration_ms'] / 1000:.1f} s dans : {output_dir}")
+        if manifest["cancelled"]:
+            message = "Export annulé. " + message
+        if manifest["errors"]:
+            message += f"\n{manifest['errors']} erreur(s), voir manifest.json"
+        return {
+            "success": manifest["errors"] == 0 and not manifest["cancelled"],
+            "message": message,
+            "output_dir": output_dir,
+            "manifest": manifest,
+        }
 
-                cursor.execute("""
-                    SELECT s.name as subject, r.name as room, g.name as group_name
-                    FROM timetable t
-                    JOIN subjects s ON t.course_id = s.id
-                    JOIN rooms r ON t.room_id = r.id
-                    JOIN groups g ON t.group_id = g.id
-                    WHERE t.day = ? AND t.start_hour = ? AND g.filiere = ?
-                    ORDER BY g.name
-                """, (day_idx, start_h, filiere_name))
-
-                results = cursor.fetchall()
-                
-                # Dessiner la cellule
-                draw.rectangle([x, y, x + cell_width, y + cell_height], outline=grid_color)
-
-                if results:
-                    text_y = y + 5
-                    for r in results[:2]:  # Limiter à 2 entrées par cellule pour lisibilité
-                        text = f"{r['subject'][:15]}"
-                        draw.text((x + 5, text_y), text, fill=text_color, font=font_cell)
-                        text_y += 12
-                        draw.text((x + 5, text_y), f"({r['group_name']}) {r['room']}", fill=(100, 100, 100), font=font_cell)
-                        text_y += 15
+    def publier_instantane(self, path=None):
+        """
+        Publie l'instantané de l'emploi du temps lu par les étudiants et enseignants.
 
-        conn.close()
+        Les clients (StudentController / TeacherController avec use_snapshot)
+        chargent ce fichier en mémoire au lieu de lire la base principale. Une
+        fois publié, il est republié automatiquement après chaque écriture de
+        l'emploi du temps faite ici ; une publication manuelle reste utile
+        après une modification faite hors de l'application.
 
-        # Pied de page
-        draw.text((10, img_height - 25), f"Généré le {datetime.now().strftime('%d/%m/%Y %H:%M')}", fill=(128, 128, 128), font=font_cell)
+        Args:
+            path (str, optional): Fichier publié (par défaut snapshot.default_path())
 
-        img.save(unique_filename)
-        return f"Image générée avec succès : {unique_filename}"
+        Returns:
+            dict: {"success": bool, "message": str, "path": str, "slots": int}
+        """
+        try:
+            return snapshot.publish(path)
+        except Exception as e:
+            return {"success": False, "message": f"Erreur de publication : {e}"}
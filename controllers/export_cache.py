@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Cache disque des exports de plannings (rendu une seule fois).
+
+Un export est identifié par (filière, format, empreinte des lignes de
+l'emploi du temps utilisées pour le rendu). Tant que ces lignes ne changent
+pas, le fichier déjà rendu est réutilisé tel quel au lieu de relancer
+ReportLab / openpyxl / Pillow.
+
+La taille totale du cache est bornée : au-delà de max_bytes, les fichiers les
+moins récemment utilisés (date de modification, rafraîchie à chaque accès)
+sont supprimés.
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+# Dossier par défaut du cache (hors du dossier du projet)
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "emploi_du_temps", "exports")
+
+# Taille maximale du cache sur disque (64 Mo)
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Préfixe des fichiers en cours d'écriture (jamais évincés)
+TMP_PREFIX = ".tmp-"
+
+
+def rows_digest(rows):
+    """
+    Calcule l'empreinte des lignes utilisées pour le rendu d'une filière.
+
+    Args:
+        rows (list): Lignes (dict ou sqlite3.Row) day, start_hour, subject, room, group_name
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    payload = [
+        (row['day'], row['start_hour'], row['subject'], row['room'], row['group_name'])
+        for row in rows
+    ]
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class ExportCache:
+    """
+    Cache LRU de fichiers d'export sur disque.
+
+    Attributes:
+        directory (str): Dossier des fichiers rendus
+        max_bytes (int): Taille totale maximale du cache
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        """Initialise le cache (le dossier est créé au premier enregistrement)."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def key(self, filiere_name, fmt, digest):
+        """Clé d'un export : empreinte de (filière, format, empreinte des lignes)."""
+        return hashlib.sha256(f"{filiere_name}\0{fmt}\0{digest}".encode("utf-8")).hexdigest()
+
+    def path(self, key, fmt):
+        """Chemin du fichier rendu pour une clé."""
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def get(self, key, fmt):
+        """
+        Cherche un export déjà rendu.
+
+        Args:
+            key (str): Clé retournée par key()
+            fmt (str): Format (extension)
+
+        Returns:
+            str or None: Chemin du fichier, ou None s'il n'est pas en cache
+        """
+        path = self.path(key, fmt)
+        try:
+            # Marque l'entrée comme récemment utilisée
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, fmt, render):
+        """
+        Rend un export et l'enregistre dans le cache.
+
+        Args:
+            key (str): Clé retournée par key()
+            fmt (str): Format (extension)
+            render (callable): Fonction appelée avec le chemin du fichier à écrire
+
+        Returns:
+            str: Chemin du fichier en cache
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=TMP_PREFIX, suffix=f".{fmt}", dir=self.directory)
+        os.close(fd)
+        try:
+            render(tmp_path)
+            path = self.path(key, fmt)
+            # Remplacement atomique : un lecteur ne voit jamais un fichier à moitié écrit
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def store(self, key, fmt, source_path):
+        """Copie dans le cache un fichier rendu ailleurs (ex: par l'export groupé)."""
+        return self.put(key, fmt, lambda target: shutil.copyfile(source_path, target))
+
+    def get_or_render_bytes(self, filiere_name, fmt, rows, render):
+        """
+        Retourne le contenu d'un export, depuis le cache ou rendu en mémoire.
+
+        Args:
+            filiere_name (str): Nom de la filière
+            fmt (str): Format (extension)
+            rows (list): Lignes de l'emploi du temps de la filière
+            render (callable): Fonction appelée avec un flux binaire à remplir
+
+        Returns:
+            bytes: Contenu du fichier exporté
+        """
+        key = self.key(filiere_name, fmt, rows_digest(rows))
+        path = self.get(key, fmt)
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except OSError:
+                pass  # Entrée évincée entre-temps : on la rend à nouveau
+
+        buffer = io.BytesIO()
+        render(buffer)
+        data = buffer.getvalue()
+        self.put(key, fmt, lambda target: _write_bytes(target, data))
+        return data
+
+    def evict(self, keep=None):
+        """
+        Supprime les entrées les moins récemment utilisées au-delà de max_bytes.
+
+        Args:
+            keep (str, optional): Chemin à ne jamais supprimer (entrée qui vient d'être écrite)
+        """
+        with self._lock:
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return
+            entries = []
+            total = 0
+            for name in names:
+                path = os.path.join(self.directory, name)
+                if name.startswith(TMP_PREFIX):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total += stat.st_size
+                if path != keep:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Vide le cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_cache = None
+
+
+def get_cache():
+    """
+    Retourne le cache d'exports partagé.
+
+    Returns:
+        ExportCache: Le cache partagé
+    """
+    global _cache
+    if _cache is None:
+        _cache = ExportCache()
+    return _cache
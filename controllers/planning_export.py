@@ -0,0 +1,565 @@
+# -*- coding: utf-8 -*-
+"""
+Rendu des emplois du temps par filière (PDF, Excel, PNG).
+
+Les fonctions render_* reçoivent une grille déjà construite
+(voir build_filiere_grid) et un fichier de destination : elles ne lisent
+jamais la base. Cela permet :
+- aux exports unitaires de l'AdminController de faire une seule requête ;
+- à export_all_filieres() de lire une seule fois toute la base (un instantané
+  cohérent) puis de produire toutes les filières × formats en parallèle dans
+  un pool de processus, avec un manifeste JSON dans le dossier de sortie ;
+- de rendre un export directement en mémoire (render_to_bytes) ou dans un
+  flux (render_to_stream), sans créer de fichier.
+"""
+
+import io
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+from database import getConnection, TRACKED_TABLES
+from .export_cache import rows_digest
+
+
+# Grille officielle des exports par filière (FST Tanger)
+EXPORT_TIME_SLOTS = ["09h00-10h30", "10h45-12h15", "12h30-14h00", "14h15-15h45", "16h00-17h30"]
+EXPORT_DAYS = ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI"]
+
+# Mapping des jours pour la base de données
+EXPORT_DAYS_MAPPING = {"LUNDI": 1, "MARDI": 2, "MERCREDI": 3, "JEUDI": 4, "VENDREDI": 5, "SAMEDI": 6}
+
+# Mapping des créneaux horaires vers les heures de la base
+EXPORT_SLOT_TO_HOUR = {"09h00-10h30": 9, "10h45-12h15": 10, "12h30-14h00": 12, "14h15-15h45": 14, "16h00-17h30": 16}
+
+# Formats produits par l'export groupé (extension de fichier)
+EXPORT_FORMATS = ("pdf", "xlsx", "png")
+
+MANIFEST_NAME = "manifest.json"
+
+# Tables dont dépend le rendu d'une filière
+FILIERE_TABLES = ("timetable", "subjects", "rooms", "groups")
+
+
+def slot_start_hour(day_name, slot):
+    """Heure de début en base d'un créneau de la grille d'export."""
+    # Gestion de l'exception du Vendredi après-midi (15h00)
+    if day_name == "VENDREDI" and slot == "14h15-15h45":
+        return 15
+    return EXPORT_SLOT_TO_HOUR.get(slot, int(slot.split('h')[0]))
+
+
+def build_filiere_grid(rows):
+    """
+    Répartit les cours d'une filière dans la grille jours × créneaux.
+
+    Args:
+        rows (list): Lignes avec day, start_hour, subject, room, group_name,
+            triées par nom de groupe
+
+    Returns:
+        list: Une entrée (jour, [cours du créneau 1, ..., cours du créneau 5])
+            par jour de EXPORT_DAYS
+    """
+    by_start = {}
+    for row in rows:
+        by_start.setdefault((row['day'], row['start_hour']), []).append(row)
+
+    grid = []
+    for day_name in EXPORT_DAYS:
+        day_idx = EXPORT_DAYS_MAPPING.get(day_name, 0)
+        cells = [by_start.get((day_idx, slot_start_hour(day_name, slot)), [])
+                 for slot in EXPORT_TIME_SLOTS]
+        grid.append((day_name, cells))
+    return grid
+
+
+# --- Rendus ---
+
+def render_pdf(filiere_name, grid, target, error=None):
+    """
+    Génère le PDF structuré selon le format officiel de l'Université Abdelmalek Essaâdi.
+
+    Args:
+        filiere_name (str): Nom de la filière
+        grid (list): Grille issue de build_filiere_grid (None si indisponible)
+        target (str or file): Chemin du fichier ou flux binaire à écrire
+        error (str, optional): Erreur de lecture à afficher à la place du tableau
+
+    Raises:
+        ImportError: Si ReportLab n'est pas installé
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import ParagraphStyle
+
+    # Configuration du document en mode paysage
+    doc = SimpleDocTemplate(target, pagesize=landscape(A4))
+    elements = []
+
+    # Styles pour l'en-tête institutionnel
+    style_header = ParagraphStyle('Header', fontSize=12, leading=14, alignment=1)
+    style_title = ParagraphStyle('Title', fontSize=13, leading=16, alignment=1,
+                                 spaceAfter=10, fontName='Helvetica-Bold')
+    style_nb = ParagraphStyle('NB', fontSize=9, italic=True)
+
+    # En-tête de l'université et de la faculté
+    elements.append(Paragraph(
+        "Université Abdelmalek Essaâdi<br/>Faculté des Sciences et Techniques - Tanger",
+        style_header
+    ))
+    elements.append(Paragraph(f"Emploi du Temps du Semestre 6 (2025/2026)", style_title))
+    elements.append(Paragraph(f"Filière : {filiere_name}", style_title))
+    elements.append(Spacer(1, 15))
+
+    # Créneaux horaires officiels de la FST Tanger
+    time_slots = EXPORT_TIME_SLOTS
+    data = [["JOURS"] + time_slots]
+
+    if error is not None:
+        error_style = ParagraphStyle('Error', textColor=colors.red, fontSize=10)
+        elements.append(Paragraph(f"Erreur technique : {error}", error_style))
+    else:
+        for day_name, cells in grid:
+            row = [day_name]
+            for results in cells:
+                if results:
+                    cell_items = []
+                    for res in results:
+                        cell_items.append(f"{res['subject']} ({res['group_name']})\n{res['room']}")
+                    row.append("\n\n".join(cell_items))
+                else:
+                    row.append("")
+            data.append(row)
+
+    # Application du style au tableau
+    if len(data) > 1:
+        table = Table(data, colWidths=[80] + [135] * len(time_slots))
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 1), (0, -1), colors.whitesmoke),
+        ]))
+        elements.append(table)
+
+    # Mentions obligatoires (N.B.)
+    elements.append(Spacer(1, 15))
+    nb_text = (
+        "<b>N.B:</b> Les plannings de Travaux Pratiques seront affichés dans les départements concernés.<br/>"
+        "Le Vendredi après-midi, les cours commencent à 15h00."
+    )
+    elements.append(Paragraph(nb_text, style_nb))
+
+    # Pied de page avec horodatage
+    gen_date = datetime.now().strftime("%d/%m/%Y %H:%M")
+    elements.append(Spacer(1, 10))
+    elements.append(Paragraph(f"Document généré le {gen_date}",
+                              ParagraphStyle('Footer', fontSize=7, alignment=2)))
+
+    # Construction finale du PDF
+    doc.build(elements)
+
+
+def render_excel(filiere_name, grid, target):
+    """
+    Génère le classeur Excel de l'emploi du temps d'une filière.
+
+    Le classeur est créé en mode écriture seule (write_only) : les lignes sont
+    écrites au fil de l'eau au lieu d'être gardées en mémoire, ce qui reste
+    rapide et léger même pour de grandes feuilles.
+
+    Args:
+        filiere_name (str): Nom de la filière
+        grid (list): Grille issue de build_filiere_grid
+        target (str or file): Chemin du fichier ou flux binaire à écrire
+
+    Raises:
+        ImportError: Si openpyxl n'est pas installé
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(f"EDT {filiere_name}"[:31])  # Excel limite à 31 caractères
+
+    # Styles
+    header_font = Font(bold=True, size=14)
+    title_font = Font(bold=True, size=11)
+    center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    day_fill = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    def styled(value, **style):
+        """Cellule en écriture seule avec son style."""
+        cell = WriteOnlyCell(ws, value=value)
+        for name, attr in style.items():
+            setattr(cell, name, attr)
+        return cell
+
+    # Créneaux horaires
+    time_slots = EXPORT_TIME_SLOTS
+    days_list = EXPORT_DAYS
+
+    # En mode écriture seule, les dimensions doivent être fixées avant les lignes
+    ws.column_dimensions['A'].width = 12
+    for col in range(2, len(time_slots) + 2):
+        ws.column_dimensions[get_column_letter(col)].width = 22
+    for row in range(5, 5 + len(days_list)):
+        ws.row_dimensions[row].height = 60
+
+    # En-tête (lignes 1 et 2, fusionnées sur la largeur du tableau)
+    ws.merged_cells.add('A1:F1')
+    ws.merged_cells.add('A2:F2')
+    ws.append([styled("Université Abdelmalek Essaâdi - FST Tanger", font=header_font, alignment=center_align)])
+    ws.append([styled(f"Emploi du Temps - Filière: {filiere_name}", font=title_font, alignment=center_align)])
+    ws.append([])
+
+    # En-tête du tableau (ligne 4)
+    ws.append(
+        [styled("JOURS", font=title_font, fill=header_fill, alignment=center_align, border=thin_border)]
+        + [styled(slot, font=Font(bold=True, color="FFFFFF"), fill=header_fill,
+                  alignment=center_align, border=thin_border)
+           for slot in time_slots]
+    )
+
+    # Une ligne par jour (à partir de la ligne 5)
+    for day_name, cells in grid:
+        row = [styled(day_name, font=title_font, fill=day_fill, alignment=center_align, border=thin_border)]
+        for results in cells:
+            if results:
+                cell_text = "\n".join([f"{r['subject']} ({r['group_name']})\n{r['room']}" for r in results])
+            else:
+                cell_text = ""
+            row.append(styled(cell_text, alignment=center_align, border=thin_border))
+        ws.append(row)
+
+    # Pied de page
+    ws.append([])
+    ws.append([f"Généré le {datetime.now().strftime('%d/%m/%Y %H:%M')}"])
+
+    wb.save(target)
+
+
+def render_image(filiere_name, grid, target):
+    """
+    Génère l'image PNG de l'emploi du temps d'une filière.
+
+    Args:
+        filiere_name (str): Nom de la filière
+        grid (list): Grille issue de build_filiere_grid
+        target (str or file): Chemin du fichier ou flux binaire à écrire
+
+    Raises:
+        ImportError: Si Pillow n'est pas installé
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    # Configuration
+    time_slots = EXPORT_TIME_SLOTS
+    days_list = EXPORT_DAYS
+
+    # Dimensions
+    cell_width = 150
+    cell_height = 80
+    header_height = 100
+    day_col_width = 100
+
+    img_width = day_col_width + (cell_width * len(time_slots)) + 20
+    img_height = header_height + (cell_height * len(days_list)) + 60
+
+    # Créer l'image
+    img = Image.new('RGB', (img_width, img_height), color='white')
+    draw = ImageDraw.Draw(img)
+
+    # Polices (utiliser les polices par défaut)
+    try:
+        font_title = ImageFont.truetype("arial.ttf", 16)
+        font_header = ImageFont.truetype("arial.ttf", 12)
+        font_cell = ImageFont.truetype("arial.ttf", 9)
+    except:
+        font_title = ImageFont.load_default()
+        font_header = ImageFont.load_default()
+        font_cell = ImageFont.load_default()
+
+    # Couleurs
+    header_color = (68, 114, 196)
+    day_color = (217, 226, 243)
+    grid_color = (0, 0, 0)
+    text_color = (0, 0, 0)
+
+    # Titre
+    draw.text((10, 10), "Université Abdelmalek Essaâdi - FST Tanger", fill=text_color, font=font_title)
+    draw.text((10, 35), f"Emploi du Temps - Filière: {filiere_name}", fill=text_color, font=font_header)
+
+    # Position de départ du tableau
+    start_x = 10
+    start_y = header_height - 20
+
+    # En-tête des créneaux
+    draw.rectangle([start_x, start_y, start_x + day_col_width, start_y + 30], fill=header_color)
+    draw.text((start_x + 10, start_y + 8), "JOURS", fill='white', font=font_header)
+
+    for i, slot in enumerate(time_slots):
+        x = start_x + day_col_width + (i * cell_width)
+        draw.rectangle([x, start_y, x + cell_width, start_y + 30], fill=header_color)
+        draw.text((x + 10, start_y + 8), slot, fill='white', font=font_cell)
+
+    for row_idx, (day_name, cells) in enumerate(grid):
+        y = start_y + 30 + (row_idx * cell_height)
+
+        # Colonne jour
+        draw.rectangle([start_x, y, start_x + day_col_width, y + cell_height], fill=day_color, outline=grid_color)
+        draw.text((start_x + 10, y + 30), day_name, fill=text_color, font=font_header)
+
+        for col_idx, results in enumerate(cells):
+            x = start_x + day_col_width + (col_idx * cell_width)
+
+            # Dessiner la cellule
+            draw.rectangle([x, y, x + cell_width, y + cell_height], outline=grid_color)
+
+            if results:
+                text_y = y + 5
+                for r in results[:2]:  # Limiter à 2 entrées par cellule pour lisibilité
+                    text = f"{r['subject'][:15]}"
+                    draw.text((x + 5, text_y), text, fill=text_color, font=font_cell)
+                    text_y += 12
+                    draw.text((x + 5, text_y), f"({r['group_name']}) {r['room']}", fill=(100, 100, 100), font=font_cell)
+                    text_y += 15
+
+    # Pied de page
+    draw.text((10, img_height - 25), f"Généré le {datetime.now().strftime('%d/%m/%Y %H:%M')}", fill=(128, 128, 128), font=font_cell)
+
+    img.save(target, format="PNG")
+
+
+RENDERERS = {
+    "pdf": render_pdf,
+    "xlsx": render_excel,
+    "png": render_image,
+}
+
+# Types MIME des formats (pour servir les exports en mémoire)
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "png": "image/png",
+}
+
+
+def render_to_stream(filiere_name, grid, fmt, stream):
+    """
+    Rend l'emploi du temps d'une filière dans un flux binaire, sans fichier.
+
+    Args:
+        filiere_name (str): Nom de la filière
+        grid (list): Grille issue de build_filiere_grid
+        fmt (str): Format parmi EXPORT_FORMATS
+        stream (file): Flux binaire inscriptible (io.BytesIO, réponse HTTP...)
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    RENDERERS[fmt](filiere_name, grid, stream)
+
+
+def render_to_bytes(filiere_name, grid, fmt):
+    """
+    Rend l'emploi du temps d'une filière en mémoire.
+
+    Returns:
+        bytes: Contenu du fichier PDF / XLSX / PNG
+    """
+    buffer = io.BytesIO()
+    render_to_stream(filiere_name, grid, fmt, buffer)
+    return buffer.getvalue()
+
+
+# --- Export groupé ---
+
+def take_snapshot(conn=None):
+    """
+    Lit en une seule transaction tout ce qu'il faut pour exporter toutes les filières.
+
+    Les versions de données et les cours sont lus dans la même transaction
+    de lecture : ils décrivent exactement le même état de la base.
+
+    Args:
+        conn (sqlite3.Connection, optional): Connexion à réutiliser
+
+    Returns:
+        tuple: (versions {table: version}, {filière: [lignes sous forme de dict]})
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = getConnection()
+    try:
+        conn.commit()
+        conn.execute("BEGIN")
+        placeholders = ", ".join("?" for _ in TRACKED_TABLES)
+        versions = {row[0]: row[1] for row in conn.execute(
+            f"SELECT table_name, version FROM data_version WHERE table_name IN ({placeholders})",
+            TRACKED_TABLES
+        )}
+        rows_by_filiere = {row[0]: [] for row in conn.execute(
+            "SELECT DISTINCT filiere FROM groups WHERE filiere IS NOT NULL AND filiere != '' ORDER BY filiere"
+        )}
+        for row in conn.execute("""
+            SELECT g.filiere, t.day, t.start_hour, s.name AS subject, r.name AS room, g.name AS group_name
+            FROM timetable t
+            JOIN subjects s ON t.course_id = s.id
+            JOIN rooms r ON t.room_id = r.id
+            JOIN groups g ON t.group_id = g.id
+            WHERE g.filiere IS NOT NULL AND g.filiere != ''
+            ORDER BY g.filiere, g.name
+        """):
+            rows_by_filiere.setdefault(row['filiere'], []).append({
+                'day': row['day'],
+                'start_hour': row['start_hour'],
+                'subject': row['subject'],
+                'room': row['room'],
+                'group_name': row['group_name'],
+            })
+        conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
+    return versions, rows_by_filiere
+
+
+def export_filename(filiere_name, fmt):
+    """Nom de fichier d'une filière dans le dossier d'export (sans séparateurs de chemin)."""
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in filiere_name.strip())
+    return f"Planning_{safe}.{fmt}"
+
+
+def _render_job(job):
+    """
+    Tâche exécutée dans un processus du pool : rend une filière dans un format.
+
+    Args:
+        job (tuple): (filière, format, lignes, chemin de sortie)
+
+    Returns:
+        dict: Entrée du manifeste (fichier, taille, durée ou erreur)
+    """
+    filiere_name, fmt, rows, path = job
+    entry = {"filiere": filiere_name, "format": fmt, "file": os.path.basename(path)}
+    start = time.perf_counter()
+    try:
+        RENDERERS[fmt](filiere_name, build_filiere_grid(rows), path)
+        entry["size"] = os.path.getsize(path)
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return entry
+
+
+def export_all_filieres(output_dir, formats=EXPORT_FORMATS, max_workers=None, cache=None,
+                        progress=None, should_stop=None):
+    """
+    Exporte toutes les filières dans tous les formats demandés, en parallèle.
+
+    La base est lue une seule fois (take_snapshot) ; le rendu de chaque
+    couple (filière, format) est ensuite confié à un pool de processus.
+    Avec un cache d'exports, les couples dont les cours n'ont pas changé sont
+    simplement copiés depuis le cache. Un fichier manifest.json décrit le
+    résultat dans output_dir.
+
+    Args:
+        output_dir (str): Dossier de sortie (créé si besoin)
+        formats (tuple): Formats parmi EXPORT_FORMATS
+        max_workers (int, optional): Nombre de processus (nombre de CPU par défaut)
+        cache (ExportCache, optional): Cache d'exports à consulter et alimenter
+        progress (callable, optional): Appelé avec (fichiers traités, total)
+            après chaque fichier
+        should_stop (callable, optional): Retourne True pour annuler les rendus
+            pas encore commencés (le manifeste indique alors "cancelled")
+
+    Returns:
+        dict: Le manifeste (versions, fichiers générés et erreurs éventuelles)
+    """
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Format(s) d'export inconnu(s) : {', '.join(unknown)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+    versions, rows_by_filiere = take_snapshot()
+
+    files = []
+    jobs = []
+    job_keys = []
+    for filiere_name, rows in rows_by_filiere.items():
+        digest = rows_digest(rows) if cache is not None else None
+        for fmt in formats:
+            path = os.path.join(output_dir, export_filename(filiere_name, fmt))
+            key = cache.key(filiere_name, fmt, digest) if cache is not None else None
+            cached_path = cache.get(key, fmt) if cache is not None else None
+            if cached_path is not None:
+                shutil.copyfile(cached_path, path)
+                files.append({"filiere": filiere_name, "format": fmt,
+                              "file": os.path.basename(path),
+                              "size": os.path.getsize(path), "cached": True})
+            else:
+                jobs.append((filiere_name, fmt, rows, path))
+                job_keys.append(key)
+
+    total = len(files) + len(jobs)
+    if progress is not None:
+        progress(len(files), total)
+
+    cancelled = False
+    if jobs:
+        # Import différé : multiprocessing n'est chargé que pour un export groupé
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        rendered = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_render_job, job): i for i, job in enumerate(jobs)}
+            done = len(files)
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                rendered[futures[future]] = future.result()
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+                if not cancelled and should_stop is not None and should_stop():
+                    cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+        # Ordre des fichiers stable (celui des travaux), quel que soit l'ordre de fin
+        for job, key, entry in zip(jobs, job_keys, rendered):
+            if entry is None:
+                continue
+            if cache is not None and "error" not in entry:
+                cache.store(key, entry["format"], job[3])
+            files.append(entry)
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "data_versions": versions,
+        "filieres": list(rows_by_filiere),
+        "formats": list(formats),
+        "files": files,
+        "errors": sum(1 for entry in files if "error" in entry),
+        "cancelled": cancelled,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
@@ -3,18 +3,31 @@ Contrôleur pour les fonctionnalités étudiants
 """
 
 from datetime import datetime
-from database import getConnection
+import availability
+import queries
+import snapshot
 
 # Jours de la semaine
 DAYS = {1: "Lundi", 2: "Mardi", 3: "Mercredi", 4: "Jeudi", 5: "Vendredi"}
 
 class StudentController:
-    def __init__(self, user_id):
+    def __init__(self, user_id, use_snapshot=False):
         """
         Initialise le contrôleur avec l'ID de l'utilisateur étudiant
+
+        Avec use_snapshot, les consultations sont servies depuis l'instantané
+        publié par l'administration (voir snapshot), republié après chaque
+        modification de l'emploi du temps ; sans instantané publié, elles
+        lisent la base principale.
         """
         self.user_id = user_id
-        self.group_id = self._get_student_group()
+        self.use_snapshot = use_snapshot
+        # Sans utilisateur (recherche de salles seule), aucun groupe à chercher
+        self.group_id = self._get_student_group() if user_id is not None else None
+
+    def _snapshot(self):
+        """Instantané publié à utiliser, ou None pour lire la base principale."""
+        return snapshot.get_snapshot() if self.use_snapshot else None
     
     def _get_student_group(self):
         """
@@ -23,28 +36,24 @@ class StudentController:
         Returns:
             int or None: ID du groupe ou None si non trouvé
         """
-        conn = getConnection()
-        cursor = conn.cursor()
-        
+        published = self._snapshot()
+        if published is not None:
+            return published.group_of_student(self.user_id)
+
         # Récupérer le groupe de l'étudiant via la table de liaison
-        cursor.execute("""
-            SELECT g.id 
-            FROM groups g
-            JOIN student_groups sg ON g.id = sg.group_id
-            WHERE sg.user_id = ? AND g.active = 1
-            LIMIT 1
-        """, (self.user_id,))
-        
-        result = cursor.fetchone()
+        result = queries.fetchone("student_group", (self.user_id,))
         
         # Fallback: si pas dans student_groups, prendre le premier groupe actif
         if not result:
-            cursor.execute("SELECT id FROM groups WHERE active = 1 LIMIT 1")
-            result = cursor.fetchone()
+            result = queries.fetchone("first_active_group")
         
-        conn.close()
         return result['id'] if result else None
     
+    def _availability(self):
+        """Moteur de salles libres : celui de l'instantané, sinon le moteur partagé."""
+        published = self._snapshot()
+        return published.engine if published is not None else availability.get_engine()
+    
     def get_group_timetable(self):
         """
         CONSULTER L'EMPLOI DU TEMPS DE SON GROUPE
@@ -53,37 +62,17 @@ class StudentController:
         if not self.group_id:
             return {"success": False, "error": "Groupe non trouvé pour cet étudiant"}
         
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        # Récupérer le nom du groupe
-        cursor.execute("SELECT name FROM groups WHERE id = ?", (self.group_id,))
-        group = cursor.fetchone()
-        group_name = group['name'] if group else "Inconnu"
-        
-        # Récupérer l'emploi du temps
-        query = """
-        SELECT 
-            t.day,
-            t.start_hour,
-            t.duration,
-            s.name AS subject_name,
-            s.code AS subject_code,
-            s.type AS subject_type,
-            i.name AS instructor_name,
-            r.name AS room_name,
-            r.type AS room_type
-        FROM timetable t
-        JOIN subjects s ON t.course_id = s.id
-        JOIN instructors i ON t.instructor_id = i.id
-        JOIN rooms r ON t.room_id = r.id
-        WHERE t.group_id = ?
-        ORDER BY t.day, t.start_hour
-        """
-        
-        cursor.execute(query, (self.group_id,))
-        timetable_slots = cursor.fetchall()
-        conn.close()
+        published = self._snapshot()
+        if published is not None:
+            group_name = published.group_name(self.group_id) or "Inconnu"
+            timetable_slots = published.group_timetable(self.group_id)
+        else:
+            # Récupérer le nom du groupe
+            group = queries.fetchone("group_name", (self.group_id,))
+            group_name = group['name'] if group else "Inconnu"
+            
+            # Récupérer l'emploi du temps
+            timetable_slots = queries.fetchall("group_timetable", (self.group_id,))
         
         # Organiser par jour
         organized = {}
@@ -120,34 +109,16 @@ class StudentController:
         Si seulement jour spécifié: montre toutes les salles avec leurs disponibilités
         Si rien spécifié: liste toutes les salles
         """
-        conn = getConnection()
-        cursor = conn.cursor()
-        
         if day and start_hour:
             # Recherche précise pour un créneau
             end_hour = start_hour + duration
-            query = """
-            SELECT r.name, r.type, r.capacity FROM rooms r
-            WHERE r.active = 1 
-            AND r.id NOT IN (
-                SELECT room_id FROM timetable 
-                WHERE day = ? 
-                AND (start_hour < ?) AND (? < start_hour + duration)
-                UNION
-                SELECT room_id FROM reservations 
-                WHERE day = ? AND status = 'APPROVED'
-                AND (start_hour < ?) AND (? < start_hour + duration)
-            )
-            ORDER BY r.name
-            """
             
-            cursor.execute(query, (day, end_hour, start_hour, day, end_hour, start_hour))
-            rooms = cursor.fetchall()
-            conn.close()
+            # Salles libres calculées par opérations bit à bit (aucune requête par salle)
+            engine = self._availability()
             
             # MODIFICATION: Retourner des noms au lieu d'IDs
             rooms_list = []
-            for room in rooms:
+            for room in engine.free_rooms(day, start_hour, duration):
                 rooms_list.append({
                     'nom': room['name'],
                     'type': room['type'],
@@ -159,40 +130,12 @@ class StudentController:
         
         elif day:
             # Voir les disponibilités sur toute la journée
-            cursor.execute("SELECT * FROM rooms WHERE active = 1 ORDER BY name")
-            all_rooms = cursor.fetchall()
+            engine = self._availability()
             
             rooms_with_schedule = []
-            for room in all_rooms:
-                # Récupérer les créneaux occupés
-                cursor.execute("""
-                    SELECT start_hour, duration 
-                    FROM timetable 
-                    WHERE room_id = ? AND day = ?
-                    UNION
-                    SELECT start_hour, duration 
-                    FROM reservations 
-                    WHERE room_id = ? AND day = ? AND status = 'APPROVED'
-                    ORDER BY start_hour
-                """, (room['id'], day, room['id'], day))
-                
-                occupied = cursor.fetchall()
-                
-                # Calculer les créneaux libres (8h-18h)
-                free_slots = []
-                current = 8  # Début de journée
-                
-                for slot in occupied:
-                    slot_start = slot['start_hour']
-                    slot_end = slot_start + slot['duration']
-                    
-                    if current < slot_start:
-                        free_slots.append(f"{current}h-{slot_start}h")
-                    
-                    current = max(current, slot_end)
-                
-                if current < 18:
-                    free_slots.append(f"{current}h-18h")
+            for room, intervals in engine.free_intervals_by_room(day):
+                # Créneaux libres (8h-18h) lus dans les bitmaps d'occupation
+                free_slots = [f"{start}h-{end}h" for start, end in intervals]
                 
                 rooms_with_schedule.append({
                     'nom': room['name'],
@@ -201,14 +144,12 @@ class StudentController:
                     'creneaux_libres': free_slots
                 })
             
-            conn.close()
             return {"success": True, "rooms": rooms_with_schedule}
         
         else:
             # Lister toutes les salles (retourner des noms)
-            cursor.execute("SELECT name, type, capacity, equipments FROM rooms WHERE active = 1 ORDER BY name")
-            rooms = cursor.fetchall()
-            conn.close()
+            published = self._snapshot()
+            rooms = published.rooms if published is not None else queries.fetchall("active_rooms")
             
             rooms_list = []
             for room in rooms:
@@ -232,27 +173,11 @@ class StudentController:
         # Jour actuel (1=Lundi, 5=Vendredi)
         today = datetime.now().weekday() + 1
         
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        query = """
-        SELECT 
-            t.start_hour,
-            t.duration,
-            s.name AS subject_name,
-            i.name AS instructor_name,
-            r.name AS room_name
-        FROM timetable t
-        JOIN subjects s ON t.course_id = s.id
-        JOIN instructors i ON t.instructor_id = i.id
-        JOIN rooms r ON t.room_id = r.id
-        WHERE t.group_id = ? AND t.day = ?
-        ORDER BY t.start_hour
-        """
-        
-        cursor.execute(query, (self.group_id, today))
-        today_schedule = cursor.fetchall()
-        conn.close()
+        published = self._snapshot()
+        if published is not None:
+            today_schedule = published.group_timetable(self.group_id, day=today)
+        else:
+            today_schedule = queries.fetchall("group_day_timetable", (self.group_id, today))
         
         schedule_list = []
         for slot in today_schedule:
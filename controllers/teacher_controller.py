@@ -4,26 +4,40 @@ Contrôleur pour les fonctionnalités enseignants
 
 import sqlite3
 from datetime import datetime
+import conflicts
+import occupancy
+import queries
+import recommender
+import refdata
+import snapshot
 from database import getConnection
 
 # Jours de la semaine (copié de database.py pour éviter l'import circulaire)
 DAYS = {1: "Lundi", 2: "Mardi", 3: "Mercredi", 4: "Jeudi", 5: "Vendredi"}
 
 class TeacherController:
-    def __init__(self, user_id):
+    def __init__(self, user_id, use_snapshot=False):
         """
         Initialise le contrôleur avec l'ID de l'utilisateur enseignant
+
+        Avec use_snapshot, les consultations (emploi du temps, salles libres)
+        sont servies depuis l'instantané publié (voir snapshot), republié par
+        l'administration après chaque modification de l'emploi du temps ;
+        l'identité de l'enseignant est toujours lue dans la base principale,
+        où ses réservations et indisponibilités sont écrites.
         """
         self.user_id = user_id
-        self.instructor_id = self._get_instructor_id()
+        self.use_snapshot = use_snapshot
+        # Sans utilisateur (recherche de salles seule), aucun enseignant à chercher
+        self.instructor_id = self._get_instructor_id() if user_id is not None else None
+    
+    def _snapshot(self):
+        """Instantané publié à utiliser, ou None pour lire la base principale."""
+        return snapshot.get_snapshot() if self.use_snapshot else None
     
     def _get_instructor_id(self):
-        """Récupère l'ID de l'instructeur"""
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM instructors WHERE user_id = ?", (self.user_id,))
-        result = cursor.fetchone()
-        conn.close()
+        """Récupère l'ID de l'instructeur (base principale : il sert aux écritures)"""
+        result = queries.fetchone("instructor_by_user", (self.user_id,))
         return result['id'] if result else None
     
     def get_teacher_timetable(self):
@@ -34,30 +48,11 @@ class TeacherController:
         if not self.instructor_id:
             return {"success": False, "error": "Enseignant non trouvé"}
         
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        query = """
-        SELECT 
-            t.day,
-            t.start_hour,
-            t.duration,
-            s.name AS subject_name,
-            s.code AS subject_code,
-            g.name AS group_name,
-            r.name AS room_name,
-            r.type AS room_type
-        FROM timetable t
-        JOIN subjects s ON t.course_id = s.id
-        JOIN groups g ON t.group_id = g.id
-        JOIN rooms r ON t.room_id = r.id
-        WHERE t.instructor_id = ?
-        ORDER BY t.day, t.start_hour
-        """
-        
-        cursor.execute(query, (self.instructor_id,))
-        timetable_slots = cursor.fetchall()
-        conn.close()
+        published = self._snapshot()
+        if published is not None:
+            timetable_slots = published.teacher_timetable(self.instructor_id)
+        else:
+            timetable_slots = queries.fetchall("teacher_timetable", (self.instructor_id,))
         
         # Organiser par jour
         organized_timetable = {}
@@ -97,32 +92,39 @@ class TeacherController:
         if not self.instructor_id:
             return {"success": False, "message": "Enseignant non trouvé"}
         
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        # Récupérer l'ID de la salle par son nom
-        cursor.execute("SELECT id FROM rooms WHERE name = ? AND active = 1", (room_name,))
-        room = cursor.fetchone()
+        # Récupérer les IDs de la salle et du groupe par leur nom (cache de référence)
+        room = refdata.get_cache().find("rooms", name=room_name, active=1)
         if not room:
-            conn.close()
             return {"success": False, "message": f"Salle '{room_name}' non trouvée"}
         room_id = room['id']
         
-        # Récupérer l'ID du groupe par son nom
-        cursor.execute("SELECT id FROM groups WHERE name = ? AND active = 1", (group_name,))
-        group = cursor.fetchone()
+        group = refdata.get_cache().find("groups", name=group_name, active=1)
         if not group:
-            conn.close()
             return {"success": False, "message": f"Groupe '{group_name}' non trouvé"}
         group_id = group['id']
         
-        # Vérifier si la salle est disponible
-        conflict = self._check_room_availability(room_id, day, start_hour, duration)
-        if conflict:
-            conn.close()
-            return {"success": False, "message": conflict}
-        
+        conn = getConnection()
+        cursor = conn.cursor()
         try:
+            # Verrou d'écriture avant la vérification (comme valider_reservations) :
+            # aucune autre demande ne peut s'insérer entre le contrôle et l'INSERT
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # Vérifier la salle, le groupe et l'enseignant (cours, réservations
+            # approuvées ou en attente, indisponibilités) dans la même transaction
+            conflits = conflicts.find_conflicts(
+                cursor, day, start_hour, duration,
+                instructor_id=self.instructor_id, group_id=group_id, room_id=room_id
+            )
+            if conflits:
+                conn.rollback()
+                details = "\n".join(f"- {conflicts.describe(c)}" for c in conflits)
+                return {
+                    "success": False,
+                    "message": f"Créneau indisponible ({len(conflits)} conflit(s)) :\n{details}",
+                    "conflicts": conflits
+                }
+
             cursor.execute("""
                 INSERT INTO reservations 
                 (instructor_id, room_id, group_id, day, start_hour, duration, reason, status)
@@ -131,7 +133,6 @@ class TeacherController:
             
             conn.commit()
             reservation_id = cursor.lastrowid
-            conn.close()
             
             return {
                 "success": True, 
@@ -139,39 +140,10 @@ class TeacherController:
                 "reservation_id": reservation_id
             }
         except sqlite3.IntegrityError as e:
-            conn.close()
+            conn.rollback()
             return {"success": False, "message": f"Erreur: {str(e)}"}
-    
-    def _check_room_availability(self, room_id, day, start_hour, duration):
-        """Vérifie si une salle est disponible à un créneau donné"""
-        conn = getConnection()
-        cursor = conn.cursor()
-        end_hour = start_hour + duration
-        
-        # Vérifier dans l'emploi du temps
-        cursor.execute("""
-            SELECT id FROM timetable 
-            WHERE room_id = ? AND day = ? 
-            AND (start_hour < ?) AND (? < start_hour + duration)
-        """, (room_id, day, end_hour, start_hour))
-        
-        if cursor.fetchone():
-            conn.close()
-            return "Salle déjà occupée dans l'emploi du temps"
-        
-        # Vérifier dans les réservations approuvées
-        cursor.execute("""
-            SELECT id FROM reservations 
-            WHERE room_id = ? AND day = ? AND status = 'APPROVED'
-            AND (start_hour < ?) AND (? < start_hour + duration)
-        """, (room_id, day, end_hour, start_hour))
-        
-        if cursor.fetchone():
+        finally:
             conn.close()
-            return "Salle déjà réservée à ce créneau"
-        
-        conn.close()
-        return None
     
     def declare_unavailability(self, day, start_hour, duration, reason=""):
         """
@@ -198,6 +170,7 @@ class TeacherController:
             """, (self.instructor_id, day, start_hour, duration, reason))
             
             conn.commit()
+            occupancy.add_unavailability(conn, cursor.lastrowid, self.instructor_id, day, start_hour, duration)
             conn.close()
             
             # Mettre à jour les indisponibilités dans la table instructors
@@ -232,56 +205,43 @@ class TeacherController:
         # Mettre à jour
         cursor.execute("""
             UPDATE instructors 
-            SET unavailable_slots = ?
+            SET unavailable_slots = ?, updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         """, (','.join(formatted), self.instructor_id))
         
         conn.commit()
         conn.close()
     
-    def search_available_room(self, day, start_hour, duration=2, min_capacity=30):
+    def search_available_room(self, day, start_hour, duration=2, min_capacity=30, equipment=None,
+                              top_k=recommender.DEFAULT_TOP_K):
         """
         RECHERCHER UNE SALLE VACANTE
-        Recherche selon critères (horaire, capacité, équipement)
+        Recherche selon critères (horaire, capacité, équipement) : les top_k
+        salles les plus adaptées (voir recommender), None pour toutes
         """
         # Validation
         if day < 1 or day > 5:
             return {"success": False, "message": "Jour invalide", "rooms": []}
         
-        conn = getConnection()
-        cursor = conn.cursor()
-        end_hour = start_hour + duration
-        
-        query = """
-        SELECT r.* FROM rooms r
-        WHERE r.active = 1 
-        AND r.capacity >= ?
-        AND r.id NOT IN (
-            SELECT room_id FROM timetable 
-            WHERE day = ? 
-            AND (start_hour < ?) AND (? < start_hour + duration)
-            UNION
-            SELECT room_id FROM reservations 
-            WHERE day = ? AND status = 'APPROVED'
-            AND (start_hour < ?) AND (? < start_hour + duration)
-        )
-        ORDER BY r.name
-        """
-        
-        params = [min_capacity, day, end_hour, start_hour, day, end_hour, start_hour]
-        cursor.execute(query, params)
-        rooms = cursor.fetchall()
-        conn.close()
+        # Salles libres, assez grandes et équipées, classées en mémoire
+        published = self._snapshot()
+        ranked = recommender.recommend_rooms(day, start_hour, duration,
+                                             student_count=min_capacity,
+                                             equipment=equipment,
+                                             top_k=top_k,
+                                             engine=published.engine if published is not None else None)
         
         # Formater les résultats
         rooms_list = []
-        for room in rooms:
+        for rec in ranked:
+            room = rec['room']
             rooms_list.append({
                 'nom': room['name'],
                 'type': room['type'],
                 'capacité': room['capacity'],
                 'équipements': room['equipments'],
-                'disponible': True
+                'disponible': True,
+                'score': rec['score']
             })
         
         return {"success": True, "rooms": rooms_list, "count": len(rooms_list)}
@@ -291,22 +251,7 @@ class TeacherController:
         if not self.instructor_id:
             return {"success": False, "reservations": []}
         
-        conn = getConnection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                r.id, r.day, r.start_hour, r.duration,
-                ro.name AS salle, r.reason, r.status,
-                r.created_at AS date_soumission
-            FROM reservations r
-            LEFT JOIN rooms ro ON r.room_id = ro.id
-            WHERE r.instructor_id = ?
-            ORDER BY r.created_at DESC
-        """, (self.instructor_id,))
-        
-        reservations = cursor.fetchall()
-        conn.close()
+        reservations = queries.fetchall("teacher_reservations", (self.instructor_id,))
         
         # Formater
         formatted = []
@@ -1,13 +1,31 @@
 import sqlite3
-import bcrypt
 import os
 
+import occupancy
+
 # Nom du fichier de la base de données
 DB_NAME = 'university_schedule.db'
 
 # Constante pour les jours de la semaine (pour l'affichage)
 DAYS = {1: "Lundi", 2: "Mardi", 3: "Mercredi", 4: "Jeudi", 5: "Vendredi"}
 
+# Tables possédant une colonne updated_at ; toute requête UPDATE sur ces tables
+# doit fixer elle-même "updated_at = CURRENT_TIMESTAMP" (aucun trigger ne le fait)
+TIMESTAMPED_TABLES = ("users", "instructors", "rooms", "subjects", "groups",
+                      "timetable", "teacher_unavailability", "reservations")
+
+# Tables dont les modifications incrémentent un compteur dans data_version
+TRACKED_TABLES = ("timetable", "reservations", "rooms", "teacher_unavailability",
+                  "groups", "subjects", "instructors", "student_groups")
+
+# Tables historisées dans change_log -> colonnes clés copiées (avant / après)
+CHANGE_LOG_KEYS = {
+    "timetable": ("course_id", "instructor_id", "group_id", "room_id",
+                  "day", "start_hour", "duration"),
+    "reservations": ("instructor_id", "room_id", "group_id",
+                     "day", "start_hour", "duration", "status"),
+}
+
 # --- 1. FONCTIONS DE BASE ET SETUP ---
 
 def setup():
@@ -185,98 +203,368 @@ def setup():
         );
     """)
 
-    # ------------------ TRIGGERS POUR updated_at ------------------
+    # ------------------ MIGRATIONS (TRIGGERS, INDEX, NOUVELLES TABLES) ------------------
+    # Tout ce qui s'ajoute au schéma de base passe par migrate() pour atteindre
+    # aussi les bases existantes
+    migrate(conn)
+
+    # ------------------ ADMIN PAR DÉFAUT ------------------
+    cursor.execute("SELECT count(*) FROM users WHERE role='admin'")
+    if cursor.fetchone()[0] == 0:
+        print("Création de l'administrateur par défaut...")
+        import bcrypt  # Chargé seulement quand un mot de passe doit être haché
+        password_hash = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
+        cursor.execute("""
+            INSERT INTO users (username, password, role, full_name)
+            VALUES (?, ?, ?, ?)
+        """, ("admin", password_hash, "admin", "Administrateur Système"))
+        conn.commit()
+    
+    conn.close()
+    print("Base de données initialisée avec succès (avec timestamps).")
+
+def getConnection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row 
+    return conn
+
+# --- 1b. MIGRATIONS DU SCHÉMA ---
+# Chaque étape est numérotée ; PRAGMA user_version mémorise la dernière étape
+# appliquée. Les étapes doivent rester idempotentes (IF NOT EXISTS, etc.) et ne
+# jamais être modifiées une fois publiées : on en ajoute une nouvelle à la fin.
+
+def _migration_timestamp_triggers(cursor):
+    """
+    Supprime les triggers update_<table>_timestamp.
+
+    Ces triggers réécrivaient la ligne (second UPDATE) après chaque UPDATE
+    qui ne fixait pas updated_at : deux écritures par ligne modifiée. Les
+    requêtes UPDATE de l'application fixent désormais elles-mêmes
+    "updated_at = CURRENT_TIMESTAMP" et chaque ligne n'est écrite qu'une fois.
+    """
+    for table in TIMESTAMPED_TABLES:
+        cursor.execute(f"DROP TRIGGER IF EXISTS update_{table}_timestamp")
+
+# Colonnes qui ne changent pas le contenu d'une ligne (pas d'incrémentation de version)
+UNVERSIONED_COLUMNS = ("created_at", "updated_at")
+
+def _version_trigger_event(cursor, table, operation):
+    """
+    Événement d'un trigger de data_version.
+
+    Un UPDATE ne compte que s'il touche une colonne de contenu : "UPDATE OF"
+    exclut created_at / updated_at, si bien qu'une requête qui ne fait que
+    rafraîchir updated_at n'invalide aucun cache. Une colonne ajoutée plus
+    tard à la table demande de recréer ce trigger (nouvelle migration).
+    """
+    if operation != "UPDATE":
+        return operation
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in cursor.fetchall() if row[1] not in UNVERSIONED_COLUMNS]
+    return f"UPDATE OF {', '.join(columns)}"
+
+def _migration_data_version(cursor):
+    """Table data_version et triggers d'incrémentation (invalidation des caches)."""
+    # Un compteur par table, incrémenté à chaque INSERT / UPDATE / DELETE
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+
+    for table in TRACKED_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO data_version (table_name) VALUES (?)", (table,))
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS bump_{table}_version_{operation.lower()}
+                AFTER {_version_trigger_event(cursor, table, operation)} ON {table}
+                FOR EACH ROW
+                BEGIN
+                    UPDATE data_version SET version = version + 1 WHERE table_name = '{table}';
+                END;
+            """)
+
+def _migration_lookup_indexes(cursor):
+    """Index des recherches fréquentes (emplois du temps, réservations, filières)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timetable_group ON timetable(group_id, day, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timetable_instructor ON timetable(instructor_id, day, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timetable_room ON timetable(room_id, day, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservations_status ON reservations(status, day, room_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservations_instructor ON reservations(instructor_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_unavailability_instructor ON teacher_unavailability(instructor_id, day)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_groups_filiere ON groups(filiere)")
+
+def _timetable_stats_sql(row, sign):
+    """
+    Instructions de trigger qui répercutent un créneau (OLD ou NEW) dans
+    room_stats, en ajout (sign = "+") ou en retrait ("-").
+
+    L'occupation heure par heure n'est pas matérialisée : le cube d'analytics
+    a besoin de l'effectif des groupes et se reconstruit en une lecture.
+    """
+    if sign == "+":
+        return f"""
+            INSERT INTO room_stats (room_id, slot_count, hour_count)
+            VALUES ({row}.room_id, 1, {row}.duration)
+            ON CONFLICT(room_id) DO UPDATE SET
+                slot_count = slot_count + 1,
+                hour_count = hour_count + excluded.hour_count;
+        """
+    return f"""
+        UPDATE room_stats
+        SET slot_count = slot_count - 1, hour_count = hour_count - {row}.duration
+        WHERE room_id = {row}.room_id;
+    """
+
+def rebuild_stats(cursor):
+    """
+    Recalcule entièrement les tables de statistiques depuis les données.
+
+    Les triggers les tiennent ensuite à jour ; cette fonction sert à
+    l'initialisation (migration) ou à une réparation manuelle.
+    """
+    cursor.execute("DELETE FROM stats_counters")
+    cursor.execute("DELETE FROM room_stats")
+
+    cursor.execute("""
+        INSERT INTO stats_counters (name, value)
+        SELECT 'users', COUNT(*) FROM users
+        UNION ALL SELECT 'rooms', COUNT(*) FROM rooms
+        UNION ALL SELECT 'timetable', COUNT(*) FROM timetable
+    """)
+    for status in ("PENDING", "APPROVED", "REJECTED"):
+        cursor.execute("""
+            INSERT INTO stats_counters (name, value)
+            SELECT ?, COUNT(*) FROM reservations WHERE status = ?
+        """, (f"reservations:{status}", status))
+
+    cursor.execute("INSERT INTO room_stats (room_id) SELECT id FROM rooms")
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_users_timestamp 
-        AFTER UPDATE ON users
+        INSERT INTO room_stats (room_id, slot_count, hour_count)
+        SELECT room_id, COUNT(*), SUM(duration) FROM timetable WHERE true GROUP BY room_id
+        ON CONFLICT(room_id) DO UPDATE SET
+            slot_count = excluded.slot_count,
+            hour_count = excluded.hour_count
+    """)
+
+def _migration_occupancy_stats(cursor):
+    """
+    Statistiques matérialisées : compteurs globaux et occupation par salle,
+    tenus à jour par triggers.
+    """
+    # Compteurs globaux : users, rooms, timetable, reservations:<STATUT>
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    # Nombre de créneaux et d'heures de cours par salle
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS room_stats (
+            room_id INTEGER PRIMARY KEY,
+            slot_count INTEGER NOT NULL DEFAULT 0,
+            hour_count INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+
+    # --- Triggers : emploi du temps ---
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_timetable_insert
+        AFTER INSERT ON timetable
         FOR EACH ROW
         BEGIN
-            UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'timetable';
+            {_timetable_stats_sql("NEW", "+")}
         END;
     """)
-
-    cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_instructors_timestamp 
-        AFTER UPDATE ON instructors
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_timetable_delete
+        AFTER DELETE ON timetable
         FOR EACH ROW
         BEGIN
-            UPDATE instructors SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'timetable';
+            {_timetable_stats_sql("OLD", "-")}
         END;
     """)
-
-    cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_rooms_timestamp 
-        AFTER UPDATE ON rooms
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_timetable_update
+        AFTER UPDATE OF room_id, duration ON timetable
         FOR EACH ROW
         BEGIN
-            UPDATE rooms SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            {_timetable_stats_sql("OLD", "-")}
+            {_timetable_stats_sql("NEW", "+")}
         END;
     """)
 
+    # --- Triggers : salles, utilisateurs, réservations ---
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_subjects_timestamp 
-        AFTER UPDATE ON subjects
+        CREATE TRIGGER IF NOT EXISTS stats_rooms_insert
+        AFTER INSERT ON rooms
         FOR EACH ROW
         BEGIN
-            UPDATE subjects SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'rooms';
+            INSERT OR IGNORE INTO room_stats (room_id) VALUES (NEW.id);
         END;
     """)
-
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_groups_timestamp 
-        AFTER UPDATE ON groups
+        CREATE TRIGGER IF NOT EXISTS stats_rooms_delete
+        AFTER DELETE ON rooms
         FOR EACH ROW
         BEGIN
-            UPDATE groups SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'rooms';
+            DELETE FROM room_stats WHERE room_id = OLD.id;
         END;
     """)
-
+    for operation, sign in (("INSERT", "+"), ("DELETE", "-")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_users_{operation.lower()}
+            AFTER {operation} ON users
+            FOR EACH ROW
+            BEGIN
+                UPDATE stats_counters SET value = value {sign} 1 WHERE name = 'users';
+            END;
+        """)
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_timetable_timestamp 
-        AFTER UPDATE ON timetable
+        CREATE TRIGGER IF NOT EXISTS stats_reservations_insert
+        AFTER INSERT ON reservations
         FOR EACH ROW
         BEGIN
-            UPDATE timetable SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'reservations:' || NEW.status;
         END;
     """)
-
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_teacher_unavailability_timestamp 
-        AFTER UPDATE ON teacher_unavailability
+        CREATE TRIGGER IF NOT EXISTS stats_reservations_delete
+        AFTER DELETE ON reservations
         FOR EACH ROW
         BEGIN
-            UPDATE teacher_unavailability SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'reservations:' || OLD.status;
         END;
     """)
-
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_reservations_timestamp 
-        AFTER UPDATE ON reservations
+        CREATE TRIGGER IF NOT EXISTS stats_reservations_status
+        AFTER UPDATE OF status ON reservations
         FOR EACH ROW
+        WHEN OLD.status IS NOT NEW.status
         BEGIN
-            UPDATE reservations SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'reservations:' || OLD.status;
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'reservations:' || NEW.status;
         END;
     """)
 
+    rebuild_stats(cursor)
 
-    # ------------------ ADMIN PAR DÉFAUT ------------------
-    cursor.execute("SELECT count(*) FROM users WHERE role='admin'")
-    if cursor.fetchone()[0] == 0:
-        print("Création de l'administrateur par défaut...")
-        password_hash = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
-        cursor.execute("""
-            INSERT INTO users (username, password, role, full_name)
-            VALUES (?, ?, ?, ?)
-        """, ("admin", password_hash, "admin", "Administrateur Système"))
+def _migration_reservation_conflict_indexes(cursor):
+    """Index des réservations par salle, groupe et enseignant (détection de conflits)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservations_room_day ON reservations(room_id, day, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservations_group_day ON reservations(group_id, day, start_hour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservations_instructor_day ON reservations(instructor_id, day, start_hour)")
+
+def _migration_timetable_day_index(cursor):
+    """Index (jour, heure) de l'emploi du temps : pagination de la liste complète."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timetable_day_hour ON timetable(day, start_hour)")
+
+def _change_log_key_sql(table, row):
+    """Expression JSON des colonnes clés d'une ligne (OLD ou NEW) pour change_log."""
+    columns = ("id",) + CHANGE_LOG_KEYS[table]
+    return "json_object(" + ", ".join(f"'{column}', {row}.{column}" for column in columns) + ")"
+
+def _migration_change_log(cursor):
+    """
+    Journal append-only des modifications (change_log), alimenté par triggers.
+
+    Chaque INSERT / UPDATE / DELETE sur une table de CHANGE_LOG_KEYS ajoute
+    une ligne : opération, table, id de la ligne et colonnes clés avant /
+    après (JSON), avec un numéro de séquence strictement croissant.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL CHECK (op IN ('INSERT', 'UPDATE', 'DELETE')),
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            old_key TEXT,
+            new_key TEXT,
+            changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log(table_name, seq)")
+
+    for table, keys in CHANGE_LOG_KEYS.items():
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS log_{table}_insert
+            AFTER INSERT ON {table}
+            FOR EACH ROW
+            BEGIN
+                INSERT INTO change_log (op, table_name, row_id, new_key)
+                VALUES ('INSERT', '{table}', NEW.id, {_change_log_key_sql(table, "NEW")});
+            END;
+        """)
+        # Seules les colonnes clés déclenchent le journal (pas updated_at, approved_at...)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS log_{table}_update
+            AFTER UPDATE OF id, {", ".join(keys)} ON {table}
+            FOR EACH ROW
+            BEGIN
+                INSERT INTO change_log (op, table_name, row_id, old_key, new_key)
+                VALUES ('UPDATE', '{table}', NEW.id,
+                        {_change_log_key_sql(table, "OLD")}, {_change_log_key_sql(table, "NEW")});
+            END;
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS log_{table}_delete
+            AFTER DELETE ON {table}
+            FOR EACH ROW
+            BEGIN
+                INSERT INTO change_log (op, table_name, row_id, old_key)
+                VALUES ('DELETE', '{table}', OLD.id, {_change_log_key_sql(table, "OLD")});
+            END;
+        """)
+
+# Liste ordonnée des migrations : (version, fonction)
+MIGRATIONS = [
+    (1, _migration_timestamp_triggers),
+    (2, _migration_data_version),
+    (3, _migration_lookup_indexes),
+    (4, _migration_occupancy_stats),
+    (5, _migration_reservation_conflict_indexes),
+    (6, _migration_timetable_day_index),
+    (7, _migration_change_log),
+]
+
+def get_schema_version(conn):
+    """Retourne la dernière migration appliquée (PRAGMA user_version)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """
+    Applique les migrations en attente dans une seule transaction.
+
+    En cas d'erreur, rien n'est appliqué et user_version reste inchangé.
+
+    Returns:
+        int: Version du schéma après migration
+    """
+    current = get_schema_version(conn)
+    pending = [(version, step) for version, step in MIGRATIONS if version > current]
+    if not pending:
+        return current
+
+    conn.commit()  # Terminer une éventuelle transaction implicite
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for version, step in pending:
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
         conn.commit()
-    
-    conn.close()
-    print("Base de données initialisée avec succès (avec timestamps).")
+    except Exception:
+        conn.rollback()
+        raise
 
-def getConnection():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row 
-    return conn
+    print(f"Schéma migré de la version {current} à la version {pending[-1][0]}.")
+    return pending[-1][0]
 
 # --- 2. FONCTIONS UTILITAIRES DE RÉCUPÉRATION D'ID ---
 
@@ -302,6 +590,7 @@ def get_id_by_name(table, name_col, name_value):
 def insert_user_with_id(user_id, username, password, role, full_name=None):
     conn = getConnection()
     cursor = conn.cursor()
+    import bcrypt  # Chargé seulement quand un mot de passe doit être haché
     password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
     try:
         cursor.execute("""
@@ -612,63 +901,25 @@ def populate_student_groups():
 # --- FONCTION CRITIQUE : VÉRIFICATION DE CONFLIT D'HORAIRE ---
 
 def check_conflict(instructor_id, group_id, room_id, day, start_hour, duration):
-    conn = getConnection()
-    cursor = conn.cursor()
-    end_hour = start_hour + duration
-    
+    # Les vérifications sont faites sur l'index d'occupation en mémoire
+    # (chargé une seule fois depuis timetable / reservations / teacher_unavailability)
+    index = occupancy.get_index()
+
     # 1. Vérification des conflits dans la table 'timetable'
-    # Conflit si un enregistrement existant chevauche la nouvelle plage [start_hour, end_hour]
-    # (Existing_Start < New_End) AND (New_Start < Existing_End)
-    
-    query = """
-    SELECT 
-        'Enseignant' AS type, instructor_id AS entity_id 
-    FROM timetable 
-    WHERE day = ? AND instructor_id = ? 
-    AND (start_hour < ?) AND (? < start_hour + duration)
-    UNION ALL
-    SELECT 
-        'Groupe', group_id
-    FROM timetable 
-    WHERE day = ? AND group_id = ?
-    AND (start_hour < ?) AND (? < start_hour + duration)
-    UNION ALL
-    SELECT 
-        'Salle', room_id
-    FROM timetable 
-    WHERE day = ? AND room_id = ?
-    AND (start_hour < ?) AND (? < start_hour + duration);
-    """
-    
-    params = [
-        day, instructor_id, end_hour, start_hour,
-        day, group_id, end_hour, start_hour,
-        day, room_id, end_hour, start_hour
+    # Conflit si un créneau existant chevauche la nouvelle plage [start_hour, end_hour[
+    checks = [
+        ('Enseignant', occupancy.INSTRUCTOR, instructor_id),
+        ('Groupe', occupancy.GROUP, group_id),
+        ('Salle', occupancy.ROOM, room_id),
     ]
-    
-    cursor.execute(query, params)
-    conflict = cursor.fetchone()
-    
-    if conflict:
-        conn.close()
-        return f"Conflit d'horaire existant pour l'entité : {conflict['type']} (ID: {conflict['entity_id']})."
+    for label, dimension, entity_id in checks:
+        if not index.is_free(dimension, entity_id, day, start_hour, duration,
+                             sources=(occupancy.SOURCE_TIMETABLE,)):
+            return f"Conflit d'horaire existant pour l'entité : {label} (ID: {entity_id})."
 
     # 2. Vérification des indisponibilités de l'enseignant (teacher_unavailability)
-    unavail_query = """
-    SELECT 
-        id
-    FROM teacher_unavailability 
-    WHERE instructor_id = ? AND day = ? 
-    AND (start_hour < ?) AND (? < start_hour + duration);
-    """
-    unavail_params = [instructor_id, day, end_hour, start_hour]
-    
-    cursor.execute(unavail_query, unavail_params)
-    unavailability = cursor.fetchone()
-    
-    conn.close()
-    
-    if unavailability:
+    if not index.is_free(occupancy.INSTRUCTOR, instructor_id, day, start_hour, duration,
+                         sources=(occupancy.SOURCE_UNAVAILABILITY,)):
         return "L'enseignant est marqué comme indisponible sur cette plage horaire."
         
     return None # Aucun conflit détecté
@@ -676,23 +927,27 @@ def check_conflict(instructor_id, group_id, room_id, day, start_hour, duration):
 # --- TIMETABLE (EMPLOI DU TEMPS) ---
 
 def insert_schedule_slot(course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by=None):
-    # D'abord, vérifier les conflits avant l'insertion
-    conflict_message = check_conflict(instructor_id, group_id, room_id, day, start_hour, duration)
-    
-    if conflict_message:
-        print(f"Échec de l'insertion : {conflict_message}")
-        return False
-        
     conn = getConnection()
     cursor = conn.cursor()
     try:
+        # Verrou d'écriture pris avant la vérification : aucun autre processus
+        # ne peut insérer un créneau entre le contrôle et l'INSERT
+        cursor.execute("BEGIN IMMEDIATE")
+        conflict_message = check_conflict(instructor_id, group_id, room_id, day, start_hour, duration)
+        if conflict_message:
+            conn.rollback()
+            print(f"Échec de l'insertion : {conflict_message}")
+            return False
+
         cursor.execute("""
             INSERT INTO timetable (course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (course_id, instructor_id, group_id, room_id, day, start_hour, duration, created_by))
         conn.commit()
+        occupancy.add_slot(conn, cursor.lastrowid, instructor_id, group_id, room_id, day, start_hour, duration)
         return True
     except sqlite3.IntegrityError as e:
+        conn.rollback()
         print(f"Erreur d'intégrité lors de l'insertion d'un créneau: {e}")
         return False
     finally:
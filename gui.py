@@ -1,14 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import bcrypt
 import sqlite3
 from datetime import datetime
-from database import getConnection, DAYS
-
-# Import controllers (Corrected paths)
-from controllers.admin_controller import AdminController
-from controllers.teacher_controller import TeacherController
-from controllers.student_controller import StudentController
+from database import getConnection, setup, DAYS
+import analytics
+import occupancy
+import pagination
+import refdata
+from jobs import BackgroundJob
+import queries
+import versioning
+import weekgrid
+
+# Les contrôleurs sont importés par chaque tableau de bord, à la connexion :
+# la fenêtre de connexion ne charge ni l'export ni la génération
 
 # Color Palette
 BG_COLOR = "#f0f2f5"
@@ -19,6 +24,9 @@ WHITE = "#ffffff"
 ERROR_COLOR = "#e74c3c"
 SUCCESS_COLOR = "#2ecc71"
 
+# Intervalle de scrutation de data_version (ms)
+DATA_POLL_MS = 1000
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -62,8 +70,20 @@ class App(tk.Tk):
         self.current_user = None
         self.current_frame = None
         
+        # Invalidation des caches quand les données changent (y compris depuis un autre poste)
+        self.watcher = versioning.get_watcher()
+        refdata.get_cache().watch(self.watcher)
+        self.poll_data_version()
+        
         self.show_login()
 
+    def poll_data_version(self):
+        try:
+            self.watcher.poll()
+        except sqlite3.Error as e:
+            print(f"Lecture de data_version impossible : {e}")
+        self.after(DATA_POLL_MS, self.poll_data_version)
+
     def switch_frame(self, frame_class, *args, **kwargs):
         if self.current_frame:
             self.current_frame.destroy()
@@ -88,6 +108,9 @@ class App(tk.Tk):
 
 # --- HELPER FUNCTIONS FOR DB DROPDOWNS ---
 def get_all(table, columns="id, name"):
+    # Matières, enseignants, groupes, salles : servis par le cache de référence
+    if table in refdata.REFERENCE_TABLES:
+        return refdata.get_cache().select(table, columns)
     conn = getConnection()
     cursor = conn.cursor()
     cursor.execute(f"SELECT {columns} FROM {table}")
@@ -95,8 +118,11 @@ def get_all(table, columns="id, name"):
     conn.close()
     return rows
 
+# Les jours ne changent pas : la liste est construite une seule fois
+DAYS_COMBO = [(k, v) for k, v in DAYS.items()]
+
 def get_days_combo():
-    return [(k, v) for k, v in DAYS.items()]
+    return DAYS_COMBO
 
 # --- LOGIN ---
 class LoginFrame(tk.Frame):
@@ -135,6 +161,7 @@ class LoginFrame(tk.Frame):
         conn.close()
         
         if user_data:
+            import bcrypt  # Chargé à la première connexion : la fenêtre s'ouvre plus vite
             try:
                 if bcrypt.checkpw(password.encode('utf-8'), user_data['password']):
                     user = {
@@ -150,6 +177,89 @@ class LoginFrame(tk.Frame):
         
         messagebox.showerror("Erreur", "Identifiants incorrects")
 
+# --- WEEKLY GRID WIDGET ---
+# Couleur des blocs selon le type de séance
+SLOT_COLORS = {"CM": "#d6eaf8", "TD": "#d5f5e3", "TP": "#fdebd0"}
+SLOT_DEFAULT_COLOR = "#ebdef0"
+
+# Lignes affichées dans un bloc selon la vue (la 1re est la matière)
+GRID_VIEWS = [
+    ("group", "Groupe", "groups", ("subject", "room", "instructor")),
+    ("instructor", "Enseignant", "instructors", ("subject", "group_name", "room")),
+    ("room", "Salle", "rooms", ("subject", "group_name", "instructor")),
+]
+
+class WeekGrid(tk.Canvas):
+    """Grille hebdomadaire (jours × heures) ; chaque cours est un bloc de la hauteur de sa durée"""
+    HEADER_HEIGHT = 30
+    HOURS_WIDTH = 50
+
+    def __init__(self, parent, lines=("subject", "room", "instructor"), **kwargs):
+        super().__init__(parent, bg=WHITE, highlightthickness=0, **kwargs)
+        self.lines = lines
+        self.slots = {}
+        self.days = sorted(DAYS)
+        self.bind("<Configure>", lambda e: self.redraw())
+
+    def _cell_size(self):
+        width = max(self.winfo_width(), 300)
+        height = max(self.winfo_height(), 200)
+        col_w = (width - self.HOURS_WIDTH) / len(self.days)
+        row_h = (height - self.HEADER_HEIGHT) / (occupancy.DAY_END - occupancy.DAY_START)
+        return col_w, row_h
+
+    def _draw_background(self):
+        col_w, row_h = self._cell_size()
+        width = self.HOURS_WIDTH + col_w * len(self.days)
+        for i, day in enumerate(self.days):
+            x = self.HOURS_WIDTH + i * col_w
+            self.create_text(x + col_w / 2, self.HEADER_HEIGHT / 2, text=DAYS[day],
+                             font=("Segoe UI", 10, "bold"), fill=TEXT_COLOR, tags="grid")
+            self.create_line(x, 0, x, self.HEADER_HEIGHT + row_h * (occupancy.DAY_END - occupancy.DAY_START),
+                             fill="#dfe6e9", tags="grid")
+        for hour in range(occupancy.DAY_START, occupancy.DAY_END + 1):
+            y = self.HEADER_HEIGHT + (hour - occupancy.DAY_START) * row_h
+            self.create_line(0, y, width, y, fill="#dfe6e9", tags="grid")
+            if hour < occupancy.DAY_END:
+                self.create_text(self.HOURS_WIDTH / 2, y + 10, text=f"{hour}h",
+                                 font=("Segoe UI", 9), fill="#7f8c8d", tags="grid")
+
+    def _draw_slot(self, slot):
+        if slot['day'] not in self.days:
+            return
+        col_w, row_h = self._cell_size()
+        x = self.HOURS_WIDTH + self.days.index(slot['day']) * col_w
+        y = self.HEADER_HEIGHT + (slot['start_hour'] - occupancy.DAY_START) * row_h
+        tag = f"slot{slot['id']}"
+        color = next((c for t, c in SLOT_COLORS.items() if t in (slot['subject_type'] or "")), SLOT_DEFAULT_COLOR)
+        self.create_rectangle(x + 2, y + 2, x + col_w - 2, y + slot['duration'] * row_h - 2,
+                              fill=color, outline="#95a5a6", tags=("slot", tag))
+        text = "\n".join(str(slot[field]) for field in self.lines)
+        self.create_text(x + 6, y + 5, text=text, anchor="nw", width=col_w - 12,
+                         font=("Segoe UI", 9), fill=TEXT_COLOR, tags=("slot", tag))
+
+    def redraw(self):
+        """Redessine toute la grille (changement de taille ou de vue)"""
+        self.delete("all")
+        self._draw_background()
+        for slot in self.slots.values():
+            self._draw_slot(slot)
+
+    def set_slots(self, slots, lines=None):
+        """Affiche une vue ; seuls les cours ajoutés, modifiés ou supprimés sont redessinés"""
+        if lines is not None and lines != self.lines:
+            self.lines = lines
+            self.slots = dict(slots)
+            self.redraw()
+            return
+        changed, removed = weekgrid.diff_slots(self.slots, slots)
+        for slot_id in removed:
+            self.delete(f"slot{slot_id}")
+        for slot in changed:
+            self.delete(f"slot{slot['id']}")
+            self._draw_slot(slot)
+        self.slots = dict(slots)
+
 # --- BASE DASHBOARD ---
 class DashboardFrame(tk.Frame):
     def __init__(self, master, title, role_color="#2c3e50"):
@@ -208,11 +318,65 @@ class DashboardFrame(tk.Frame):
         for widget in self.content_area.winfo_children():
             widget.destroy()
 
+    def show_week_grid(self, kind, entity_id):
+        """Grille hebdomadaire d'un groupe, enseignant ou salle, avec choix de la vue"""
+        store = weekgrid.get_store()
+        views = {k: (label, table, lines) for k, label, table, lines in GRID_VIEWS}
+        state = {"kind": kind, "id": entity_id}
+        
+        bar = tk.Frame(self.content_area, bg=BG_COLOR)
+        bar.pack(fill="x", pady=(0, 10))
+        tk.Label(bar, text="Vue :", bg=BG_COLOR).pack(side="left")
+        cb_kind = ttk.Combobox(bar, values=[v[1] for v in GRID_VIEWS], state="readonly", width=12)
+        cb_kind.pack(side="left", padx=5)
+        cb_entity = ttk.Combobox(bar, state="readonly", width=30)
+        cb_entity.pack(side="left", padx=5)
+        
+        grid = WeekGrid(self.content_area, lines=views[kind][2])
+        grid.pack(fill="both", expand=True)
+        
+        def refresh(*_):
+            # Vue en cache : pas de requête tant que l'emploi du temps n'a pas changé
+            if grid.winfo_exists() and state["id"] is not None:
+                grid.set_slots(store.view(state["kind"], state["id"]), lines=views[state["kind"]][2])
+        
+        def fill_entities():
+            entities = get_all(views[state["kind"]][1], "id, name")
+            cb_entity.configure(values=[e[1] for e in entities])
+            ids = [e[0] for e in entities]
+            if state["id"] in ids:
+                cb_entity.current(ids.index(state["id"]))
+            return entities
+        
+        def on_kind(event=None):
+            state["kind"] = GRID_VIEWS[cb_kind.current()][0]
+            state["id"] = None
+            state["entities"] = fill_entities()
+            cb_entity.set("")
+            grid.set_slots({}, lines=views[state["kind"]][2])
+        
+        def on_entity(event=None):
+            state["id"] = state["entities"][cb_entity.current()][0]
+            refresh()
+        
+        cb_kind.current([v[0] for v in GRID_VIEWS].index(kind))
+        state["entities"] = fill_entities()
+        cb_kind.bind("<<ComboboxSelected>>", on_kind)
+        cb_entity.bind("<<ComboboxSelected>>", on_entity)
+        
+        # Mise à jour automatique quand l'emploi du temps change (scrutation de data_version)
+        token = self.master.watcher.subscribe(refresh, weekgrid.GRID_TABLES)
+        grid.bind("<Destroy>", lambda e: self.master.watcher.unsubscribe(token))
+        refresh()
+
 # --- ADMIN DASHBOARD ---
 class AdminDashboard(DashboardFrame):
     def __init__(self, master):
         super().__init__(master, "Tableau de bord Administrateur", role_color="#2c3e50")
+        from controllers.admin_controller import AdminController
         self.controller = AdminController(self.master.current_user['id'])
+        # Tâches longues en cours ("generation", "export")
+        self.jobs = {}
         self.setup_menu()
         self.show_stats()
 
@@ -231,11 +395,9 @@ class AdminDashboard(DashboardFrame):
         stats_frame.pack(fill="x")
         
         # Fetch stats directly for dashboard display
-        conn = getConnection()
-        nb_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
-        nb_creneaux = conn.execute("SELECT COUNT(*) FROM timetable").fetchone()[0]
-        nb_pending = conn.execute("SELECT COUNT(*) FROM reservations WHERE status='PENDING'").fetchone()[0]
-        conn.close()
+        nb_users = queries.scalar("count_users")
+        nb_creneaux = queries.scalar("count_timetable")
+        nb_pending = queries.scalar("count_reservations_by_status", ("PENDING",))
 
         self.create_stat_card(stats_frame, "Utilisateurs", str(nb_users), 0, click_action=self.show_users_list)
         self.create_stat_card(stats_frame, "Cours Planifiés", str(nb_creneaux), 1, click_action=self.show_full_schedule)
@@ -243,6 +405,28 @@ class AdminDashboard(DashboardFrame):
                               color=ERROR_COLOR if nb_pending > 0 else ACCENT_COLOR, 
                               click_action=self.show_validations)
 
+        # Occupation réelle des salles (heures occupées, remplissage, surcharges)
+        cube = analytics.get_cube()
+        summary = cube.summary()
+        overloaded = cube.overloaded_slots()
+        self.create_stat_card(stats_frame, "Occupation des salles", f"{summary['utilisation']:.0%}", 3)
+
+        details = tk.Frame(self.content_area, bg=WHITE, padx=20, pady=15)
+        details.pack(fill="x", pady=(20, 0))
+        tk.Label(details, text=f"Remplissage moyen des places : {summary['seat_fill']:.0%}",
+                 bg=WHITE, font=("Segoe UI", 11)).pack(anchor="w")
+        hotspots = ", ".join(f"{DAYS.get(day, day)} {hour}h ({rate:.0%})"
+                             for (day, hour), rate in cube.hotspots(3))
+        tk.Label(details, text=f"Heures les plus chargées : {hotspots}",
+                 bg=WHITE, font=("Segoe UI", 11)).pack(anchor="w", pady=(5, 0))
+        tk.Label(details, text=f"Créneaux surchargés : {len(overloaded)}", bg=WHITE,
+                 fg=ERROR_COLOR if overloaded else TEXT_COLOR,
+                 font=("Segoe UI", 11, "bold")).pack(anchor="w", pady=(5, 0))
+        for slot in overloaded[:5]:
+            tk.Label(details, bg=WHITE, fg=ERROR_COLOR, font=("Segoe UI", 10),
+                     text=f"• {DAYS.get(slot['day'], slot['day'])} {slot['hour']}h, {slot['room']} : {slot['reason']} "
+                          f"({slot['students']} étudiants / {slot['capacity']} places)").pack(anchor="w")
+
     def create_stat_card(self, parent, title, value, col, color=ACCENT_COLOR, click_action=None):
         card = tk.Frame(parent, bg=WHITE, padx=20, pady=20, cursor="hand2")
         card.grid(row=0, column=col, padx=(0, 20), sticky="nsew")
@@ -277,26 +461,82 @@ class AdminDashboard(DashboardFrame):
         self.clear_content()
         tk.Label(self.content_area, text="Liste Complète des Cours", font=("Segoe UI", 18, "bold")).pack(anchor="w", pady=(0, 20))
         
-        cols = ("Jour", "H", "Durée", "Matière", "Enseignant", "Groupe", "Salle")
-        tree = ttk.Treeview(self.content_area, columns=cols, show="headings")
-        for c in cols: tree.heading(c, text=c)
+        # Filtres (appliqués par SQLite)
+        f_filter = tk.Frame(self.content_area, bg=BG_COLOR)
+        f_filter.pack(fill="x", pady=(0, 10))
+        tk.Label(f_filter, text="Rechercher :", bg=BG_COLOR).pack(side="left")
+        e_search = ttk.Entry(f_filter, width=30)
+        e_search.pack(side="left", padx=(5, 15))
+        tk.Label(f_filter, text="Jour :", bg=BG_COLOR).pack(side="left")
+        day_choices = [(None, "Tous")] + get_days_combo()
+        cb_day = ttk.Combobox(f_filter, values=[d[1] for d in day_choices], state="readonly", width=12)
+        cb_day.current(0)
+        cb_day.pack(side="left", padx=5)
+        lbl_count = tk.Label(f_filter, text="", bg=BG_COLOR, fg="#7f8c8d")
+        lbl_count.pack(side="right")
+        
+        # Colonne affichée -> colonne de tri (pagination.SORT_COLUMNS)
+        columns = [("Jour", "day"), ("H", "hour"), ("Durée", "duration"), ("Matière", "subject"),
+                   ("Enseignant", "instructor"), ("Groupe", "group"), ("Salle", "room")]
+        cols = tuple(label for label, _ in columns)
+        f_tree = tk.Frame(self.content_area, bg=BG_COLOR)
+        f_tree.pack(fill="both", expand=True)
+        tree = ttk.Treeview(f_tree, columns=cols, show="headings")
+        scrollbar = ttk.Scrollbar(f_tree, orient="vertical", command=tree.yview)
         tree.column("H", width=50); tree.column("Durée", width=50)
-        tree.pack(fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+        
+        state = {"sort": "day", "descending": False, "pager": None, "pending": False}
+        
+        def load_more():
+            """Ajoute la page suivante à la fin de la liste"""
+            state["pending"] = False
+            pager = state["pager"]
+            for r in pager.next_page():
+                tree.insert("", "end", values=(DAYS.get(r['day'], r['day']), r['start_hour'], r['duration'],
+                                               r['subject'], r['instructor'], r['group_name'], r['room']))
+            shown = len(tree.get_children())
+            lbl_count.config(text=f"{shown} cours affichés" + ("" if pager.exhausted else " (défiler pour la suite)"))
+        
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # Près du bas de la liste : on charge la page suivante
+            pager = state["pager"]
+            if float(last) > 0.9 and pager is not None and not pager.exhausted and not state["pending"]:
+                state["pending"] = True
+                tree.after_idle(load_more)
+        
+        tree.configure(yscrollcommand=on_scroll)
+        
+        def reload():
+            """Repart de la première page avec le tri et les filtres courants"""
+            for label, key in columns:
+                arrow = ""
+                if key == state["sort"]:
+                    arrow = " ▼" if state["descending"] else " ▲"
+                tree.heading(label, text=label + arrow)
+            tree.delete(*tree.get_children())
+            state["pager"] = pagination.SchedulePager(
+                sort=state["sort"], descending=state["descending"],
+                search=e_search.get(), day=day_choices[cb_day.current()][0]
+            )
+            load_more()
         
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT t.day, t.start_hour, t.duration, s.name, i.name, g.name, r.name
-            FROM timetable t
-            JOIN subjects s ON t.course_id = s.id
-            JOIN instructors i ON t.instructor_id = i.id
-            JOIN groups g ON t.group_id = g.id
-            JOIN rooms r ON t.room_id = r.id
-            ORDER BY t.day, t.start_hour
-        """)
-        for r in cursor.fetchall():
-              tree.insert("", "end", values=(DAYS.get(r[0], r[0]), r[1], r[2], r[3], r[4], r[5], r[6]))
-        conn.close()
+        def sort_by(key):
+            if state["sort"] == key:
+                state["descending"] = not state["descending"]
+            else:
+                state["sort"], state["descending"] = key, False
+            reload()
+        
+        for label, key in columns:
+            tree.heading(label, text=label, command=lambda k=key: sort_by(k))
+        
+        e_search.bind("<Return>", lambda e: reload())
+        cb_day.bind("<<ComboboxSelected>>", lambda e: reload())
+        ttk.Button(f_filter, text="Filtrer", command=reload).pack(side="left", padx=10)
+        reload()
         
         ttk.Button(self.content_area, text="Retour", command=self.show_stats).pack(pady=20)
 
@@ -388,10 +628,14 @@ class AdminDashboard(DashboardFrame):
         def run_full_gen():
             confirm = messagebox.askyesno("Confirmation", "Cela va effacer tout l'emploi du temps actuel et en générer un nouveau. Continuer ?")
             if confirm:
-                # Afficher un message de chargement (simple print pour l'instant car GUI bloquant)
-                self.master.update()
-                msg = self.controller.generer_planning_complet()
-                messagebox.showinfo("Résultat Génération", msg)
+                # Génération dans un thread : la fenêtre reste utilisable
+                self.run_background(
+                    "generation", f_gen,
+                    lambda job: self.controller.generer_planning_complet(
+                        progress=job.report, should_stop=job.is_cancelled),
+                    lambda gen, total, fitness: f"Génération {gen}/{total} — meilleur score {fitness:.1%}",
+                    lambda msg: messagebox.showinfo("Résultat Génération", msg)
+                )
         
         ttk.Button(f_gen, text="Lancer la Génération Globale", command=run_full_gen).pack(pady=10)
 
@@ -451,43 +695,41 @@ class AdminDashboard(DashboardFrame):
         tk.Label(self.content_area, text="Réservations en attente", font=("Segoe UI", 18, "bold")).pack(anchor="w", pady=(0, 20))
         
         cols = ("ID", "Enseignant", "Jour", "Heure", "Raison")
-        tree = ttk.Treeview(self.content_area, columns=cols, show="headings", height=10)
+        tree = ttk.Treeview(self.content_area, columns=cols, show="headings", height=10, selectmode="extended")
         for c in cols: tree.heading(c, text=c)
         tree.column("ID", width=50)
         tree.pack(fill="both", expand=True)
         
         # Load pending
-        conn = getConnection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT r.id, u.full_name, r.day, r.start_hour, r.reason 
-            FROM reservations r
-            JOIN instructors i ON r.instructor_id = i.id
-            JOIN users u ON i.user_id = u.id
-            WHERE r.status = 'PENDING'
-        """)
-        rows = cursor.fetchall()
-        conn.close()
+        rows = queries.fetchall("pending_reservations")
         
         for r in rows:
-            tree.insert("", "end", values=(r[0], r[1], DAYS.get(r[2], r[2]), f"{r[3]}h", r[4]))
+            tree.insert("", "end", values=(r['id'], r['enseignant'], DAYS.get(r['day'], r['day']), f"{r['start_hour']}h", r['reason']))
             
         def action(is_approve):
             sel = tree.selection()
             if not sel: 
-                messagebox.showwarning("Sélection requise", "Veuillez sélectionner une réservation dans la liste.")
+                messagebox.showwarning("Sélection requise", "Veuillez sélectionner une ou plusieurs réservations dans la liste.")
                 return
             
             try:
-                item = tree.item(sel[0])
-                rid = int(item['values'][0]) # Ensure int conversion
+                ids = [int(tree.item(item)['values'][0]) for item in sel] # Ensure int conversion
                 
                 if is_approve:
-                    self.controller.valider_reservation(rid)
-                    messagebox.showinfo("Succès", f"Réservation #{rid} validée avec succès.")
+                    # Validation groupée : les conflits sont re-vérifiés en une transaction
+                    result = self.controller.valider_reservations(ids)
+                    lines = [result["message"]]
+                    for rid, reasons in result["rejected"].items():
+                        lines.append(f"\n#{rid} :")
+                        lines.extend(f"  - {reason}" for reason in reasons)
+                    if result["rejected"]:
+                        messagebox.showwarning("Validation partielle", "\n".join(lines))
+                    else:
+                        messagebox.showinfo("Succès", "\n".join(lines))
                 else:
-                    self.controller.rejeter_reservation(rid)
-                    messagebox.showinfo("Succès", f"Réservation #{rid} rejetée.")
+                    for rid in ids:
+                        self.controller.rejeter_reservation(rid)
+                    messagebox.showinfo("Succès", f"{len(ids)} réservation(s) rejetée(s).")
                 
                 # Refresh list
                 self.show_validations()
@@ -572,6 +814,34 @@ class AdminDashboard(DashboardFrame):
         )
         btn_planning_image.pack(pady=10, padx=40, fill="x")
 
+        # --- BOUTON 4: TOUTES LES FILIÈRES ---
+        btn_planning_all = tk.Button(
+            export_frame,
+            text="🗂️ Exporter toutes les filières (PDF + Excel + PNG)",
+            bg="#34495e",
+            fg=WHITE,
+            font=("Arial", 10, "bold"),
+            relief="flat",
+            cursor="hand2",
+            height=2,
+            command=self.export_all_filieres
+        )
+        btn_planning_all.pack(pady=10, padx=40, fill="x")
+
+        # --- BOUTON 5: INSTANTANÉ DES CLIENTS ---
+        btn_snapshot = tk.Button(
+            export_frame,
+            text="📡 Publier l'emploi du temps (instantané étudiants / enseignants)",
+            bg="#16a085",
+            fg=WHITE,
+            font=("Arial", 10, "bold"),
+            relief="flat",
+            cursor="hand2",
+            height=2,
+            command=self.publish_snapshot
+        )
+        btn_snapshot.pack(pady=10, padx=40, fill="x")
+
         # Séparateur
         ttk.Separator(export_frame, orient='horizontal').pack(fill='x', pady=20, padx=20)
         
@@ -582,7 +852,7 @@ class AdminDashboard(DashboardFrame):
             font=("Arial", 11, "bold")
         ).pack(pady=(0, 10), padx=20, anchor="w")
 
-        # --- BOUTON 4: STATISTIQUES PDF ---
+        # --- BOUTON 6: STATISTIQUES PDF ---
         btn_pdf = tk.Button(
             export_frame,
             text="📄 Exporter Statistiques en PDF",
@@ -596,7 +866,7 @@ class AdminDashboard(DashboardFrame):
         )
         btn_pdf.pack(pady=10, padx=40, fill="x")
 
-        # --- BOUTON 5: STATISTIQUES EXCEL ---
+        # --- BOUTON 7: STATISTIQUES EXCEL ---
         btn_excel = tk.Button(
             export_frame,
             text="📊 Exporter Statistiques en Excel",
@@ -610,6 +880,14 @@ class AdminDashboard(DashboardFrame):
         )
         btn_excel.pack(pady=10, padx=40, fill="x")
 
+    def publish_snapshot(self):
+        """Publie l'instantané lu par les clients étudiants et enseignants"""
+        result = self.controller.publier_instantane()
+        if result["success"]:
+            messagebox.showinfo("Succès", result["message"])
+        else:
+            messagebox.showerror("Erreur", result["message"])
+
     def prompt_filiere_export(self):
         """Affiche une boîte de dialogue pour exporter en PDF"""
         from tkinter import simpledialog
@@ -646,10 +924,82 @@ class AdminDashboard(DashboardFrame):
             except Exception as e:
                 messagebox.showerror("Erreur", f"Erreur lors de l'exportation : {str(e)}")
 
+    def export_all_filieres(self):
+        """Exporte toutes les filières dans tous les formats (un dossier + manifeste)"""
+        if not messagebox.askyesno("Export groupé", "Générer les plannings PDF, Excel et PNG de toutes les filières ?"):
+            return
+
+        def on_done(result):
+            if result["success"]:
+                messagebox.showinfo("Succès", result["message"])
+            else:
+                messagebox.showwarning("Export partiel", result["message"])
+
+        self.run_background(
+            "export", self.content_area,
+            lambda job: self.controller.exporter_toutes_filieres(
+                progress=job.report, should_stop=job.is_cancelled),
+            lambda done, total: f"{done}/{total} fichier(s) exporté(s)",
+            on_done
+        )
+
+    def run_background(self, name, parent, func, describe, on_done):
+        """
+        Lance une tâche longue dans un thread, avec barre de progression et annulation.
+
+        Args:
+            name (str): Nom de la tâche (une seule tâche de ce nom à la fois)
+            parent (tk.Widget): Conteneur où afficher la progression
+            func (callable): Travail à exécuter, appelé avec la BackgroundJob
+            describe (callable): Texte de progression à partir des valeurs de job.report()
+            on_done (callable): Appelé avec le résultat, dans le thread Tkinter
+        """
+        if name in self.jobs and self.jobs[name].running:
+            messagebox.showwarning("Tâche en cours", "Cette opération est déjà en cours, veuillez patienter.")
+            return
+
+        box = tk.Frame(parent, bg=parent['bg'])
+        box.pack(fill="x", pady=10)
+        bar = ttk.Progressbar(box, mode="determinate", length=400)
+        bar.pack(side="left", padx=(0, 10))
+        status = tk.Label(box, text="Démarrage...", bg=parent['bg'])
+        status.pack(side="left")
+        btn_cancel = ttk.Button(box, text="Annuler", style="Delete.TButton")
+        btn_cancel.pack(side="right")
+
+        # La vue a pu être quittée entre-temps : on ne met à jour que des widgets existants
+        def on_progress(done, total, *extra):
+            if box.winfo_exists():
+                bar.configure(maximum=total, value=done)
+                status.config(text=describe(done, total, *extra))
+
+        def finish():
+            if box.winfo_exists():
+                box.destroy()
+
+        def on_success(result):
+            finish()
+            on_done(result)
+
+        def on_error(e):
+            finish()
+            messagebox.showerror("Erreur", f"Une erreur est survenue : {str(e)}")
+
+        def cancel():
+            job.cancel()
+            btn_cancel.state(["disabled"])
+            status.config(text="Annulation en cours...")
+
+        job = BackgroundJob(func)
+        btn_cancel.config(command=cancel)
+        # Suivi planifié sur la fenêtre principale, qui survit aux changements de vue
+        self.jobs[name] = job.start(self.master, on_progress, on_success, on_error)
+
 # --- TEACHER DASHBOARD ---
 class TeacherDashboard(DashboardFrame):
     def __init__(self, master):
         super().__init__(master, "Espace Enseignant", role_color="#2980b9")
+        from controllers.teacher_controller import TeacherController
         self.controller = TeacherController(self.master.current_user['id'])
         self.setup_menu()
         self.show_timetable()
@@ -664,19 +1014,11 @@ class TeacherDashboard(DashboardFrame):
         self.clear_content()
         tk.Label(self.content_area, text="Mon Planning Hebdomadaire", font=("Segoe UI", 18, "bold")).pack(anchor="w", pady=(0, 20))
         
-        res = self.controller.get_teacher_timetable()
-        if not res["success"]:
-            tk.Label(self.content_area, text=res.get("error", "Erreur"), fg=ERROR_COLOR).pack()
+        if not self.controller.instructor_id:
+            tk.Label(self.content_area, text="Enseignant non trouvé", fg=ERROR_COLOR).pack()
             return
 
-        cols = ("Jour", "Heure", "Matière", "Groupe", "Salle", "Type")
-        tree = ttk.Treeview(self.content_area, columns=cols, show="headings")
-        for c in cols: tree.heading(c, text=c)
-        tree.pack(fill="both", expand=True)
-        
-        for day, slots in res["timetable"].items():
-            for s in slots:
-                tree.insert("", "end", values=(day, s['heure'], s['matiere'], s['groupe'], s['salle'], s['type_salle']))
+        self.show_week_grid("instructor", self.controller.instructor_id)
 
     def show_reservation(self):
         self.clear_content()
@@ -799,6 +1141,7 @@ class TeacherDashboard(DashboardFrame):
 class StudentDashboard(DashboardFrame):
     def __init__(self, master):
         super().__init__(master, "Espace Étudiant", role_color="#27ae60")
+        from controllers.student_controller import StudentController
         self.controller = StudentController(self.master.current_user['id'])
         self.setup_menu()
         self.show_timetable()
@@ -812,20 +1155,12 @@ class StudentDashboard(DashboardFrame):
         self.clear_content()
         tk.Label(self.content_area, text="Emploi du Temps de ma Filière", font=("Segoe UI", 18, "bold")).pack(anchor="w", pady=(0, 20))
         
-        res = self.controller.get_group_timetable()
-        if not res["success"]:
+        group = refdata.get_cache().get("groups", self.controller.group_id)
+        if not group:
             tk.Label(self.content_area, text="Erreur ou pas de groupe").pack(); return
         
-        tk.Label(self.content_area, text=f"GROUPE: {res['groupe']}", font=("Segoe UI", 14), fg=ACCENT_COLOR).pack(anchor="w")
-
-        cols = ("Jour", "Heure", "Matière", "Enseignant", "Salle")
-        tree = ttk.Treeview(self.content_area, columns=cols, show="headings", height=20)
-        for c in cols: tree.heading(c, text=c)
-        tree.pack(fill="both", expand=True, pady=10)
-        
-        for day, slots in res["emploi_du_temps"].items():
-            for s in slots:
-                tree.insert("", "end", values=(day, s['horaire'], s['matiere'], s['enseignant'], s['salle']))
+        tk.Label(self.content_area, text=f"GROUPE: {group['name']}", font=("Segoe UI", 14), fg=ACCENT_COLOR).pack(anchor="w", pady=(0, 10))
+        self.show_week_grid("group", group['id'])
 
     def show_today(self):
         self.clear_content()
@@ -890,5 +1225,6 @@ class StudentDashboard(DashboardFrame):
 
 
 if __name__ == "__main__":
+    setup()
     app = App()
     app.mainloop()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Exécution de tâches longues en arrière-plan (génération, exports).
+
+Une tâche tourne dans un thread de travail ; elle ne touche jamais à
+l'interface. Elle publie sa progression dans une file (queue.Queue) que le
+thread de l'interface vide périodiquement avec after() : Tkinter n'est appelé
+que depuis sa boucle d'événements, qui reste libre pendant tout le calcul.
+
+L'annulation est coopérative : cancel() lève un drapeau que la tâche consulte
+via is_cancelled() (par exemple entre deux générations de l'algorithme
+génétique) pour s'arrêter proprement.
+
+Exemple :
+
+    job = BackgroundJob(lambda job: controller.generer_planning_complet(
+        progress=job.report, should_stop=job.is_cancelled))
+    job.start(root, on_progress=maj_barre, on_done=afficher_resultat)
+"""
+
+import queue
+import threading
+
+# Intervalle de lecture de la file de progression (ms)
+POLL_INTERVAL_MS = 100
+
+# Types de messages échangés entre la tâche et l'interface
+PROGRESS = "progress"
+DONE = "done"
+ERROR = "error"
+
+
+class BackgroundJob:
+    """
+    Tâche exécutée dans un thread, suivie depuis la boucle Tkinter.
+
+    Attributes:
+        func (callable): Fonction exécutée, appelée avec la tâche en argument
+        result: Valeur retournée par func (une fois terminée)
+        error (Exception): Exception levée par func, le cas échéant
+    """
+
+    def __init__(self, func):
+        """Prépare la tâche (elle ne démarre qu'avec start())."""
+        self.func = func
+        self.result = None
+        self.error = None
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._finished = False
+        self._thread = None
+
+    # --- Côté tâche (thread de travail) ---
+
+    def report(self, *values):
+        """Publie une étape de progression (valeurs libres, ex: génération, total, score)."""
+        self._queue.put((PROGRESS, values))
+
+    def is_cancelled(self):
+        """Indique si l'annulation a été demandée."""
+        return self._cancel.is_set()
+
+    def _run(self):
+        try:
+            self._queue.put((DONE, self.func(self)))
+        except Exception as e:
+            self._queue.put((ERROR, e))
+
+    # --- Côté interface (thread Tkinter) ---
+
+    @property
+    def running(self):
+        """True tant que la tâche n'a pas été terminée côté interface."""
+        return self._thread is not None and not self._finished
+
+    def cancel(self):
+        """Demande l'arrêt de la tâche (pris en compte à sa prochaine vérification)."""
+        self._cancel.set()
+
+    def start(self, widget, on_progress=None, on_done=None, on_error=None,
+              interval=POLL_INTERVAL_MS):
+        """
+        Lance la tâche et suit sa progression avec widget.after().
+
+        Args:
+            widget (tk.Misc): Widget qui planifie la lecture de la file
+                (de préférence la fenêtre principale, qui survit aux changements de vue)
+            on_progress (callable, optional): Appelé avec les valeurs de chaque report()
+            on_done (callable, optional): Appelé avec le résultat de la tâche
+            on_error (callable, optional): Appelé avec l'exception levée par la tâche
+            interval (int): Intervalle de lecture de la file (ms)
+
+        Returns:
+            BackgroundJob: La tâche elle-même
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        def poll():
+            # Seule la dernière progression en attente est utile à l'affichage
+            last_progress = None
+            try:
+                while True:
+                    kind, payload = self._queue.get_nowait()
+                    if kind == PROGRESS:
+                        last_progress = payload
+                        continue
+                    if last_progress is not None and on_progress is not None:
+                        on_progress(*last_progress)
+                    self._finished = True
+                    if kind == DONE:
+                        self.result = payload
+                        if on_done is not None:
+                            on_done(payload)
+                    else:
+                        self.error = payload
+                        if on_error is not None:
+                            on_error(payload)
+                    return
+            except queue.Empty:
+                pass
+            if last_progress is not None and on_progress is not None:
+                on_progress(*last_progress)
+            widget.after(interval, poll)
+
+        widget.after(interval, poll)
+        return self
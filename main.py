@@ -7,10 +7,8 @@ print("========================================")
 
 # Imports 
 from database import setup, getConnection
-from controllers.admin_controller import AdminController
-from controllers.teacher_controller import TeacherController
-from controllers.student_controller import StudentController
-import bcrypt
+# Les contrôleurs (et bcrypt) sont importés à la première utilisation :
+# un étudiant ne charge pas les bibliothèques d'export de l'administration
 
 def login():
     """Fonction de connexion simple"""
@@ -28,6 +26,7 @@ def login():
     user = cursor.fetchone()
     conn.close()
     
+    import bcrypt
     if user and bcrypt.checkpw(password.encode('utf-8'), user['password']):
         return {
             'id': user['id'],
@@ -40,13 +39,14 @@ def login():
         return None
 
 def menu_admin(user):
+    from controllers.admin_controller import AdminController
     admin = AdminController(admin_id=user['id'])
     print(f"\n=== MENU ADMIN - {user['full_name']} ===")
     
     while True:
         print("\n0. GENERER PLANNING AUTOMATIQUE (IA)")
         print("1. Créer un créneau")
-        print("2. Valider une réservation")
+        print("2. Valider une ou plusieurs réservations")
         print("3. Rejeter une réservation")
         print("4. Voir les statistiques")
         print("5. Exporter statistiques (Excel)")
@@ -54,6 +54,8 @@ def menu_admin(user):
         print("7. Afficher détails réservation")
         print("8. Voir réservations en attente")
         print("9. Déconnexion")
+        print("10. Exporter les plannings de toutes les filières")
+        print("11. Publier l'emploi du temps (instantané des étudiants et enseignants)")
 
         choix = input("Choix : ")
 
@@ -74,10 +76,16 @@ def menu_admin(user):
             admin.creer_creneau(course_id, instructor_id, group_id, room_id, day, start_hour, duration)
 
         elif choix == "2":
-            res_id = int(input("ID de la réservation à valider : "))
+            saisie = input("ID(s) de la réservation à valider (séparés par des virgules) : ")
+            res_ids = [int(x) for x in saisie.replace(" ", "").split(",") if x]
             confirm = input("Confirmer la validation ? (o/n) : ")
             if confirm.lower() == "o":
-                admin.valider_reservation(res_id)
+                result = admin.valider_reservations(res_ids)
+                print(f"\n>> {result['message']}")
+                for rid, reasons in result["rejected"].items():
+                    print(f"   Réservation {rid} non validée :")
+                    for reason in reasons:
+                        print(f"     - {reason}")
 
         elif choix == "3":
             res_id = int(input("ID de la réservation à rejeter : "))
@@ -104,8 +112,17 @@ def menu_admin(user):
         elif choix == "9":
             break
 
+        elif choix == "10":
+            result = admin.exporter_toutes_filieres()
+            print(f"\n>> {result['message']}")
+
+        elif choix == "11":
+            result = admin.publier_instantane()
+            print(f"\n>> {result['message']}")
+
 def menu_teacher(user):
-    teacher = TeacherController(user_id=user['id'])
+    from controllers.teacher_controller import TeacherController
+    teacher = TeacherController(user_id=user['id'], use_snapshot=True)
     print(f"\n=== MENU ENSEIGNANT - {user['full_name']} ===")
     
     while True:
@@ -150,11 +167,12 @@ def menu_teacher(user):
             start_hour = int(input("Heure de début (8-18) : "))
             duration = int(input("Durée (en heures) : "))
             min_capacity = int(input("Capacité minimale (défaut: 30) : ") or 30)
-            result = teacher.search_available_room(day, start_hour, duration, min_capacity)
+            equipment = input("Équipement requis (ex: PC, vide si aucun) : ").strip() or None
+            result = teacher.search_available_room(day, start_hour, duration, min_capacity, equipment)
             if result["success"]:
                 if result["rooms"]:
                     for room in result["rooms"]:
-                        print(f"  Salle {room['nom']} (type: {room['type']}, capacité: {room['capacité']})")
+                        print(f"  Salle {room['nom']} (type: {room['type']}, capacité: {room['capacité']}) - pertinence {room['score']:.0%}")
                 else:
                     print("Aucune salle disponible correspondant aux critères.")
 
@@ -168,7 +186,8 @@ def menu_teacher(user):
             break
 
 def menu_student(user):
-    student = StudentController(user_id=user['id'])
+    from controllers.student_controller import StudentController
+    student = StudentController(user_id=user['id'], use_snapshot=True)
     print(f"\n=== MENU ÉTUDIANT - {user['full_name']} ===")
     
     while True:
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Index d'occupation en mémoire de l'emploi du temps.
+
+Ce module charge une seule fois les tables `timetable`, `reservations`
+(statut APPROVED) et `teacher_unavailability`, puis répond aux questions
+"cette salle / cet enseignant / ce groupe est-il libre ?" sans interroger
+SQLite. Chaque (dimension, entité, jour) est représenté par un masque de bits
+des heures occupées (bit h = l'heure h est prise).
+
+get_index() relit à chaque appel les versions des tables TABLES (une petite
+requête sur le pool de queries, voir versioning.py) et recharge l'index dès
+qu'elles ne correspondent plus à celles de son dernier chargement : les
+écritures des autres processus (main.py, API, autre poste) sont ainsi vues.
+
+Les chemins d'écriture de ce processus (insert_schedule_slot, validation de
+réservations, déclaration d'indisponibilité) évitent ce rechargement : juste
+après leur commit, ils appellent add_slot, add_reservations ou
+add_unavailability avec leur connexion. L'index reçoit la modification et
+avance sa version jusqu'à celle produite par l'écriture, à condition qu'il
+reflétait exactement l'état précédent ; sinon il est simplement oublié. Une
+écriture massive (génération automatique) appelle directement invalidate().
+
+Un appelant qui doit garantir l'absence de conflit jusqu'à son INSERT
+vérifie à l'intérieur d'une transaction BEGIN IMMEDIATE (voir
+database.insert_schedule_slot).
+"""
+
+import threading
+
+# Dimensions indexées
+ROOM = "room"
+INSTRUCTOR = "instructor"
+GROUP = "group"
+
+# Origine d'une occupation
+SOURCE_TIMETABLE = "timetable"
+SOURCE_RESERVATION = "reservation"
+SOURCE_UNAVAILABILITY = "unavailability"
+
+# Tables lues par l'index (un changement dans l'une d'elles le rend obsolète)
+TABLES = ("timetable", "reservations", "teacher_unavailability")
+
+# Une salle est occupée par l'emploi du temps et les réservations approuvées
+ROOM_SOURCES = (SOURCE_TIMETABLE, SOURCE_RESERVATION)
+
+# Plage horaire de la journée (8h-18h)
+DAY_START = 8
+DAY_END = 18
+
+
+def hours_mask(start_hour, duration):
+    """
+    Construit le masque de bits d'une plage horaire.
+
+    Args:
+        start_hour (int): Heure de début
+        duration (int): Durée en heures
+
+    Returns:
+        int: Masque avec les bits [start_hour, start_hour + duration[ à 1
+    """
+    if duration <= 0:
+        return 0
+    return ((1 << duration) - 1) << start_hour
+
+
+class OccupancyIndex:
+    """
+    Index des plages occupées par salle, enseignant et groupe.
+
+    Attributes:
+        _cells (dict): (dimension, entité, jour) -> {(source, id): masque}
+        _rows (dict): (source, id) -> liste des clés de _cells concernées
+    """
+
+    def __init__(self):
+        """Initialise un index vide."""
+        self._cells = {}
+        self._rows = {}
+
+    def load(self, conn):
+        """
+        (Re)charge l'index depuis la base.
+
+        Args:
+            conn (sqlite3.Connection): Connexion ouverte sur la base
+        """
+        self._cells = {}
+        self._rows = {}
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT id, instructor_id, group_id, room_id, day, start_hour, duration
+            FROM timetable
+        """)
+        for row in cursor.fetchall():
+            self.add_slot(*row)
+
+        cursor.execute("""
+            SELECT id, instructor_id, group_id, room_id, day, start_hour, duration
+            FROM reservations
+            WHERE status = 'APPROVED'
+        """)
+        for row in cursor.fetchall():
+            self.add_reservation(*row)
+
+        cursor.execute("""
+            SELECT id, instructor_id, day, start_hour, duration
+            FROM teacher_unavailability
+        """)
+        for row in cursor.fetchall():
+            self.add_unavailability(*row)
+
+    # --- Écriture ---
+
+    def _add(self, source, row_id, entities, day, start_hour, duration):
+        """Enregistre une occupation pour chaque (dimension, entité) fournie."""
+        row_key = (source, row_id)
+        self._remove(row_key)
+
+        mask = hours_mask(start_hour, duration)
+        keys = []
+        for dimension, entity_id in entities:
+            if entity_id is None:
+                continue
+            key = (dimension, entity_id, day)
+            self._cells.setdefault(key, {})[row_key] = mask
+            keys.append(key)
+        self._rows[row_key] = keys
+
+    def _remove(self, row_key):
+        """Retire toutes les occupations liées à une ligne."""
+        for key in self._rows.pop(row_key, []):
+            cell = self._cells.get(key)
+            if cell is None:
+                continue
+            cell.pop(row_key, None)
+            if not cell:
+                del self._cells[key]
+
+    def add_slot(self, slot_id, instructor_id, group_id, room_id, day, start_hour, duration):
+        """Ajoute (ou remplace) un créneau de l'emploi du temps."""
+        entities = [(INSTRUCTOR, instructor_id), (GROUP, group_id), (ROOM, room_id)]
+        self._add(SOURCE_TIMETABLE, slot_id, entities, day, start_hour, duration)
+
+    def remove_slot(self, slot_id):
+        """Retire un créneau de l'emploi du temps."""
+        self._remove((SOURCE_TIMETABLE, slot_id))
+
+    def add_reservation(self, reservation_id, instructor_id, group_id, room_id, day, start_hour, duration):
+        """Ajoute (ou remplace) une réservation approuvée."""
+        entities = [(INSTRUCTOR, instructor_id), (GROUP, group_id), (ROOM, room_id)]
+        self._add(SOURCE_RESERVATION, reservation_id, entities, day, start_hour, duration)
+
+    def remove_reservation(self, reservation_id):
+        """Retire une réservation (rejetée ou annulée)."""
+        self._remove((SOURCE_RESERVATION, reservation_id))
+
+    def add_unavailability(self, unavailability_id, instructor_id, day, start_hour, duration):
+        """Ajoute une indisponibilité d'enseignant."""
+        entities = [(INSTRUCTOR, instructor_id)]
+        self._add(SOURCE_UNAVAILABILITY, unavailability_id, entities, day, start_hour, duration)
+
+    # --- Lecture ---
+
+    def is_free(self, dimension, entity_id, day, start_hour, duration, sources=None):
+        """
+        Indique si l'entité est libre sur une plage horaire.
+
+        Args:
+            dimension (str): ROOM, INSTRUCTOR ou GROUP
+            entity_id (int): ID de la salle / de l'enseignant / du groupe
+            day (int): Jour (1=Lundi)
+            start_hour (int): Heure de début
+            duration (int): Durée en heures
+            sources (tuple, optional): Origines prises en compte (toutes par défaut)
+
+        Returns:
+            bool: True si aucune occupation retenue ne chevauche la plage
+        """
+        cell = self._cells.get((dimension, entity_id, day))
+        if not cell:
+            return True
+        mask = hours_mask(start_hour, duration)
+        return not any(
+            busy & mask for (source, _), busy in cell.items()
+            if sources is None or source in sources
+        )
+
+
+# --- Instance partagée ---
+
+_index = None
+_index_stamp = None
+_lock = threading.Lock()
+
+
+def _stamp(conn=None):
+    """Versions des tables TABLES (pool de queries, ou connexion fournie)."""
+    # Import local pour éviter l'import circulaire avec database.py
+    import versioning
+    versions = versioning.get_versions(conn)
+    return tuple(versions.get(table, 0) for table in TABLES)
+
+
+def get_index():
+    """
+    Retourne l'index partagé, rechargé si les tables lues ont changé.
+
+    Returns:
+        OccupancyIndex: L'index d'occupation à jour
+    """
+    global _index, _index_stamp
+    stamp = _stamp()
+    with _lock:
+        if _index is None or _index_stamp != stamp:
+            from database import getConnection
+            index = OccupancyIndex()
+            conn = getConnection()
+            try:
+                index.load(conn)
+            finally:
+                conn.close()
+            _index = index
+            _index_stamp = stamp
+        return _index
+
+
+def invalidate():
+    """Oublie l'index partagé ; il sera rechargé au prochain get_index()."""
+    global _index
+    with _lock:
+        _index = None
+
+
+def _apply(conn, table, rows, change):
+    """
+    Répercute dans l'index partagé une écriture qui vient d'être validée.
+
+    Les triggers de data_version incrémentent la version de `table` une fois
+    par ligne écrite : si l'index chargé correspond aux versions lues sur
+    `conn` moins ces `rows` incrémentations, il reflétait l'état juste avant
+    l'écriture. La modification lui est alors appliquée et sa version avancée,
+    ce qui évite un rechargement complet au prochain get_index(). Sinon (autre
+    écriture entre-temps), l'index est oublié.
+
+    Args:
+        conn (sqlite3.Connection): Connexion de l'écriture, après son commit
+        table (str): Table écrite (l'une de TABLES)
+        rows (int): Nombre de lignes écrites
+        change (callable): Reçoit l'OccupancyIndex à modifier
+    """
+    global _index, _index_stamp
+    stamp = _stamp(conn)
+    before = tuple(version - rows if name == table else version
+                   for name, version in zip(TABLES, stamp))
+    with _lock:
+        if _index is None:
+            return
+        if _index_stamp != before:
+            _index = None
+            return
+        change(_index)
+        _index_stamp = stamp
+
+
+def add_slot(conn, slot_id, instructor_id, group_id, room_id, day, start_hour, duration):
+    """Répercute l'insertion d'un créneau (voir _apply)."""
+    _apply(conn, "timetable", 1,
+           lambda index: index.add_slot(slot_id, instructor_id, group_id, room_id,
+                                        day, start_hour, duration))
+
+
+def add_reservations(conn, rows):
+    """
+    Répercute l'approbation de réservations (voir _apply).
+
+    Args:
+        conn (sqlite3.Connection): Connexion de l'écriture, après son commit
+        rows (list): (id, instructor_id, group_id, room_id, day, start_hour, duration)
+    """
+    def change(index):
+        for row in rows:
+            index.add_reservation(*row)
+    _apply(conn, "reservations", len(rows), change)
+
+
+def add_unavailability(conn, unavailability_id, instructor_id, day, start_hour, duration):
+    """Répercute une nouvelle indisponibilité (voir _apply)."""
+    _apply(conn, "teacher_unavailability", 1,
+           lambda index: index.add_unavailability(unavailability_id, instructor_id,
+                                                  day, start_hour, duration))
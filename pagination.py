@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture paginée de l'emploi du temps complet (pagination par clé).
+
+Au lieu de lire toute la jointure timetable / subjects / instructors / groups /
+rooms d'un coup, on lit des pages de PAGE_SIZE lignes. Chaque page reprend
+après la dernière ligne lue en comparant la clé de tri :
+
+    WHERE (t.day, t.start_hour, t.id) > (?, ?, ?) ORDER BY ... LIMIT ?
+
+Contrairement à OFFSET, le coût d'une page ne dépend pas de sa position. Le
+tri par colonne et les filtres (jour, texte) sont faits par SQLite ; l'id du
+créneau termine toujours la clé pour qu'elle soit unique.
+"""
+
+import queries
+
+# Nombre de lignes lues par page
+PAGE_SIZE = 200
+
+# Colonnes de tri : nom -> (expression SQL, champ de la ligne)
+SORT_COLUMNS = {
+    "day": ("t.day", "day"),
+    "hour": ("t.start_hour", "start_hour"),
+    "duration": ("t.duration", "duration"),
+    "subject": ("s.name", "subject"),
+    "instructor": ("i.name", "instructor"),
+    "group": ("g.name", "group_name"),
+    "room": ("r.name", "room"),
+}
+
+# Fin de clé commune à tous les tris (ordre chronologique, puis id)
+TIEBREAK = ("day", "hour")
+
+SCHEDULE_SQL = """
+    SELECT t.id, t.day, t.start_hour, t.duration, s.name AS subject,
+           i.name AS instructor, g.name AS group_name, r.name AS room
+    FROM timetable t
+    JOIN subjects s ON t.course_id = s.id
+    JOIN instructors i ON t.instructor_id = i.id
+    JOIN groups g ON t.group_id = g.id
+    JOIN rooms r ON t.room_id = r.id
+"""
+
+
+def _like_pattern(text):
+    """Motif LIKE "contient", avec % et _ échappés."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SchedulePager:
+    """
+    Curseur de pagination sur l'emploi du temps complet.
+
+    Attributes:
+        sort (str): Colonne de tri (clé de SORT_COLUMNS)
+        descending (bool): Tri décroissant
+        search (str): Texte recherché dans matière, enseignant, groupe et salle
+        day (int): Jour filtré (None = tous)
+        page_size (int): Nombre de lignes par page
+        exhausted (bool): True quand toutes les lignes ont été lues
+    """
+
+    def __init__(self, sort="day", descending=False, search=None, day=None, page_size=PAGE_SIZE):
+        """Prépare la lecture ; aucune requête n'est faite avant next_page()."""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Colonne de tri inconnue : {sort}")
+        self.sort = sort
+        self.descending = descending
+        self.search = (search or "").strip()
+        self.day = day
+        self.page_size = page_size
+        self.exhausted = False
+        self._after = None
+
+        names = [sort] + [name for name in TIEBREAK if name != sort]
+        self._key_sql = [SORT_COLUMNS[name][0] for name in names] + ["t.id"]
+        self._key_fields = [SORT_COLUMNS[name][1] for name in names] + ["id"]
+
+    def _query(self):
+        """Construit la requête de la page suivante et ses paramètres."""
+        where = []
+        params = []
+        if self.day is not None:
+            where.append("t.day = ?")
+            params.append(self.day)
+        if self.search:
+            where.append("(s.name LIKE ? ESCAPE '\\' OR i.name LIKE ? ESCAPE '\\'"
+                         " OR g.name LIKE ? ESCAPE '\\' OR r.name LIKE ? ESCAPE '\\')")
+            params += [_like_pattern(self.search)] * 4
+        if self._after is not None:
+            operator = "<" if self.descending else ">"
+            placeholders = ", ".join("?" * len(self._after))
+            where.append(f"({', '.join(self._key_sql)}) {operator} ({placeholders})")
+            params += self._after
+
+        direction = "DESC" if self.descending else "ASC"
+        sql = SCHEDULE_SQL
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column in self._key_sql)
+        sql += " LIMIT ?"
+        params.append(self.page_size)
+        return sql, params
+
+    def next_page(self):
+        """
+        Lit la page suivante.
+
+        Returns:
+            list: Lignes (sqlite3.Row) id, day, start_hour, duration, subject,
+                instructor, group_name, room ; vide une fois tout lu
+        """
+        if self.exhausted:
+            return []
+        sql, params = self._query()
+        rows = queries.fetchall_sql("schedule_page", sql, params)
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            last = rows[-1]
+            self._after = [last[field] for field in self._key_fields]
+        return rows
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Couche de requêtes nommées pour les lectures fréquentes.
+
+Les requêtes "chaudes" (emplois du temps, réservations, statistiques) sont
+définies une seule fois ici sous un nom, avec des paramètres `?`. Elles sont
+exécutées sur un petit pool de connexions réutilisées, configurées avec un
+grand cache de requêtes préparées (cached_statements) : le SQL n'est analysé
+qu'une fois par connexion au lieu d'à chaque appel.
+
+Chaque exécution est chronométrée : get_stats() donne, par requête, le nombre
+d'appels et la latence cumulée / moyenne / maximale.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import database
+
+# Taille du cache de requêtes préparées par connexion (128 par défaut dans sqlite3)
+CACHED_STATEMENTS = 512
+
+# Nombre maximal de connexions conservées dans le pool
+POOL_SIZE = 4
+
+
+STATEMENTS = {
+    # --- Versions des données (versioning.py) ---
+    "data_versions": "SELECT table_name, version FROM data_version",
+
+    # --- Utilisateurs ---
+    "student_group": """
+        SELECT g.id
+        FROM groups g
+        JOIN student_groups sg ON g.id = sg.group_id
+        WHERE sg.user_id = ? AND g.active = 1
+        LIMIT 1
+    """,
+
+    "first_active_group": "SELECT id FROM groups WHERE active = 1 LIMIT 1",
+
+    "instructor_by_user": "SELECT id FROM instructors WHERE user_id = ?",
+
+    # --- Emplois du temps ---
+    "group_name": "SELECT name FROM groups WHERE id = ?",
+
+    "group_timetable": """
+        SELECT
+            t.day,
+            t.start_hour,
+            t.duration,
+            s.name AS subject_name,
+            s.code AS subject_code,
+            s.type AS subject_type,
+            i.name AS instructor_name,
+            r.name AS room_name,
+            r.type AS room_type
+        FROM timetable t
+        JOIN subjects s ON t.course_id = s.id
+        JOIN instructors i ON t.instructor_id = i.id
+        JOIN rooms r ON t.room_id = r.id
+        WHERE t.group_id = ?
+        ORDER BY t.day, t.start_hour
+    """,
+
+    "group_day_timetable": """
+        SELECT
+            t.start_hour,
+            t.duration,
+            s.name AS subject_name,
+            i.name AS instructor_name,
+            r.name AS room_name
+        FROM timetable t
+        JOIN subjects s ON t.course_id = s.id
+        JOIN instructors i ON t.instructor_id = i.id
+        JOIN rooms r ON t.room_id = r.id
+        WHERE t.group_id = ? AND t.day = ?
+        ORDER BY t.start_hour
+    """,
+
+    "teacher_timetable": """
+        SELECT
+            t.day,
+            t.start_hour,
+            t.duration,
+            s.name AS subject_name,
+            s.code AS subject_code,
+            g.name AS group_name,
+            r.name AS room_name,
+            r.type AS room_type
+        FROM timetable t
+        JOIN subjects s ON t.course_id = s.id
+        JOIN groups g ON t.group_id = g.id
+        JOIN rooms r ON t.room_id = r.id
+        WHERE t.instructor_id = ?
+        ORDER BY t.day, t.start_hour
+    """,
+
+    # Toute la semaine en une lecture : grilles hebdomadaires (weekgrid.py)
+    "week_slots": """
+        SELECT
+            t.id, t.day, t.start_hour, t.duration,
+            t.group_id, t.instructor_id, t.room_id,
+            s.name AS subject, s.type AS subject_type,
+            g.name AS group_name, i.name AS instructor, r.name AS room
+        FROM timetable t
+        JOIN subjects s ON t.course_id = s.id
+        JOIN groups g ON t.group_id = g.id
+        JOIN instructors i ON t.instructor_id = i.id
+        JOIN rooms r ON t.room_id = r.id
+    """,
+
+    # --- Journal des modifications (change_log) ---
+    "change_log_since": """
+        SELECT seq, op, table_name, row_id, old_key, new_key, changed_at
+        FROM change_log
+        WHERE seq > ?
+        ORDER BY seq
+        LIMIT ?
+    """,
+
+    "change_log_since_table": """
+        SELECT seq, op, table_name, row_id, old_key, new_key, changed_at
+        FROM change_log
+        WHERE table_name = ? AND seq > ?
+        ORDER BY seq
+        LIMIT ?
+    """,
+
+    # last_seq vient de sqlite_sequence : juste même si le journal a été vidé
+    "change_log_bounds": """
+        SELECT COALESCE((SELECT min(seq) FROM change_log), 0) AS first_seq,
+               COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0) AS last_seq
+    """,
+
+    "filiere_timetable": """
+        SELECT t.day, t.start_hour, s.name AS subject, r.name AS room, g.name AS group_name
+        FROM timetable t
+        JOIN subjects s ON t.course_id = s.id
+        JOIN rooms r ON t.room_id = r.id
+        JOIN groups g ON t.group_id = g.id
+        WHERE g.filiere = ?
+        ORDER BY g.name
+    """,
+
+    # --- Salles ---
+    "active_rooms": """
+        SELECT id, name, type, capacity, equipments
+        FROM rooms
+        WHERE active = 1
+        ORDER BY name
+    """,
+
+    # Occupations des salles : emploi du temps + réservations approuvées (availability.py)
+    "room_occupations": """
+        SELECT room_id, group_id, day, start_hour, duration FROM timetable
+        UNION ALL
+        SELECT room_id, group_id, day, start_hour, duration FROM reservations
+        WHERE status = 'APPROVED' AND room_id IS NOT NULL
+    """,
+
+    # --- Réservations ---
+    "teacher_reservations": """
+        SELECT
+            r.id, r.day, r.start_hour, r.duration,
+            ro.name AS salle, r.reason, r.status,
+            r.created_at AS date_soumission
+        FROM reservations r
+        LEFT JOIN rooms ro ON r.room_id = ro.id
+        WHERE r.instructor_id = ?
+        ORDER BY r.created_at DESC
+    """,
+
+    "pending_reservations": """
+        SELECT r.id, u.full_name AS enseignant, r.day, r.start_hour, r.duration, r.reason
+        FROM reservations r
+        JOIN instructors i ON r.instructor_id = i.id
+        JOIN users u ON i.user_id = u.id
+        WHERE r.status = 'PENDING'
+        ORDER BY r.day, r.start_hour
+    """,
+
+    # --- Statistiques (tables matérialisées, tenues à jour par triggers) ---
+    "count_timetable": "SELECT value FROM stats_counters WHERE name = 'timetable'",
+    "count_users": "SELECT value FROM stats_counters WHERE name = 'users'",
+    "count_rooms": "SELECT value FROM stats_counters WHERE name = 'rooms'",
+    "count_reservations_by_status": "SELECT value FROM stats_counters WHERE name = 'reservations:' || ?",
+
+    "room_slot_counts": """
+        SELECT r.name, s.slot_count AS nb_creneaux, s.hour_count AS nb_heures
+        FROM room_stats s
+        JOIN rooms r ON r.id = s.room_id
+        ORDER BY nb_creneaux DESC
+    """,
+
+    # --- Analyse de l'occupation (analytics.py) ---
+    "analytics_rooms": """
+        SELECT id, name, capacity
+        FROM rooms
+        WHERE active = 1
+        ORDER BY name
+    """,
+
+    "analytics_timetable": """
+        SELECT t.room_id, t.day, t.start_hour, t.duration, g.student_count
+        FROM timetable t
+        LEFT JOIN groups g ON g.id = t.group_id
+    """,
+}
+
+
+class ConnectionPool:
+    """
+    Pool de connexions SQLite réutilisables entre les appels.
+
+    Attributes:
+        size (int): Nombre maximal de connexions conservées
+        cached_statements (int): Taille du cache de requêtes préparées
+        read_only (bool): Ouvrir les connexions en lecture seule (mode=ro)
+    """
+
+    def __init__(self, size=POOL_SIZE, cached_statements=CACHED_STATEMENTS, read_only=False):
+        """Initialise un pool vide (les connexions sont créées à la demande)."""
+        self.size = size
+        self.cached_statements = cached_statements
+        self.read_only = read_only
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._db_name = None
+
+    def _connect(self):
+        if self.read_only:
+            target, uri = f"file:{os.path.abspath(database.DB_NAME)}?mode=ro", True
+        else:
+            target, uri = database.DB_NAME, False
+        conn = sqlite3.connect(target, uri=uri,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Emprunte une connexion le temps d'un bloc `with`.
+
+        Yields:
+            sqlite3.Connection: Connexion réservée à l'appelant
+        """
+        # Si la base a changé (ex: DB_NAME modifié), on repart d'un pool vide
+        if self._db_name != database.DB_NAME:
+            self.close()
+            self._db_name = database.DB_NAME
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        """Ferme toutes les connexions inactives."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool = ConnectionPool()
+_local = threading.local()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name, elapsed):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed * 1000
+        entry["max_ms"] = max(entry["max_ms"], elapsed * 1000)
+
+
+def bind_pool(pool):
+    """
+    Fait exécuter les requêtes du thread courant sur un autre pool.
+
+    Utilisé par les threads de travail d'un exécuteur (ex: pool en lecture
+    seule de aioservice) ; None revient au pool partagé.
+
+    Args:
+        pool (ConnectionPool or None): Pool à utiliser dans ce thread
+    """
+    _local.pool = pool
+
+
+def _run(name, params, fetch, sql=None):
+    if sql is None:
+        sql = STATEMENTS[name]
+    pool = getattr(_local, "pool", None) or _pool
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        cursor = conn.execute(sql, params)
+        result = fetch(cursor)
+    _record(name, time.perf_counter() - start)
+    return result
+
+
+def fetchall(name, params=()):
+    """
+    Exécute une requête nommée et retourne toutes les lignes.
+
+    Args:
+        name (str): Nom de la requête dans STATEMENTS
+        params (tuple): Paramètres de la requête
+
+    Returns:
+        list: Lignes (sqlite3.Row)
+    """
+    return _run(name, params, lambda cursor: cursor.fetchall())
+
+
+def fetchall_sql(name, sql, params=()):
+    """
+    Exécute une requête construite à la volée (tri, filtres) sur le pool.
+
+    Args:
+        name (str): Nom sous lequel la requête est mesurée (get_stats)
+        sql (str): Requête SQL, avec des paramètres `?`
+        params (tuple): Paramètres de la requête
+
+    Returns:
+        list: Lignes (sqlite3.Row)
+    """
+    return _run(name, params, lambda cursor: cursor.fetchall(), sql=sql)
+
+
+def fetchone(name, params=()):
+    """Exécute une requête nommée et retourne la première ligne (ou None)."""
+    return _run(name, params, lambda cursor: cursor.fetchone())
+
+
+def scalar(name, params=()):
+    """Exécute une requête nommée et retourne la première colonne de la première ligne."""
+    row = fetchone(name, params)
+    return row[0] if row else None
+
+
+def get_stats():
+    """
+    Retourne les mesures par requête.
+
+    Returns:
+        dict: {nom: {"calls", "total_ms", "avg_ms", "max_ms"}}
+    """
+    with _stats_lock:
+        return {
+            name: dict(entry, avg_ms=entry["total_ms"] / entry["calls"])
+            for name, entry in _stats.items()
+        }
+
+
+def reset_stats():
+    """Remet les mesures à zéro."""
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Recommandation de salles classées selon plusieurs critères.
+
+Parmi les salles libres sur le créneau, assez grandes et disposant de
+l'équipement requis (filtre du moteur de disponibilité), chaque salle reçoit
+un score entre 0 et 1 :
+- adéquation de la capacité : moins de places perdues = meilleur score ;
+- proximité : même bâtiment que le cours du groupe le plus proche dans la
+  journée (le bâtiment est déduit du préfixe du nom : "E13" -> "E",
+  "Amphi 4" -> "Amphi") ;
+- charge : une salle peu occupée dans la semaine est préférée, pour répartir
+  l'usage des salles.
+
+Tout est calculé sur les données en mémoire de availability.py : une
+recommandation ne fait aucune requête par salle.
+"""
+
+import re
+
+import availability
+
+# Poids des critères (leur somme vaut 1)
+WEIGHTS = {
+    "capacity": 0.5,
+    "proximity": 0.3,
+    "load": 0.2,
+}
+
+# Nombre de salles recommandées par défaut
+DEFAULT_TOP_K = 5
+
+
+def building_of(room_name):
+    """
+    Déduit le bâtiment d'une salle à partir de son nom.
+
+    Args:
+        room_name (str): Nom de la salle (ex: "E13", "Amphi 4")
+
+    Returns:
+        str: Préfixe alphabétique du nom ("E", "Amphi"), ou le nom entier
+    """
+    match = re.match(r"\s*([^\W\d_]+)", room_name or "")
+    return match.group(1).upper() if match else (room_name or "")
+
+
+def _proximity_score(room, start_hour, duration, group_slots):
+    """
+    Score de proximité d'une salle avec les autres cours du groupe ce jour-là.
+
+    Returns:
+        float: 1 si même bâtiment que le cours le plus proche dans le temps,
+            0.5 si même bâtiment qu'un autre cours du jour, 0 sinon
+            (0.5 si le groupe n'a pas d'autre cours ce jour-là)
+    """
+    if not group_slots:
+        return 0.5
+
+    def gap(slot):
+        slot_start, slot_duration, _ = slot
+        if slot_start + slot_duration <= start_hour:
+            return start_hour - (slot_start + slot_duration)
+        return max(slot_start - (start_hour + duration), 0)
+
+    building = building_of(room['name'])
+    nearest = min(group_slots, key=gap)
+    if building_of(nearest[2]['name']) == building:
+        return 1.0
+    if any(building_of(other['name']) == building for _, _, other in group_slots):
+        return 0.5
+    return 0.0
+
+
+def recommend_rooms(day, start_hour, duration, student_count=0, equipment=None,
+                    group_id=None, top_k=DEFAULT_TOP_K, engine=None):
+    """
+    Classe les salles libres les mieux adaptées à un créneau.
+
+    Args:
+        day (int): Jour (1=Lundi)
+        start_hour (int): Heure de début
+        duration (int): Durée en heures
+        student_count (int): Nombre d'étudiants à accueillir (capacité minimale)
+        equipment (str or iterable, optional): Équipement(s) requis
+        group_id (int, optional): Groupe concerné (critère de proximité)
+        top_k (int, optional): Nombre de salles retournées (None = toutes)
+        engine (AvailabilityEngine, optional): Moteur à utiliser (partagé par défaut)
+
+    Returns:
+        list: Un dict par salle (room, score, capacity_fit, proximity, load, building),
+            du meilleur au moins bon score
+    """
+    if engine is None:
+        engine = availability.get_engine()
+
+    candidates = engine.free_rooms(day, start_hour, duration,
+                                   min_capacity=student_count, equipment=equipment)
+    if not candidates:
+        return []
+
+    group_slots = engine.group_slots(group_id, day) if group_id is not None else []
+    max_load = max(engine.load(room['id']) for room in candidates) or 1
+
+    ranked = []
+    for room in candidates:
+        capacity = room['capacity'] or 0
+        capacity_fit = student_count / capacity if capacity and student_count else 0.0
+        proximity = _proximity_score(room, start_hour, duration, group_slots)
+        load = engine.load(room['id'])
+        score = (WEIGHTS["capacity"] * capacity_fit
+                 + WEIGHTS["proximity"] * proximity
+                 + WEIGHTS["load"] * (1 - load / max_load))
+        ranked.append({
+            'room': room,
+            'score': round(score, 3),
+            'capacity_fit': round(capacity_fit, 3),
+            'proximity': proximity,
+            'load': load,
+            'building': building_of(room['name']),
+        })
+
+    # À score égal : la plus petite salle suffisante, puis l'ordre alphabétique
+    ranked.sort(key=lambda r: (-r['score'], r['room']['capacity'] or 0, r['room']['name']))
+    return ranked[:top_k] if top_k else ranked
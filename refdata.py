@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Cache des données de référence (matières, enseignants, groupes, salles).
+
+Ces tables changent rarement mais sont relues à chaque affichage d'un
+formulaire (listes déroulantes) et à chaque recherche d'un id par son nom.
+Le cache garde toutes les lignes de chaque table en mémoire, avec un index
+par id, et les sert aux interfaces comme aux contrôleurs.
+
+Deux modes d'invalidation, selon l'application :
+- abonné à l'observateur de versioning (watch) : c'est la scrutation de
+  data_version (after() dans Tkinter) qui vide les tables modifiées, et une
+  lecture ne fait plus aucune requête après le premier chargement ;
+- sans observateur (interface console) : chaque lecture compare la version
+  de la table à celle du chargement (une petite requête sur data_version).
+
+Les lignes retournées sont partagées : elles ne doivent pas être modifiées.
+"""
+
+import threading
+
+import queries
+import versioning
+
+# Tables mises en cache (toutes suivies par data_version)
+REFERENCE_TABLES = ("subjects", "instructors", "groups", "rooms")
+
+
+class ReferenceCache:
+    """
+    Lignes des tables de référence, rechargées quand leur version change.
+
+    Attributes:
+        tables (tuple): Tables mises en cache
+        _entries (dict): table -> {"version", "rows", "by_id"}
+        _watched (bool): True si un observateur se charge de l'invalidation
+    """
+
+    def __init__(self, tables=REFERENCE_TABLES):
+        """Initialise un cache vide (chaque table est lue à sa première utilisation)."""
+        self.tables = tuple(tables)
+        self._entries = {}
+        self._watched = False
+        self._lock = threading.Lock()
+
+    def watch(self, watcher):
+        """
+        Confie l'invalidation à un observateur de data_version.
+
+        Args:
+            watcher (versioning.DataVersionWatcher): Observateur scruté par l'application
+
+        Returns:
+            int: Jeton d'abonnement
+        """
+        self._watched = True
+        return watcher.subscribe(self.invalidate, self.tables)
+
+    def invalidate(self, tables=None):
+        """Oublie les tables données (toutes par défaut)."""
+        with self._lock:
+            for table in (tables or self.tables):
+                self._entries.pop(table, None)
+
+    def _entry(self, table):
+        if table not in self.tables:
+            raise ValueError(f"Table de référence inconnue : {table}")
+        with self._lock:
+            entry = self._entries.get(table)
+            if entry is not None and self._watched:
+                return entry
+            version = versioning.get_versions().get(table, 0)
+            if entry is not None and entry["version"] == version:
+                return entry
+            rows = [dict(row) for row in
+                    queries.fetchall_sql(f"refdata_{table}", f"SELECT * FROM {table} ORDER BY id")]
+            entry = {
+                "version": version,
+                "rows": rows,
+                "by_id": {row['id']: row for row in rows},
+            }
+            self._entries[table] = entry
+            return entry
+
+    def rows(self, table):
+        """
+        Toutes les lignes d'une table.
+
+        Returns:
+            list: Lignes (dict) triées par id
+        """
+        return self._entry(table)["rows"]
+
+    def select(self, table, columns="id, name"):
+        """
+        Projection des lignes sur quelques colonnes (listes déroulantes).
+
+        Args:
+            table (str): Table de référence
+            columns (str): Colonnes séparées par des virgules ("id, name, code")
+
+        Returns:
+            list: Tuples dans l'ordre des colonnes demandées
+        """
+        names = [name.strip() for name in columns.split(",")]
+        return [tuple(row[name] for name in names) for row in self.rows(table)]
+
+    def get(self, table, row_id):
+        """Ligne d'id donné, ou None."""
+        return self._entry(table)["by_id"].get(row_id)
+
+    def find(self, table, **criteria):
+        """
+        Première ligne dont les colonnes valent les critères donnés.
+
+        Exemple : find("rooms", name="E13", active=1)
+
+        Returns:
+            dict or None: La ligne trouvée
+        """
+        for row in self.rows(table):
+            if all(row.get(column) == value for column, value in criteria.items()):
+                return row
+        return None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Retourne le cache de données de référence partagé.
+
+    Returns:
+        ReferenceCache: Le cache partagé
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ReferenceCache()
+    return _cache
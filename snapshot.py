@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+Instantané publié de l'emploi du temps, lu en mémoire par les clients.
+
+Côté administration, publish() lit la base principale dans une seule
+transaction de lecture et construit en mémoire une petite base dénormalisée
+(créneaux avec les noms des matières, enseignants, groupes et salles, salles
+actives, occupations, rattachements étudiant -> groupe). Cette base est copiée dans un fichier temporaire avec l'API de
+sauvegarde SQLite (Connection.backup), puis le fichier remplace l'instantané
+publié en une opération atomique : un client ne lit jamais un fichier à moitié
+écrit.
+
+Côté étudiants et enseignants, get_snapshot() charge ce fichier une fois
+(lecture seule) et sert les consultations depuis la mémoire : emploi du
+temps du groupe ou de l'enseignant, cours du jour, salles libres (même
+moteur de bitmaps que availability). Le fichier est rechargé quand
+l'administration en publie un nouveau : sa date de modification suffit, la
+base principale n'est jamais interrogée pour savoir s'il est à jour.
+
+L'administration le tient à jour : après chaque écriture qui change le
+contenu copié (création de créneau, validation de réservations, génération
+du planning), AdminController appelle refresh(), qui republie l'instantané
+s'il existe. Le contenu publié a une empreinte (meta "digest") : si elle n'a
+pas changé, le fichier n'est pas réécrit et les clients gardent leur copie.
+Une demande de réservation en attente ou une indisponibilité ne sont pas
+copiées et ne déclenchent donc rien. Une modification faite hors de
+l'administration (script, outil SQL) demande une publication manuelle.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import database
+from availability import AvailabilityEngine
+from database import getConnection
+
+# Instantané publié, à côté de la base principale
+SNAPSHOT_NAME = 'university_schedule_snapshot.db'
+
+# Version du format de l'instantané (PRAGMA user_version du fichier)
+SNAPSHOT_FORMAT = 1
+
+SNAPSHOT_SCHEMA = (
+    """
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+    """
+    CREATE TABLE slots (
+        id INTEGER PRIMARY KEY,
+        day INTEGER NOT NULL,
+        start_hour INTEGER NOT NULL,
+        duration INTEGER NOT NULL,
+        group_id INTEGER NOT NULL,
+        instructor_id INTEGER NOT NULL,
+        room_id INTEGER NOT NULL,
+        subject_name TEXT,
+        subject_code TEXT,
+        subject_type TEXT,
+        group_name TEXT,
+        instructor_name TEXT,
+        room_name TEXT,
+        room_type TEXT
+    )
+    """,
+    "CREATE INDEX idx_slots_group ON slots(group_id, day, start_hour)",
+    "CREATE INDEX idx_slots_instructor ON slots(instructor_id, day, start_hour)",
+    """
+    CREATE TABLE rooms (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        type TEXT,
+        capacity INTEGER,
+        equipments TEXT
+    )
+    """,
+    """
+    CREATE TABLE occupations (
+        room_id INTEGER,
+        group_id INTEGER,
+        day INTEGER,
+        start_hour INTEGER,
+        duration INTEGER
+    )
+    """,
+    """
+    CREATE TABLE groups (
+        id INTEGER PRIMARY KEY,
+        name TEXT
+    )
+    """,
+    """
+    CREATE TABLE student_groups (
+        user_id INTEGER PRIMARY KEY,
+        group_id INTEGER NOT NULL
+    )
+    """,
+)
+
+# Contenu de chaque table : requête sur la base principale
+SNAPSHOT_SOURCES = {
+    "slots": """
+        SELECT t.id, t.day, t.start_hour, t.duration,
+               t.group_id, t.instructor_id, t.room_id,
+               s.name, s.code, s.type, g.name, i.name, r.name, r.type
+        FROM timetable t
+        JOIN subjects s ON t.course_id = s.id
+        JOIN groups g ON t.group_id = g.id
+        JOIN instructors i ON t.instructor_id = i.id
+        JOIN rooms r ON t.room_id = r.id
+        ORDER BY t.day, t.start_hour
+    """,
+    "rooms": """
+        SELECT id, name, type, capacity, equipments
+        FROM rooms
+        WHERE active = 1
+        ORDER BY name
+    """,
+    "occupations": """
+        SELECT room_id, group_id, day, start_hour, duration FROM timetable
+        UNION ALL
+        SELECT room_id, group_id, day, start_hour, duration FROM reservations
+        WHERE status = 'APPROVED' AND room_id IS NOT NULL
+    """,
+    "groups": "SELECT id, name FROM groups WHERE active = 1",
+    # Un groupe actif par étudiant (le premier, comme StudentController)
+    "student_groups": """
+        SELECT sg.user_id, min(sg.group_id)
+        FROM student_groups sg
+        JOIN groups g ON g.id = sg.group_id
+        WHERE g.active = 1
+        GROUP BY sg.user_id
+    """,
+}
+
+# Lecture de chaque table par les clients (mêmes ordres que les requêtes des contrôleurs)
+SNAPSHOT_READS = {
+    "slots": "SELECT * FROM slots ORDER BY day, start_hour",
+    "rooms": "SELECT * FROM rooms ORDER BY name",
+    "occupations": "SELECT * FROM occupations",
+    "groups": "SELECT * FROM groups",
+    "student_groups": "SELECT * FROM student_groups",
+}
+
+
+def default_path():
+    """Chemin de l'instantané publié (à côté de database.DB_NAME)."""
+    return os.path.join(os.path.dirname(os.path.abspath(database.DB_NAME)), SNAPSHOT_NAME)
+
+
+def _read_contents():
+    """
+    Lit le contenu à publier dans une seule transaction de lecture.
+
+    Returns:
+        tuple: ({table: lignes}, id du groupe de repli ou None)
+    """
+    source = getConnection()
+    try:
+        # Une seule transaction de lecture : toutes les tables sont cohérentes entre elles
+        source.execute("BEGIN")
+        contents = {table: source.execute(sql).fetchall()
+                    for table, sql in SNAPSHOT_SOURCES.items()}
+        fallback = source.execute("SELECT id FROM groups WHERE active = 1 LIMIT 1").fetchone()
+        source.rollback()
+    finally:
+        source.close()
+    return contents, fallback['id'] if fallback else None
+
+
+def content_digest(contents, fallback_group_id):
+    """
+    Empreinte du contenu publié (indépendante de l'ordre des lignes).
+
+    Args:
+        contents (dict): {table: lignes} lues par _read_contents()
+        fallback_group_id (int or None): Groupe de repli des étudiants
+
+    Returns:
+        str: Empreinte SHA-256 en hexadécimal
+    """
+    digest = hashlib.sha256(repr(fallback_group_id).encode())
+    for table in sorted(contents):
+        digest.update(table.encode())
+        for line in sorted(repr(tuple(row)) for row in contents[table]):
+            digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def publish(path=None, skip_unchanged=False):
+    """
+    Publie un instantané de l'emploi du temps (chemin d'écriture de l'administration).
+
+    Args:
+        path (str, optional): Fichier publié (par défaut default_path())
+        skip_unchanged (bool): Ne pas réécrire le fichier si le contenu publié
+            est identique (même empreinte)
+
+    Returns:
+        dict: success, message, path, slots (nombre de créneaux), changed
+    """
+    path = path or default_path()
+    contents, fallback_group_id = _read_contents()
+    digest = content_digest(contents, fallback_group_id)
+    slot_count = len(contents["slots"])
+
+    if skip_unchanged:
+        current = get_snapshot(path)
+        if current is not None and current.meta.get("digest") == digest:
+            return {
+                "success": True,
+                "message": f"Instantané déjà à jour : {slot_count} créneaux ({path})",
+                "path": path,
+                "slots": slot_count,
+                "changed": False,
+            }
+
+    memory = sqlite3.connect(":memory:")
+    for statement in SNAPSHOT_SCHEMA:
+        memory.execute(statement)
+    for table, rows in contents.items():
+        if rows:
+            placeholders = ", ".join("?" * len(rows[0]))
+            memory.executemany(f"INSERT INTO {table} VALUES ({placeholders})",
+                               [tuple(row) for row in rows])
+    meta = {
+        "published_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "fallback_group_id": fallback_group_id,
+        "digest": digest,
+    }
+    memory.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+    memory.execute(f"PRAGMA user_version = {SNAPSHOT_FORMAT}")
+    memory.commit()
+
+    # Copie page à page (API de sauvegarde) dans un fichier temporaire propre à
+    # cette publication, puis remplacement atomique
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        target = sqlite3.connect(temp_path)
+        try:
+            memory.backup(target)
+        finally:
+            target.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        memory.close()
+
+    return {
+        "success": True,
+        "message": f"Instantané publié : {slot_count} créneaux ({path})",
+        "path": path,
+        "slots": slot_count,
+        "changed": True,
+    }
+
+
+def refresh(path=None):
+    """
+    Republie l'instantané s'il a déjà été publié et que son contenu a changé.
+
+    Appelé par l'administration après les écritures de l'emploi du temps ;
+    ne crée pas d'instantané si aucun n'a encore été publié.
+
+    Args:
+        path (str, optional): Fichier publié (par défaut default_path())
+
+    Returns:
+        dict or None: Résultat de publish(), ou None sans instantané publié
+    """
+    path = path or default_path()
+    if not os.path.exists(path):
+        return None
+    return publish(path, skip_unchanged=True)
+
+
+class Snapshot:
+    """
+    Contenu d'un instantané publié, entièrement en mémoire.
+
+    Les créneaux ont les mêmes clés que les requêtes group_timetable /
+    teacher_timetable (subject_name, instructor_name, room_name...).
+
+    Attributes:
+        meta (dict): published_at, fallback_group_id, digest
+        rooms (list): Salles actives (dict id, name, type, capacity, equipments)
+        engine (AvailabilityEngine): Occupations des salles (salles libres)
+        _by_group (dict): groupe -> créneaux triés par jour et heure
+        _by_instructor (dict): enseignant -> créneaux triés par jour et heure
+        _group_names (dict): groupe actif -> nom
+        _student_group (dict): utilisateur étudiant -> groupe
+    """
+
+    def __init__(self, meta, slots, rooms, occupations, groups, student_groups):
+        """Indexe les lignes lues dans le fichier (voir load())."""
+        self.meta = meta
+        self.rooms = rooms
+        self._by_group = {}
+        self._by_instructor = {}
+        for slot in slots:
+            self._by_group.setdefault(slot['group_id'], []).append(slot)
+            self._by_instructor.setdefault(slot['instructor_id'], []).append(slot)
+        self.engine = AvailabilityEngine(rooms)
+        for row in occupations:
+            self.engine.occupy(row['room_id'], row['day'], row['start_hour'], row['duration'],
+                               group_id=row['group_id'])
+        self._student_group = {row['user_id']: row['group_id'] for row in student_groups}
+        self._group_names = {row['id']: row['name'] for row in groups}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Lit un instantané publié (en lecture seule) et ferme aussitôt le fichier.
+
+        Raises:
+            ValueError: Si le fichier n'est pas au format SNAPSHOT_FORMAT
+        """
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SNAPSHOT_FORMAT:
+                raise ValueError(f"Format d'instantané non pris en charge : {version}")
+            tables = {table: [dict(row) for row in conn.execute(sql)]
+                      for table, sql in SNAPSHOT_READS.items()}
+            meta = {row['key']: row['value'] for row in conn.execute("SELECT key, value FROM meta")}
+        finally:
+            conn.close()
+        return cls(meta, **tables)
+
+    def group_of_student(self, user_id):
+        """Groupe d'un étudiant (premier groupe actif à défaut, comme StudentController)."""
+        group_id = self._student_group.get(user_id)
+        if group_id is None and self.meta.get("fallback_group_id") is not None:
+            group_id = int(self.meta["fallback_group_id"])
+        return group_id
+
+    def group_name(self, group_id):
+        """Nom d'un groupe actif, ou None."""
+        return self._group_names.get(group_id)
+
+    def group_timetable(self, group_id, day=None):
+        """Créneaux d'un groupe (d'un seul jour si day est donné), triés."""
+        slots = self._by_group.get(group_id, [])
+        if day is None:
+            return slots
+        return [slot for slot in slots if slot['day'] == day]
+
+    def teacher_timetable(self, instructor_id):
+        """Créneaux d'un enseignant, triés."""
+        return self._by_instructor.get(instructor_id, [])
+
+
+_snapshot = None
+_snapshot_key = None
+_lock = threading.Lock()
+
+
+def get_snapshot(path=None):
+    """
+    Retourne l'instantané publié, rechargé si un nouveau a été publié.
+
+    Args:
+        path (str, optional): Fichier publié (par défaut default_path())
+
+    Returns:
+        Snapshot or None: None si aucun instantané n'a été publié (les
+            contrôleurs lisent alors la base principale)
+    """
+    global _snapshot, _snapshot_key
+    path = path or default_path()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if _snapshot is None or _snapshot_key != key:
+            _snapshot = Snapshot.load(path)
+            _snapshot_key = key
+        return _snapshot
+
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Fixtures communes : base SQLite temporaire, migrée et peuplée d'un petit jeu
+de données, avec les caches partagés des modules remis à zéro.
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Instances partagées (module -> variables globales) à oublier entre deux tests
+SHARED_STATE = {
+    "occupancy": ("_index", "_index_stamp"),
+    "availability": ("_engine", "_engine_stamp"),
+    "analytics": ("_cube", "_cube_stamp"),
+    "refdata": ("_cache",),
+    "weekgrid": ("_store",),
+    "snapshot": ("_snapshot", "_snapshot_key"),
+    "versioning": ("_watcher",),
+}
+
+
+def _seed(conn):
+    """
+    Jeu de données minimal : 3 salles, 2 matières, 2 enseignants, 2 groupes,
+    un étudiant rattaché au premier groupe. Aucun créneau.
+
+    Returns:
+        dict: Ids des lignes créées
+    """
+    cursor = conn.cursor()
+    ids = {}
+
+    def insert(sql, params):
+        cursor.execute(sql, params)
+        return cursor.lastrowid
+
+    ids["room_a"] = insert("INSERT INTO rooms (name, type, capacity, equipments) VALUES (?, ?, ?, ?)",
+                           ("A1", "TD", 30, "projecteur"))
+    ids["room_b"] = insert("INSERT INTO rooms (name, type, capacity, equipments) VALUES (?, ?, ?, ?)",
+                           ("B1", "Amphi", 120, "projecteur,micro"))
+    ids["room_c"] = insert("INSERT INTO rooms (name, type, capacity, equipments) VALUES (?, ?, ?, ?)",
+                           ("C1", "TP", 20, "ordinateurs"))
+    ids["subject"] = insert("INSERT INTO subjects (name, code, hours_total, type) VALUES (?, ?, ?, ?)",
+                            ("Algèbre", "ALG1", 40, "Cours"))
+    ids["subject_b"] = insert("INSERT INTO subjects (name, code, hours_total, type) VALUES (?, ?, ?, ?)",
+                              ("Bases de données", "BDD1", 30, "TD"))
+    for key, username, name in (("teacher", "prof1", "Alice Martin"), ("teacher_b", "prof2", "Bruno Petit")):
+        ids[f"{key}_user"] = insert("INSERT INTO users (username, password, role, full_name) VALUES (?, ?, ?, ?)",
+                                    (username, "x", "enseignant", name))
+        ids[key] = insert("INSERT INTO instructors (user_id, name) VALUES (?, ?)", (ids[f"{key}_user"], name))
+    ids["group"] = insert("INSERT INTO groups (name, student_count, filiere) VALUES (?, ?, ?)",
+                          ("LST AD", 25, "LST AD"))
+    ids["group_b"] = insert("INSERT INTO groups (name, student_count, filiere) VALUES (?, ?, ?)",
+                            ("MIPC G1", 40, "MIPC"))
+    ids["student"] = insert("INSERT INTO users (username, password, role, full_name) VALUES (?, ?, ?, ?)",
+                            ("etu1", "x", "etudiant", "Étudiant Un"))
+    insert("INSERT INTO student_groups (user_id, group_id) VALUES (?, ?)", (ids["student"], ids["group"]))
+    return ids
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    Base temporaire passée par database.setup() puis peuplée (voir _seed).
+
+    Returns:
+        dict: Ids des lignes du jeu de données
+    """
+    pytest.importorskip("bcrypt")  # setup() hache le mot de passe de l'administrateur
+    import database
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "test.db"))
+    for module_name, names in SHARED_STATE.items():
+        module = importlib.import_module(module_name)
+        for name in names:
+            monkeypatch.setattr(module, name, None)
+
+    database.setup()
+    conn = database.getConnection()
+    try:
+        ids = _seed(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return ids
+
+
+@pytest.fixture
+def conn(db):
+    """Connexion ouverte sur la base temporaire (fermée après le test)."""
+    import database
+    connection = database.getConnection()
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def make_slot(conn, db):
+    """Fabrique de créneaux insérés directement (sans contrôle de conflit)."""
+    def make(day, start_hour, duration=2, room="room_a", group="group",
+             instructor="teacher", subject="subject"):
+        cursor = conn.execute("""
+            INSERT INTO timetable (course_id, instructor_id, group_id, room_id, day, start_hour, duration)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (db[subject], db[instructor], db[group], db[room], day, start_hour, duration))
+        conn.commit()
+        return cursor.lastrowid
+    return make
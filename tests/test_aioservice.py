@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Façade asyncio : regroupement des lectures identiques simultanées.
+"""
+
+import asyncio
+
+import aioservice
+from controllers.teacher_controller import TeacherController
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_identical_reads_are_coalesced(db):
+    async def scenario():
+        async with aioservice.AsyncReadService(max_workers=2) as service:
+            results = await asyncio.gather(*[service.get_group_timetable(db["student"]) for _ in range(10)])
+            return service, results
+
+    service, results = _run(scenario())
+    assert service.executions + service.coalesced == 10
+    assert service.executions < 10
+    assert all(result == results[0] for result in results)
+
+
+def test_equipment_list_key_is_hashable(db):
+    async def scenario():
+        async with aioservice.AsyncReadService(max_workers=2) as service:
+            results = await asyncio.gather(
+                service.search_available_room(1, 8, 2, 10, ["projecteur", "micro"]),
+                service.search_available_room(1, 8, 2, 10, ["micro", "projecteur"]),
+                service.search_available_room(1, 8, 2, 10, {"projecteur"}),
+            )
+            return service, results
+
+    service, results = _run(scenario())
+    assert results[0] == results[1]
+    assert results[0] == TeacherController(None).search_available_room(1, 8, 2, 10, ["projecteur", "micro"])
+    assert sorted(room["nom"] for room in results[2]["rooms"]) == ["A1", "B1"]
+    assert [room["nom"] for room in results[0]["rooms"]] == ["B1"]
+    assert service.executions + service.coalesced == 3
+
+
+def test_unhashable_key_runs_without_coalescing(db):
+    async def scenario():
+        async with aioservice.AsyncReadService(max_workers=1) as service:
+            result = await service._call(("lecture", [1, 2]), lambda: 42)
+            return service, result
+
+    service, result = _run(scenario())
+    assert result == 42
+    assert service.executions == 1
+
+
+def test_reads_stay_on_the_read_only_pool(db, monkeypatch):
+    import database
+    import queries
+
+    def forbidden():
+        raise AssertionError("connexion hors du pool en lecture seule")
+
+    monkeypatch.setattr(database, "getConnection", forbidden)
+    queries.reset_stats()
+
+    async def scenario():
+        async with aioservice.AsyncReadService(max_workers=2) as service:
+            return await service.search_free_room(1, 8, 2)
+
+    result = _run(scenario())
+    assert sorted(room["nom"] for room in result["rooms"]) == ["A1", "B1", "C1"]
+    stats = queries.get_stats()
+    assert stats["data_versions"]["calls"] >= 1
+    assert "first_active_group" not in stats and "student_group" not in stats
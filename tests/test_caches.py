@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Invalidation des caches : données de référence, moteur de salles libres,
+instantané publié et exports rendus sur disque.
+"""
+
+import os
+
+import availability
+import refdata
+import snapshot
+import versioning
+from controllers import export_cache
+from controllers.admin_controller import AdminController
+from controllers.student_controller import StudentController
+from controllers.teacher_controller import TeacherController
+
+
+# --- Données de référence ---
+
+def test_refdata_reloads_changed_table_only(conn, db):
+    cache = refdata.ReferenceCache()
+    rooms = cache.rows("rooms")
+    groups = cache.rows("groups")
+    assert cache.rows("rooms") is rooms
+
+    conn.execute("UPDATE rooms SET capacity = 45, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (db["room_a"],))
+    conn.commit()
+
+    assert cache.get("rooms", db["room_a"])["capacity"] == 45
+    assert cache.rows("groups") is groups
+
+
+def test_refdata_timestamp_only_update_keeps_cache(conn):
+    cache = refdata.ReferenceCache()
+    rooms = cache.rows("rooms")
+    conn.execute("UPDATE rooms SET updated_at = '2020-01-01 00:00:00'")
+    conn.commit()
+    assert cache.rows("rooms") is rooms
+
+
+def test_refdata_watched_cache_waits_for_poll(conn, db):
+    watcher = versioning.DataVersionWatcher()
+    watcher.poll()
+    cache = refdata.ReferenceCache()
+    cache.watch(watcher)
+    assert cache.find("rooms", name="A1")["id"] == db["room_a"]
+
+    conn.execute("UPDATE rooms SET name = 'A2' WHERE id = ?", (db["room_a"],))
+    conn.commit()
+    # Sans scrutation, le cache sert encore l'ancienne ligne (aucune requête)
+    assert cache.find("rooms", name="A1") is not None
+
+    watcher.poll()
+    assert cache.find("rooms", name="A1") is None
+    assert cache.find("rooms", name="A2")["id"] == db["room_a"]
+
+
+# --- Moteur de salles libres ---
+
+def test_availability_engine_rebuilt_on_change(conn, db, make_slot):
+    engine = availability.get_engine()
+    assert availability.get_engine() is engine
+    assert engine.is_free(db["room_a"], 1, 8, 2)
+
+    make_slot(1, 8, 2)
+    rebuilt = availability.get_engine()
+    assert rebuilt is not engine
+    assert not rebuilt.is_free(db["room_a"], 1, 8, 2)
+
+    # Une table sans rapport (matières) ne reconstruit pas le moteur
+    conn.execute("UPDATE subjects SET hours_total = hours_total + 1")
+    conn.commit()
+    assert availability.get_engine() is rebuilt
+
+
+def test_availability_counts_approved_reservations_only(conn, db):
+    conn.execute("""
+        INSERT INTO reservations (instructor_id, room_id, group_id, day, start_hour, duration, status)
+        VALUES (?, ?, ?, 2, 10, 2, 'PENDING')
+    """, (db["teacher"], db["room_b"], db["group"]))
+    conn.commit()
+    assert availability.get_engine().is_free(db["room_b"], 2, 10, 2)
+
+    conn.execute("UPDATE reservations SET status = 'APPROVED', updated_at = CURRENT_TIMESTAMP")
+    conn.commit()
+    assert not availability.get_engine().is_free(db["room_b"], 2, 10, 2)
+
+
+# --- Instantané publié ---
+
+def test_snapshot_republished_by_admin_writes(conn, db):
+    admin = AdminController(1)
+    snapshot.publish()
+    published = snapshot.get_snapshot()
+    student = StudentController(db["student"], use_snapshot=True)
+
+    assert admin.creer_creneau(db["subject"], db["teacher"], db["group"], db["room_a"], 1, 8, 2)
+    assert snapshot.get_snapshot() is not published
+    timetable = student.get_group_timetable()
+    assert timetable == StudentController(db["student"]).get_group_timetable()
+    assert any(timetable["emploi_du_temps"].values())
+
+    reservation = TeacherController(db["teacher_b_user"]).submit_reservation("B1", "MIPC G1", 2, 10, 2)
+    published = snapshot.get_snapshot()
+    admin.valider_reservations([reservation["reservation_id"]])
+    assert snapshot.get_snapshot() is not published
+    assert "B1" not in [room["nom"] for room in student.search_free_room(2, 10, 2)["rooms"]]
+
+
+def test_snapshot_kept_when_copied_content_is_unchanged(conn, db):
+    snapshot.publish()
+    published = snapshot.get_snapshot()
+    key = snapshot._snapshot_key
+
+    # Demande en attente et indisponibilité : rien de ce qui est copié ne change
+    teacher = TeacherController(db["teacher_user"])
+    reservation = teacher.submit_reservation("A1", "LST AD", 3, 8, 2)
+    assert teacher.declare_unavailability(3, 14, 2)["success"]
+    assert snapshot.get_snapshot() is published
+
+    AdminController(1).rejeter_reservation(reservation["reservation_id"])
+    assert snapshot.refresh()["changed"] is False
+    assert snapshot.get_snapshot() is published
+    assert snapshot._snapshot_key == key
+
+
+def test_snapshot_reads_do_not_query_main_database(conn, db, monkeypatch):
+    snapshot.publish()
+    snapshot.get_snapshot()
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("lecture de la base principale")
+
+    monkeypatch.setattr(snapshot, "getConnection", forbidden)
+    monkeypatch.setattr(versioning, "get_versions", forbidden)
+    assert snapshot.get_snapshot().group_of_student(db["student"]) == db["group"]
+
+
+def test_refresh_without_published_snapshot(db):
+    assert snapshot.refresh() is None
+    assert snapshot.get_snapshot() is None
+
+
+def test_teacher_identity_read_from_main_database(conn, db):
+    snapshot.publish()
+    conn.execute("UPDATE instructors SET user_id = NULL WHERE id = ?", (db["teacher"],))
+    conn.execute("UPDATE instructors SET user_id = ? WHERE id = ?", (db["teacher_user"], db["teacher_b"]))
+    conn.commit()
+    assert TeacherController(db["teacher_user"], use_snapshot=True).instructor_id == db["teacher_b"]
+
+
+# --- Exports rendus sur disque ---
+
+def _rows(room="A1"):
+    return [{"day": 1, "start_hour": 8, "subject": "Algèbre", "room": room, "group_name": "LST AD"}]
+
+
+def test_export_cache_renders_once_per_content(tmp_path):
+    cache = export_cache.ExportCache(str(tmp_path / "exports"))
+    renders = []
+
+    def render(stream):
+        renders.append(1)
+        stream.write(b"rendu %d" % len(renders))
+
+    first = cache.get_or_render_bytes("LST AD", "pdf", _rows(), render)
+    assert cache.get_or_render_bytes("LST AD", "pdf", _rows(), render) == first
+    assert len(renders) == 1
+
+    # Lignes modifiées (salle changée) : nouvelle empreinte, nouveau rendu
+    assert cache.get_or_render_bytes("LST AD", "pdf", _rows(room="B1"), render) != first
+    assert cache.get_or_render_bytes("LST AD", "xlsx", _rows(), render) != first
+    assert len(renders) == 3
+
+
+def test_export_cache_evicts_least_recently_used(tmp_path):
+    cache = export_cache.ExportCache(str(tmp_path / "exports"), max_bytes=250)
+    payload = b"x" * 100
+
+    def write(path):
+        with open(path, "wb") as f:
+            f.write(payload)
+
+    old = cache.put("a", "pdf", write)
+    recent = cache.put("b", "pdf", write)
+    os.utime(old, (1, 1))
+    os.utime(recent, (2, 2))
+    assert cache.get("a", "pdf") == old  # accès : "a" redevient la plus récente
+
+    newest = cache.put("c", "pdf", write)
+
+    assert cache.get("b", "pdf") is None
+    assert os.path.exists(old) and os.path.exists(newest)
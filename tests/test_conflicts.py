@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Détection des conflits : index d'occupation (check_conflict), requête de
+conflits (conflicts.find_conflicts) et validation groupée (select_compatible).
+"""
+
+import pytest
+
+import conflicts
+import database
+import occupancy
+from controllers.admin_controller import AdminController
+from controllers.teacher_controller import TeacherController
+
+
+def _reserve(conn, db, day, start_hour, duration=2, status="PENDING", room="room_a",
+             group="group", instructor="teacher"):
+    cursor = conn.execute("""
+        INSERT INTO reservations (instructor_id, room_id, group_id, day, start_hour, duration, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (db[instructor], db[room], db[group], day, start_hour, duration, status))
+    conn.commit()
+    return cursor.lastrowid
+
+
+# --- check_conflict (index d'occupation en mémoire) ---
+
+@pytest.mark.parametrize("start_hour, duration, expected", [
+    (8, 2, True),    # même plage
+    (9, 1, True),    # incluse
+    (7, 2, True),    # chevauche le début
+    (11, 2, True),   # chevauche la fin
+    (6, 2, False),   # se termine quand le cours commence
+    (12, 2, False),  # commence quand le cours se termine
+])
+def test_check_conflict_boundaries(db, make_slot, start_hour, duration, expected):
+    make_slot(1, 8, 4)
+    conflict = database.check_conflict(db["teacher_b"], db["group_b"], db["room_a"], 1, start_hour, duration)
+    assert (conflict is not None) == expected
+
+
+def test_check_conflict_each_entity(db, make_slot):
+    make_slot(1, 8, 2)
+    assert "Enseignant" in database.check_conflict(db["teacher"], db["group_b"], db["room_b"], 1, 8, 2)
+    assert "Groupe" in database.check_conflict(db["teacher_b"], db["group"], db["room_b"], 1, 8, 2)
+    assert "Salle" in database.check_conflict(db["teacher_b"], db["group_b"], db["room_a"], 1, 8, 2)
+    assert database.check_conflict(db["teacher_b"], db["group_b"], db["room_b"], 1, 8, 2) is None
+    assert database.check_conflict(db["teacher"], db["group"], db["room_a"], 2, 8, 2) is None
+
+
+def test_check_conflict_unavailability(conn, db):
+    conn.execute("""
+        INSERT INTO teacher_unavailability (instructor_id, day, start_hour, duration)
+        VALUES (?, 3, 10, 2)
+    """, (db["teacher"],))
+    conn.commit()
+    assert "indisponible" in database.check_conflict(db["teacher"], db["group"], db["room_a"], 3, 11, 1)
+
+
+def test_check_conflict_sees_writes_from_other_connections(conn, db, make_slot):
+    assert database.check_conflict(db["teacher"], db["group"], db["room_a"], 1, 8, 2) is None
+    assert occupancy.get_index() is occupancy.get_index()  # chargé une fois, pas de rechargement inutile
+
+    # Écriture par une autre connexion (autre processus) : aucun crochet en mémoire
+    slot_id = make_slot(1, 8, 2)
+    assert database.check_conflict(db["teacher"], db["group"], db["room_a"], 1, 8, 2) is not None
+
+    conn.execute("DELETE FROM timetable WHERE id = ?", (slot_id,))
+    conn.commit()
+    assert database.check_conflict(db["teacher"], db["group"], db["room_a"], 1, 8, 2) is None
+
+
+def test_insert_schedule_slot_refuses_conflicts(conn, db):
+    args = (db["subject"], db["teacher"], db["group"], db["room_a"], 4, 10, 2)
+    assert database.insert_schedule_slot(*args) is True
+    assert database.insert_schedule_slot(*args) is False
+    assert conn.execute("SELECT count(*) FROM timetable").fetchone()[0] == 1
+
+
+def test_own_writes_update_index_without_reload(conn, db):
+    index = occupancy.get_index()
+    assert database.insert_schedule_slot(db["subject"], db["teacher"], db["group"], db["room_a"], 4, 10, 2)
+    assert TeacherController(db["teacher_b_user"]).declare_unavailability(4, 14, 2)["success"]
+    reservation = _reserve(conn, db, 4, 8, 2, room="room_b", group="group_b", instructor="teacher_b")
+    # L'INSERT de _reserve (autre connexion, hors crochet) recharge l'index une fois
+    index = occupancy.get_index()
+    AdminController(1).valider_reservations([reservation])
+
+    assert occupancy.get_index() is index
+    assert not index.is_free(occupancy.ROOM, db["room_a"], 4, 10, 2)
+    assert not index.is_free(occupancy.INSTRUCTOR, db["teacher_b"], 4, 15, 1)
+    assert not index.is_free(occupancy.ROOM, db["room_b"], 4, 8, 1)
+
+
+def test_hook_drops_index_after_foreign_write(conn, db, make_slot):
+    index = occupancy.get_index()
+    make_slot(1, 8, 2)  # écriture d'un autre processus, pas encore vue par l'index
+    assert TeacherController(db["teacher_b_user"]).declare_unavailability(2, 10, 2)["success"]
+    assert occupancy._index is None  # état précédent inconnu : l'index est oublié
+
+    reloaded = occupancy.get_index()
+    assert reloaded is not index
+    assert not reloaded.is_free(occupancy.ROOM, db["room_a"], 1, 8, 2)
+    assert not reloaded.is_free(occupancy.INSTRUCTOR, db["teacher_b"], 2, 10, 2)
+
+
+# --- conflicts.find_conflicts (une requête sur la base) ---
+
+def test_find_conflicts_lists_every_source(conn, db, make_slot):
+    slot_id = make_slot(2, 8, 2)
+    approved = _reserve(conn, db, 2, 9, 2, status="APPROVED", room="room_b", group="group_b")
+    pending = _reserve(conn, db, 2, 10, 1, room="room_c", group="group_b", instructor="teacher_b")
+    _reserve(conn, db, 2, 9, 1, status="REJECTED")
+    conn.execute("""
+        INSERT INTO teacher_unavailability (instructor_id, day, start_hour, duration)
+        VALUES (?, 2, 10, 1)
+    """, (db["teacher"],))
+    conn.commit()
+
+    found = conflicts.find_conflicts(conn.cursor(), 2, 9, 2, instructor_id=db["teacher"],
+                                     group_id=db["group"], room_id=db["room_c"])
+    by_source = {(c["source"], c["id"]) for c in found}
+    assert (conflicts.SOURCE_TIMETABLE, slot_id) in by_source
+    assert (conflicts.SOURCE_RESERVATION, approved) in by_source
+    assert (conflicts.SOURCE_PENDING, pending) in by_source
+    assert conflicts.SOURCE_UNAVAILABILITY in {source for source, _ in by_source}
+    # Ordre : enseignant, groupe puis salle
+    dimensions = [c["dimension"] for c in found]
+    assert dimensions == sorted(dimensions, key=[occupancy.INSTRUCTOR, occupancy.GROUP, occupancy.ROOM].index)
+
+    without_pending = conflicts.find_conflicts(conn.cursor(), 2, 9, 2, room_id=db["room_c"],
+                                               include_pending=False)
+    assert without_pending == []
+
+
+def test_find_conflicts_adjacent_slots(conn, db, make_slot):
+    make_slot(2, 8, 2)
+    cursor = conn.cursor()
+    assert conflicts.find_conflicts(cursor, 2, 10, 2, room_id=db["room_a"]) == []
+    assert conflicts.find_conflicts(cursor, 2, 6, 2, room_id=db["room_a"]) == []
+    assert len(conflicts.find_conflicts(cursor, 2, 9, 2, room_id=db["room_a"])) == 1
+    assert conflicts.find_conflicts(cursor, 2, 9, 2) == []
+
+
+# --- Validation groupée ---
+
+def test_select_compatible_keeps_submission_order():
+    index = conflicts.IntervalIndex()
+    index.add(conflicts.SOURCE_TIMETABLE, 1, [(occupancy.ROOM, 10)], 1, 8, 2)
+    candidates = [
+        {"id": 1, "instructor_id": 1, "group_id": 1, "room_id": 10, "day": 1, "start_hour": 9, "duration": 1},
+        {"id": 2, "instructor_id": 1, "group_id": 1, "room_id": 11, "day": 1, "start_hour": 10, "duration": 2},
+        {"id": 3, "instructor_id": 2, "group_id": 2, "room_id": 11, "day": 1, "start_hour": 11, "duration": 1},
+        {"id": 4, "instructor_id": 2, "group_id": 2, "room_id": 11, "day": 1, "start_hour": 12, "duration": 1},
+    ]
+    accepted, rejected = conflicts.select_compatible(index, candidates)
+
+    assert [row["id"] for row in accepted] == [2, 4]
+    assert set(rejected) == {1, 3}
+    assert "cours #1" in rejected[1][0]
+    assert "réservation du même lot #2" in rejected[3][0]
+
+
+def test_valider_reservations_approves_only_compatible(conn, db, make_slot):
+    make_slot(3, 8, 2)
+    clash = _reserve(conn, db, 3, 9, 1, group="group_b", instructor="teacher_b")
+    first = _reserve(conn, db, 3, 14, 2, room="room_b", group="group_b", instructor="teacher_b")
+    second = _reserve(conn, db, 3, 15, 1, room="room_b")
+
+    result = AdminController(1).valider_reservations([clash, first, second, 999])
+
+    assert result["approved"] == [first]
+    assert set(result["rejected"]) == {clash, second, 999}
+    statuses = dict(conn.execute("SELECT id, status FROM reservations").fetchall())
+    assert statuses == {clash: "PENDING", first: "APPROVED", second: "PENDING"}
+    # La réservation approuvée occupe désormais la salle dans l'index d'occupation
+    assert not occupancy.get_index().is_free(occupancy.ROOM, db["room_b"], 3, 14, 1)
+
+
+def test_submit_reservation_checks_pending_requests(conn, db):
+    teacher = TeacherController(db["teacher_user"])
+    other = TeacherController(db["teacher_b_user"])
+
+    first = teacher.submit_reservation("A1", "LST AD", 4, 14, 2)
+    assert first["success"]
+    # Même salle, chevauchement avec une demande encore en attente
+    second = other.submit_reservation("A1", "MIPC G1", 4, 15, 1)
+    assert not second["success"]
+    assert [c["source"] for c in second["conflicts"]] == [conflicts.SOURCE_PENDING]
+    assert other.submit_reservation("A1", "MIPC G1", 4, 16, 1)["success"]
+    assert conn.execute("SELECT count(*) FROM reservations").fetchone()[0] == 2
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Imports au démarrage : les bibliothèques lourdes ne sont chargées qu'à l'usage.
+
+Chaque vérification tourne dans un interpréteur neuf (sys.modules vide) avec
+le même sys.path que les tests.
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Chargées seulement par l'export (PDF, Excel, PNG) et le hachage des mots de passe
+HEAVY_MODULES = ("reportlab", "openpyxl", "PIL", "bcrypt")
+
+
+def _loaded_heavy_modules(statements):
+    """Exécute des imports dans un nouveau processus et liste les modules lourds chargés."""
+    code = "\n".join(statements + [
+        "import sys",
+        f"print('HEAVY:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+    ])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT] + sys.path))
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    # Dernière ligne : certains modules affichent un bandeau à l'import
+    last_line = result.stdout.strip().splitlines()[-1]
+    assert last_line.startswith("HEAVY:")
+    return [name for name in last_line[len("HEAVY:"):].split(",") if name]
+
+
+def test_controllers_import_is_light():
+    loaded = _loaded_heavy_modules([
+        "import controllers",
+        "from controllers import AdminController, StudentController, TeacherController",
+        "import controllers.planning_export",
+    ])
+    assert loaded == []
+
+
+def test_console_startup_is_light():
+    assert _loaded_heavy_modules(["import main"]) == []
+
+
+@pytest.mark.skipif(importlib.util.find_spec("tkinter") is None, reason="tkinter absent")
+def test_gui_startup_is_light():
+    assert _loaded_heavy_modules(["import gui"]) == []
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Migrations du schéma et triggers (data_version, statistiques, change_log).
+"""
+
+import pytest
+
+import changelog
+import database
+import versioning
+
+
+def _schema(conn):
+    """Définitions de toutes les tables, index et triggers."""
+    return sorted(tuple(row) for row in conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"))
+
+
+def _stats(conn):
+    """Contenu des tables de statistiques matérialisées."""
+    return {
+        table: sorted(tuple(row) for row in conn.execute(f"SELECT * FROM {table}"))
+        for table in ("stats_counters", "room_stats")
+    }
+
+
+# --- Migrations ---
+
+def test_setup_applies_every_migration(conn):
+    assert database.get_schema_version(conn) == database.MIGRATIONS[-1][0]
+    versions = [version for version, _ in database.MIGRATIONS]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_setup_twice_changes_nothing(conn):
+    before = _schema(conn)
+    database.setup()
+    assert database.migrate(conn) == database.MIGRATIONS[-1][0]
+    assert _schema(conn) == before
+
+
+def test_replaying_migrations_is_idempotent(conn, make_slot):
+    make_slot(1, 8)
+    conn.execute("UPDATE rooms SET capacity = 35 WHERE name = 'A1'")
+    conn.commit()
+    schema, stats, versions = _schema(conn), _stats(conn), versioning.get_versions()
+
+    conn.execute("PRAGMA user_version = 0")
+    assert database.migrate(conn) == database.MIGRATIONS[-1][0]
+
+    assert _schema(conn) == schema
+    assert _stats(conn) == stats
+    assert versioning.get_versions() == versions
+
+
+def test_migration_drops_legacy_timestamp_triggers(conn):
+    # Trigger des bases d'avant les migrations : réécrit la ligne après chaque UPDATE
+    conn.execute("""
+        CREATE TRIGGER update_rooms_timestamp AFTER UPDATE ON rooms
+        FOR EACH ROW BEGIN
+            UPDATE rooms SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+
+    database.migrate(conn)
+
+    assert conn.execute("""
+        SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'update_%_timestamp'
+    """).fetchone()[0] == 0
+
+
+def test_failed_migration_rolls_back(conn, monkeypatch):
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    latest = database.MIGRATIONS[-1][0]
+    monkeypatch.setattr(database, "MIGRATIONS", database.MIGRATIONS + [(latest + 1, broken)])
+    with pytest.raises(RuntimeError):
+        database.migrate(conn)
+
+    assert database.get_schema_version(conn) == latest
+    assert conn.execute("SELECT count(*) FROM sqlite_master WHERE name = 'half_done'").fetchone()[0] == 0
+
+
+# --- updated_at et data_version ---
+
+@pytest.mark.parametrize("assignments", [
+    "capacity = capacity + 1, updated_at = CURRENT_TIMESTAMP",
+    "capacity = capacity + 1",
+])
+def test_update_writes_each_row_once(conn, assignments):
+    before = conn.total_changes
+    conn.execute(f"UPDATE rooms SET {assignments}")
+    conn.commit()
+    room_count = conn.execute("SELECT count(*) FROM rooms").fetchone()[0]
+    # Une écriture par salle et une incrémentation de data_version par salle
+    assert conn.total_changes - before == 2 * room_count
+
+
+def test_data_version_counts_changed_rows(conn):
+    before = versioning.get_version("rooms")
+    conn.execute("UPDATE rooms SET capacity = capacity + 1, updated_at = CURRENT_TIMESTAMP")
+    conn.commit()
+    room_count = conn.execute("SELECT count(*) FROM rooms").fetchone()[0]
+    assert versioning.get_version("rooms") == before + room_count
+
+
+def test_data_version_ignores_timestamp_only_updates(conn):
+    before = versioning.get_versions()
+    conn.execute("UPDATE rooms SET updated_at = '2020-01-01 00:00:00'")
+    conn.execute("UPDATE timetable SET updated_at = CURRENT_TIMESTAMP")
+    conn.commit()
+    assert versioning.get_versions() == before
+
+
+def test_data_version_tracks_every_table(conn, db):
+    assert set(versioning.get_versions()) == set(database.TRACKED_TABLES)
+
+    before = versioning.get_version("student_groups")
+    conn.execute("UPDATE student_groups SET group_id = ? WHERE user_id = ?", (db["group_b"], db["student"]))
+    conn.commit()
+    assert versioning.get_version("student_groups") == before + 1
+
+
+def test_watcher_reports_changed_tables(conn):
+    watcher = versioning.DataVersionWatcher()
+    seen = []
+    watcher.subscribe(seen.append, ("rooms", "groups"))
+    watcher.poll()
+
+    conn.execute("UPDATE rooms SET capacity = 99 WHERE name = 'A1'")
+    conn.execute("UPDATE subjects SET hours_total = 10")
+    conn.commit()
+    watcher.poll()
+
+    assert seen == [{"rooms"}]
+
+
+# --- Statistiques matérialisées ---
+
+def test_stats_triggers_match_rebuild(conn, db, make_slot):
+    first = make_slot(1, 8, 2)
+    second = make_slot(1, 9, 3, room="room_b", group="group_b", instructor="teacher_b")
+    make_slot(2, 14, 2)
+    conn.execute("UPDATE timetable SET room_id = ?, start_hour = 10 WHERE id = ?", (db["room_c"], first))
+    conn.execute("DELETE FROM timetable WHERE id = ?", (second,))
+    conn.execute("""
+        INSERT INTO reservations (instructor_id, room_id, group_id, day, start_hour, duration)
+        VALUES (?, ?, ?, 3, 8, 2), (?, ?, ?, 3, 10, 2)
+    """, (db["teacher"], db["room_a"], db["group"]) * 2)
+    conn.execute("UPDATE reservations SET status = 'APPROVED' WHERE start_hour = 8")
+    conn.execute("UPDATE reservations SET status = 'REJECTED' WHERE start_hour = 10")
+    conn.commit()
+
+    maintained = _stats(conn)
+    database.rebuild_stats(conn.cursor())
+    conn.commit()
+    assert _stats(conn) == maintained
+
+    counters = dict(maintained["stats_counters"])
+    assert counters["timetable"] == 2
+    assert counters["reservations:APPROVED"] == 1
+    assert counters["reservations:REJECTED"] == 1
+    assert counters["reservations:PENDING"] == 0
+
+
+# --- Journal des modifications ---
+
+def test_change_log_records_key_changes_only(conn, db, make_slot):
+    feed = changelog.ChangeFeed()
+    slot_id = make_slot(1, 8)
+    conn.execute("UPDATE timetable SET start_hour = 10 WHERE id = ?", (slot_id,))
+    conn.execute("UPDATE timetable SET updated_at = '2020-01-01 00:00:00' WHERE id = ?", (slot_id,))
+    conn.execute("DELETE FROM timetable WHERE id = ?", (slot_id,))
+    conn.commit()
+
+    changes = feed.poll()
+    assert [change["op"] for change in changes] == [changelog.INSERT, changelog.UPDATE, changelog.DELETE]
+    assert all(change["row_id"] == slot_id for change in changes)
+    assert changes[1]["old"]["start_hour"] == 8
+    assert changes[1]["new"]["start_hour"] == 10
+    assert changes[2]["old"]["room_id"] == db["room_a"]
+    assert changes[2]["new"] is None
+    assert [change["seq"] for change in changes] == list(range(changes[0]["seq"], changes[0]["seq"] + 3))
+    assert feed.seq == changelog.last_seq()
+    assert feed.poll() == []
+
+
+def test_change_feed_filters_tables_and_pages(conn, db, make_slot):
+    feed = changelog.ChangeFeed(tables=("reservations",))
+    make_slot(1, 8)
+    make_slot(2, 8)
+    conn.execute("""
+        INSERT INTO reservations (instructor_id, room_id, group_id, day, start_hour, duration)
+        VALUES (?, ?, ?, 3, 8, 2)
+    """, (db["teacher"], db["room_a"], db["group"]))
+    conn.commit()
+
+    assert feed.poll(limit=2) == []
+    assert not feed.caught_up
+    changes = feed.poll(limit=2)
+    assert [change["table"] for change in changes] == ["reservations"]
+    assert feed.caught_up
+
+
+def test_change_feed_detects_gap(conn, make_slot):
+    feed = changelog.ChangeFeed()
+    make_slot(1, 8)
+    make_slot(2, 8)
+    # Journal purgé à la main : le premier changement non lu a disparu
+    conn.execute("DELETE FROM change_log WHERE seq = ?", (feed.seq + 1,))
+    conn.commit()
+
+    with pytest.raises(changelog.GapError):
+        feed.poll()
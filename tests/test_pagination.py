@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Pagination par clé de l'emploi du temps complet (pagination.SchedulePager).
+"""
+
+import pytest
+
+import pagination
+import queries
+
+
+def _read_all(pager):
+    """Lit toutes les pages ; retourne (ids dans l'ordre, tailles des pages)."""
+    ids, sizes = [], []
+    while not pager.exhausted:
+        page = pager.next_page()
+        sizes.append(len(page))
+        ids += [row["id"] for row in page]
+    return ids, sizes
+
+
+def _expected(order_by, where="", params=()):
+    """Ids attendus, lus d'un coup avec la même jointure."""
+    sql = pagination.SCHEDULE_SQL + (f" WHERE {where}" if where else "") + f" ORDER BY {order_by}"
+    return [row["id"] for row in queries.fetchall_sql("test_schedule", sql, params)]
+
+
+@pytest.fixture
+def schedule(make_slot):
+    """Douze créneaux, dont plusieurs au même jour et à la même heure (clé de tri ex aequo)."""
+    ids = []
+    for day in (1, 2, 3):
+        for start_hour, room, subject in ((8, "room_a", "subject"), (8, "room_b", "subject_b"),
+                                          (10, "room_a", "subject_b"), (14, "room_c", "subject")):
+            ids.append(make_slot(day, start_hour, 2, room=room, subject=subject))
+    return ids
+
+
+@pytest.mark.parametrize("page_size, sizes", [
+    (5, [5, 5, 2]),
+    (4, [4, 4, 4, 0]),   # multiple exact : une dernière page vide confirme la fin
+    (12, [12, 0]),
+    (50, [12]),
+])
+def test_pages_cover_every_row_once(schedule, page_size, sizes):
+    ids, page_sizes = _read_all(pagination.SchedulePager(page_size=page_size))
+    assert page_sizes == sizes
+    assert ids == _expected("t.day, t.start_hour, t.id")
+    assert sorted(ids) == sorted(schedule)
+
+
+def test_exhausted_pager_returns_nothing(schedule):
+    pager = pagination.SchedulePager(page_size=50)
+    pager.next_page()
+    assert pager.exhausted
+    assert pager.next_page() == []
+
+
+@pytest.mark.parametrize("sort, order_by", [
+    ("subject", "s.name {d}, t.day {d}, t.start_hour {d}, t.id {d}"),
+    ("room", "r.name {d}, t.day {d}, t.start_hour {d}, t.id {d}"),
+    ("hour", "t.start_hour {d}, t.day {d}, t.id {d}"),
+])
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_with_ties_across_page_boundaries(schedule, sort, order_by, descending):
+    direction = "DESC" if descending else "ASC"
+    ids, _ = _read_all(pagination.SchedulePager(sort=sort, descending=descending, page_size=3))
+    assert ids == _expected(order_by.format(d=direction))
+
+
+def test_day_filter_and_search(schedule):
+    ids, _ = _read_all(pagination.SchedulePager(day=2, search="bases", page_size=1))
+    assert ids == _expected("t.day, t.start_hour, t.id", "t.day = ? AND s.name LIKE ?", (2, "%Bases%"))
+    assert len(ids) == 2
+
+
+def test_search_escapes_like_wildcards(schedule):
+    assert _read_all(pagination.SchedulePager(search="%"))[0] == []
+    assert _read_all(pagination.SchedulePager(search="_"))[0] == []
+
+
+def test_unknown_sort_column():
+    with pytest.raises(ValueError):
+        pagination.SchedulePager(sort="created_at")
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Recherche de salles vacantes : classement limité (top-k) et équipements.
+"""
+
+import recommender
+from controllers.teacher_controller import TeacherController
+
+
+def test_search_returns_top_k_by_default(conn, db):
+    for i in range(recommender.DEFAULT_TOP_K + 2):
+        conn.execute("INSERT INTO rooms (name, type, capacity) VALUES (?, 'TD', 40)", (f"D{i}",))
+    conn.commit()
+    teacher = TeacherController(db["teacher_user"])
+
+    result = teacher.search_available_room(1, 8, 2, 10)
+    assert result["count"] == recommender.DEFAULT_TOP_K
+    assert teacher.search_available_room(1, 8, 2, 10, top_k=None)["count"] == recommender.DEFAULT_TOP_K + 5  # + A1, B1, C1
+
+
+def test_equipment_matches_substrings(conn, db):
+    conn.execute("UPDATE rooms SET equipments = 'Projecteur HD, micro' WHERE id = ?", (db["room_c"],))
+    conn.commit()
+    teacher = TeacherController(db["teacher_user"])
+
+    rooms = teacher.search_available_room(1, 8, 2, 10, "projecteur", top_k=None)["rooms"]
+    assert sorted(room["nom"] for room in rooms) == ["A1", "B1", "C1"]
+    rooms = teacher.search_available_room(1, 8, 2, 10, ["projecteur hd", "micro"], top_k=None)["rooms"]
+    assert [room["nom"] for room in rooms] == ["C1"]
+    assert teacher.search_available_room(1, 8, 2, 10, "tableau", top_k=None)["rooms"] == []
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+API HTTP locale : ETag calculés sur data_version et cache de réponses.
+"""
+
+import json
+import threading
+import urllib.request
+from urllib.error import HTTPError
+
+import pytest
+
+import webapi
+
+
+@pytest.fixture
+def api(db):
+    """Serveur de l'API sur un port libre ; retourne une fonction get(chemin, etag)."""
+    server = webapi.make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def get(path, etag=None):
+        request = urllib.request.Request(base + path)
+        if etag:
+            request.add_header("If-None-Match", etag)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers.get("ETag"), response.read()
+        except HTTPError as e:
+            return e.code, e.headers.get("ETag"), e.read()
+
+    yield get
+    server.shutdown()
+    server.server_close()
+
+
+def test_etag_revalidation(api, db, conn, make_slot):
+    path = f"/api/students/{db['student']}/timetable"
+    status, etag, body = api(path)
+    assert status == 200 and etag.startswith('W/"')
+    assert json.loads(body)["groupe"] == "LST AD"
+
+    assert api(path, etag)[:2] == (304, etag)
+
+    # Table dont la route ne dépend pas : même ETag
+    conn.execute("""
+        INSERT INTO reservations (instructor_id, room_id, group_id, day, start_hour, duration)
+        VALUES (?, ?, ?, 1, 8, 2)
+    """, (db["teacher"], db["room_a"], db["group"]))
+    conn.commit()
+    assert api(path, etag)[0] == 304
+
+    make_slot(1, 8, 2)
+    status, new_etag, _ = api(path, etag)
+    assert status == 200 and new_etag != etag
+
+
+def test_student_routes_follow_group_changes(api, db, conn):
+    path = f"/api/students/{db['student']}/timetable"
+    _, etag, _ = api(path)
+
+    conn.execute("UPDATE student_groups SET group_id = ? WHERE user_id = ?", (db["group_b"], db["student"]))
+    conn.commit()
+
+    status, new_etag, body = api(path, etag)
+    assert status == 200 and new_etag != etag
+    assert json.loads(body)["groupe"] == "MIPC G1"
+
+
+def test_cached_response_skips_controller(api, db, monkeypatch):
+    calls = []
+    pattern, handler, tables, extra_key = webapi.ROUTES[0]
+    counted = (pattern, lambda *args: calls.append(1) or handler(*args), tables, extra_key)
+    monkeypatch.setattr(webapi, "ROUTES", [counted] + webapi.ROUTES[1:])
+    path = f"/api/students/{db['student']}/timetable"
+
+    first = api(path)
+    second = api(path)
+    assert second == first
+    assert len(calls) == 1
+
+
+def test_errors(api):
+    assert api("/api/inconnue")[0] == 404
+    status, _, body = api("/api/rooms/free?day=9")
+    assert status == 400
+    assert json.loads(body)["success"] is False
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Suivi des versions de données et notifications de changement.
+
+Chaque table listée dans database.TRACKED_TABLES possède un compteur dans la
+table `data_version`, incrémenté par trigger à chaque INSERT, UPDATE ou DELETE.
+Lire ces compteurs coûte une seule petite requête : les caches (contrôleurs,
+interface graphique) peuvent ainsi savoir précisément quelles tables ont changé
+au lieu de tout relire.
+
+Deux façons de l'utiliser :
+- lecture directe : get_versions() / get_version("timetable")
+- abonnement : get_watcher().subscribe(callback, tables) puis poll()
+  périodiquement (par exemple avec after() dans Tkinter)
+"""
+
+import queries
+
+
+def get_versions(conn=None):
+    """
+    Lit les compteurs de version de toutes les tables suivies.
+
+    Args:
+        conn (sqlite3.Connection, optional): Connexion à réutiliser (par
+            exemple celle d'une transaction en cours) ; par défaut, la requête
+            nommée "data_versions" est exécutée sur le pool de queries
+
+    Returns:
+        dict: {nom_table: version}
+    """
+    if conn is None:
+        rows = queries.fetchall("data_versions")
+    else:
+        rows = conn.execute(queries.STATEMENTS["data_versions"]).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def get_version(table):
+    """
+    Lit le compteur de version d'une table.
+
+    Args:
+        table (str): Nom de la table suivie
+
+    Returns:
+        int: Version courante (0 si la table n'est pas suivie)
+    """
+    return get_versions().get(table, 0)
+
+
+class DataVersionWatcher:
+    """
+    Surveille data_version et prévient les abonnés des tables modifiées.
+
+    Attributes:
+        _known (dict): Dernières versions observées (None avant le premier poll)
+        _subscribers (dict): jeton -> (callback, ensemble de tables ou None)
+    """
+
+    def __init__(self):
+        """Initialise un observateur sans abonné."""
+        self._known = None
+        self._subscribers = {}
+        self._next_token = 0
+
+    def subscribe(self, callback, tables=None):
+        """
+        Abonne une fonction aux changements de certaines tables.
+
+        Args:
+            callback (callable): Appelée avec l'ensemble des tables modifiées
+            tables (iterable, optional): Tables surveillées (toutes par défaut)
+
+        Returns:
+            int: Jeton à passer à unsubscribe()
+        """
+        self._next_token += 1
+        self._subscribers[self._next_token] = (callback, set(tables) if tables else None)
+        return self._next_token
+
+    def unsubscribe(self, token):
+        """Retire un abonnement."""
+        self._subscribers.pop(token, None)
+
+    def poll(self):
+        """
+        Relit les versions et notifie les abonnés concernés.
+
+        Le premier appel mémorise seulement l'état initial.
+
+        Returns:
+            set: Tables modifiées depuis le dernier appel
+        """
+        versions = get_versions()
+        if self._known is None:
+            self._known = versions
+            return set()
+
+        changed = {table for table, version in versions.items()
+                   if self._known.get(table) != version}
+        self._known = versions
+        if not changed:
+            return changed
+
+        for callback, tables in list(self._subscribers.values()):
+            relevant = changed if tables is None else changed & tables
+            if relevant:
+                callback(relevant)
+        return changed
+
+
+_watcher = None
+
+
+def get_watcher():
+    """
+    Retourne l'observateur partagé par l'application.
+
+    Returns:
+        DataVersionWatcher: L'observateur partagé
+    """
+    global _watcher
+    if _watcher is None:
+        _watcher = DataVersionWatcher()
+    return _watcher
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+API HTTP/JSON locale (lecture seule) sur les contrôleurs.
+
+Serveur de la bibliothèque standard (http.server), sans service externe :
+
+    python webapi.py --port 8000
+
+Routes (GET) :
+    /api/students/<user_id>/timetable   emploi du temps du groupe de l'étudiant
+    /api/students/<user_id>/today       cours du jour
+    /api/teachers/<user_id>/timetable   emploi du temps de l'enseignant
+    /api/rooms/free?day=&start=&duration=   salles libres (voir search_free_room)
+    /api/stats                          statistiques d'occupation des salles
+
+Chaque route déclare les tables dont elle dépend. L'ETag d'une réponse est
+calculé à partir de l'URL et des versions de ces tables (data_version) :
+tant qu'elles n'ont pas changé, un client qui renvoie If-None-Match reçoit
+304 sans corps, et les autres reçoivent la réponse gardée en cache, sans
+appel au contrôleur. Une requête coûte alors une seule lecture de
+data_version, même avec des centaines d'étudiants qui interrogent l'API.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import versioning
+
+# Adresse d'écoute par défaut (locale uniquement)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Nombre de réponses gardées en cache
+RESPONSE_CACHE_SIZE = 512
+
+# Tables des emplois du temps (noms compris)
+TIMETABLE_TABLES = ("timetable", "subjects", "instructors", "groups", "rooms")
+
+# Routes étudiant : le groupe de l'étudiant est lu dans student_groups
+STUDENT_TABLES = TIMETABLE_TABLES + ("student_groups",)
+
+
+class ApiError(Exception):
+    """Erreur de requête, renvoyée au client avec son code HTTP."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(params, name, default=None):
+    """Paramètre entier de la chaîne de requête (ApiError 400 si invalide)."""
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise ApiError(400, f"Paramètre '{name}' invalide : {values[0]}")
+
+
+def student_timetable(user_id, params):
+    from controllers.student_controller import StudentController
+    return StudentController(user_id).get_group_timetable()
+
+
+def student_today(user_id, params):
+    from controllers.student_controller import StudentController
+    return StudentController(user_id).get_today_schedule()
+
+
+def teacher_timetable(user_id, params):
+    from controllers.teacher_controller import TeacherController
+    return TeacherController(user_id).get_teacher_timetable()
+
+
+def free_rooms(params):
+    from controllers.student_controller import StudentController
+    day = _int_param(params, "day")
+    if day is not None and not 1 <= day <= 5:
+        raise ApiError(400, "Jour invalide (1-5)")
+    start_hour = _int_param(params, "start")
+    duration = _int_param(params, "duration", 2)
+    # La recherche de salles ne dépend pas de l'étudiant
+    return StudentController(None).search_free_room(day, start_hour, duration)
+
+
+def room_stats(params):
+    import analytics
+    from controllers.admin_controller import AdminController
+    return {
+        "success": True,
+        "summary": analytics.get_cube().summary(),
+        "rooms": AdminController(None).get_statistiques_salles(),
+    }
+
+
+def _today():
+    """Jour courant (1=Lundi) : les réponses "today" changent avec la date."""
+    return datetime.now().weekday() + 1
+
+
+# Routes : (motif de chemin, fonction, tables dont dépend la réponse, clé de cache en plus)
+ROUTES = [
+    (re.compile(r"^/api/students/(\d+)/timetable$"), student_timetable, STUDENT_TABLES, None),
+    (re.compile(r"^/api/students/(\d+)/today$"), student_today, STUDENT_TABLES, _today),
+    (re.compile(r"^/api/teachers/(\d+)/timetable$"), teacher_timetable, TIMETABLE_TABLES, None),
+    (re.compile(r"^/api/rooms/free$"), free_rooms, ("timetable", "reservations", "rooms"), None),
+    (re.compile(r"^/api/stats$"), room_stats, ("timetable", "rooms", "groups"), None),
+]
+
+
+class ResponseCache:
+    """
+    Réponses JSON déjà calculées, valables tant que leurs tables n'ont pas changé.
+
+    Attributes:
+        max_entries (int): Nombre maximal de réponses gardées (LRU)
+        _entries (OrderedDict): clé -> (ETag, corps encodé)
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        """Initialise un cache vide."""
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Réponse (ETag, corps) gardée pour cette clé, ou None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, body):
+        """Garde une réponse et oublie la moins récemment utilisée si besoin."""
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def resolve(path, params):
+    """
+    Trouve la route d'un chemin.
+
+    Returns:
+        tuple: (fonction à appeler, tables, complément de clé de cache)
+
+    Raises:
+        ApiError: 404 si aucune route ne correspond
+    """
+    for pattern, handler, tables, extra_key in ROUTES:
+        match = pattern.match(path)
+        if match is None:
+            continue
+        args = [int(group) for group in match.groups()]
+        extra = extra_key() if extra_key is not None else None
+        return (lambda: handler(*args, params)), tables, extra
+    raise ApiError(404, f"Route inconnue : {path}")
+
+
+def make_etag(key, stamp):
+    """ETag faible d'une réponse : empreinte de l'URL et des versions des tables."""
+    digest = hashlib.sha1(repr((key, stamp)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Requêtes GET de l'API ; le cache est partagé par le serveur (server.cache)."""
+
+    server_version = "EmploiDuTempsAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        try:
+            call, tables, extra = resolve(url.path, params)
+            versions = versioning.get_versions()
+            stamp = tuple(versions.get(table, 0) for table in tables)
+            # Paramètres triés : "?a=1&b=2" et "?b=2&a=1" partagent la même entrée
+            key = (url.path, tuple(sorted((name, tuple(values)) for name, values in params.items())), extra)
+            etag = make_etag(key, stamp)
+
+            if etag in self._if_none_match():
+                self._send(304, b"", etag)
+                return
+
+            cached = self.server.cache.get(key)
+            if cached is not None and cached[0] == etag:
+                self._send(200, cached[1], etag)
+                return
+
+            body = json.dumps(call(), ensure_ascii=False, default=str).encode("utf-8")
+            self.server.cache.put(key, etag, body)
+            self._send(200, body, etag)
+        except ApiError as e:
+            self._send_error(e.status, str(e))
+        except Exception as e:
+            self._send_error(500, f"Erreur interne : {e}")
+
+    def _if_none_match(self):
+        header = self.headers.get("If-None-Match", "")
+        return {tag.strip() for tag in header.split(",") if tag.strip()}
+
+    def _send(self, status, body, etag):
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        # Le client doit revalider à chaque fois (réponse 304 peu coûteuse)
+        self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({"success": False, "error": message}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête sur la console (trop bavard sous charge)
+        pass
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=RESPONSE_CACHE_SIZE):
+    """
+    Crée le serveur HTTP (un thread par connexion) avec son cache de réponses.
+
+    Returns:
+        ThreadingHTTPServer: Serveur prêt pour serve_forever()
+    """
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.cache = ResponseCache(cache_size)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP/JSON locale de consultation des emplois du temps")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    from database import setup
+    setup()
+    server = make_server(args.host, args.port)
+    print(f"API disponible sur http://{args.host}:{args.port}/api/ (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
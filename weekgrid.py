@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Données des grilles hebdomadaires (jours × heures) par groupe, enseignant ou salle.
+
+Tout l'emploi du temps de la semaine est lu en une seule requête
+("week_slots"), puis découpé en vues : les créneaux d'un groupe, d'un
+enseignant ou d'une salle. Chaque vue est calculée une fois et mise en cache ;
+passer d'une vue à l'autre ne relit pas la base.
+
+Quand l'emploi du temps change, seuls les créneaux modifiés sont relus : le
+journal change_log (voir changelog) donne leurs ids depuis le dernier numéro
+de séquence lu, et les vues en cache sont mises à jour pour ces seuls
+créneaux. La semaine n'est relue entièrement qu'au premier chargement,
+quand les noms (matières, groupes, salles, enseignants) changent, ou quand
+trop de changements se sont accumulés. diff_slots() permet ensuite à un
+affichage de ne redessiner que les créneaux ajoutés, modifiés ou supprimés.
+"""
+
+import threading
+
+import changelog
+import queries
+import versioning
+
+# Tables dont dépendent les grilles
+GRID_TABLES = ("timetable", "subjects", "instructors", "groups", "rooms")
+
+# Tables des noms affichés : un changement impose de tout relire
+NAME_TABLES = ("subjects", "instructors", "groups", "rooms")
+
+# Au-delà de ce nombre de créneaux changés, relire la semaine est plus simple
+MAX_INCREMENTAL_CHANGES = 500
+
+# Types de vue -> colonne de l'emploi du temps filtrée
+VIEW_COLUMNS = {
+    "group": "group_id",
+    "instructor": "instructor_id",
+    "room": "room_id",
+}
+
+
+def diff_slots(old, new):
+    """
+    Compare deux vues ({id: créneau}).
+
+    Returns:
+        tuple: (créneaux ajoutés ou modifiés, ids supprimés)
+    """
+    changed = [slot for slot_id, slot in new.items() if old.get(slot_id) != slot]
+    removed = [slot_id for slot_id in old if slot_id not in new]
+    return changed, removed
+
+
+class WeekGridStore:
+    """
+    Créneaux de la semaine et vues par entité.
+
+    Attributes:
+        _slots (dict): id -> créneau (dict id, day, start_hour, duration, group_id,
+            instructor_id, room_id, subject, subject_type, group_name, instructor, room)
+        _views (dict): (type de vue, id) -> {id: créneau}
+        _names_stamp (tuple): Versions de NAME_TABLES au dernier chargement complet
+        _timetable_version (int): Version de timetable au dernier rafraîchissement
+        _feed (changelog.ChangeFeed): Position dans le journal des modifications
+    """
+
+    def __init__(self):
+        """Initialise un magasin vide (chargé à la première lecture)."""
+        self._slots = {}
+        self._views = {}
+        self._names_stamp = None
+        self._timetable_version = None
+        self._feed = None
+        self._lock = threading.Lock()
+
+    def load(self, rows):
+        """Remplace la semaine par les lignes données et oublie les vues."""
+        self._slots = {row['id']: dict(row) for row in rows}
+        self._views = {}
+
+    def _load_all(self):
+        # Le numéro est lu avant la semaine : un changement intercalé sera réappliqué
+        self._feed = changelog.ChangeFeed(tables=("timetable",))
+        self.load(queries.fetchall("week_slots"))
+
+    def apply(self, slot_ids, rows):
+        """
+        Applique des créneaux relus à la semaine et aux vues en cache.
+
+        Args:
+            slot_ids (iterable): Ids des créneaux changés
+            rows (list): Leurs lignes actuelles ("week_slots") ; un id absent
+                correspond à un créneau supprimé
+
+        Returns:
+            set: Ids des créneaux effectivement ajoutés, modifiés ou supprimés
+        """
+        current = {row['id']: dict(row) for row in rows}
+        changed = set()
+        for slot_id in slot_ids:
+            old = self._slots.get(slot_id)
+            new = current.get(slot_id)
+            if old == new:
+                continue
+            changed.add(slot_id)
+            if new is None:
+                self._slots.pop(slot_id, None)
+            else:
+                self._slots[slot_id] = new
+
+            # Vues touchées : celles de l'ancien et du nouveau groupe / enseignant / salle.
+            # Chaque vue modifiée est remplacée (jamais modifiée en place).
+            for kind, column in VIEW_COLUMNS.items():
+                for slot in (old, new):
+                    if slot is None:
+                        continue
+                    key = (kind, slot[column])
+                    view = self._views.get(key)
+                    if view is None:
+                        continue
+                    view = dict(view)
+                    view.pop(slot_id, None)
+                    if new is not None and new[column] == key[1]:
+                        view[slot_id] = new
+                    self._views[key] = view
+        return changed
+
+    def _apply_changes(self):
+        """
+        Relit les créneaux changés depuis la dernière position du journal.
+
+        Returns:
+            bool: False si le journal ne suffit pas (changements trop nombreux
+                ou déjà purgés) et qu'il faut tout relire
+        """
+        changes = []
+        try:
+            while True:
+                changes += self._feed.poll()
+                if len(changes) > MAX_INCREMENTAL_CHANGES:
+                    return False
+                if self._feed.caught_up:
+                    break
+        except changelog.GapError:
+            return False
+        if not changes:
+            return True
+        slot_ids = sorted(changelog.changed_ids(changes))
+        placeholders = ", ".join("?" * len(slot_ids))
+        rows = queries.fetchall_sql("week_slots_by_id",
+                                    queries.STATEMENTS["week_slots"] + f" WHERE t.id IN ({placeholders})",
+                                    slot_ids)
+        self.apply(slot_ids, rows)
+        return True
+
+    def refresh(self):
+        """
+        Met la semaine à jour si GRID_TABLES ont changé.
+
+        Returns:
+            bool: True si des données ont été relues
+        """
+        versions = versioning.get_versions()
+        names_stamp = tuple(versions.get(table, 0) for table in NAME_TABLES)
+        timetable_version = versions.get("timetable", 0)
+        with self._lock:
+            if self._names_stamp != names_stamp:
+                self._load_all()
+            elif self._timetable_version != timetable_version:
+                if not self._apply_changes():
+                    self._load_all()
+            else:
+                return False
+            self._names_stamp = names_stamp
+            self._timetable_version = timetable_version
+            return True
+
+    def view(self, kind, entity_id):
+        """
+        Créneaux d'un groupe, d'un enseignant ou d'une salle.
+
+        Args:
+            kind (str): "group", "instructor" ou "room"
+            entity_id (int): ID de l'entité
+
+        Returns:
+            dict: {id: créneau} (partagé : ne pas modifier)
+        """
+        if kind not in VIEW_COLUMNS:
+            raise ValueError(f"Type de vue inconnu : {kind}")
+        self.refresh()
+        with self._lock:
+            key = (kind, entity_id)
+            slots = self._views.get(key)
+            if slots is None:
+                column = VIEW_COLUMNS[kind]
+                slots = {slot_id: slot for slot_id, slot in self._slots.items()
+                         if slot[column] == entity_id}
+                self._views[key] = slots
+            return slots
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Retourne le magasin de grilles partagé.
+
+    Returns:
+        WeekGridStore: Le magasin partagé
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WeekGridStore()
+    return _store